@@ -0,0 +1,103 @@
+"""
+Benchmark of AsyncSSHSession receiving large command outputs. Starts a local asyncssh server
+answering "replay <bytes>" with that many bytes of output followed by a prompt split across
+two writes, then times recv_until_prompt and stream_until_prompt for each size.
+
+usage:
+    python benchmarks/async_ssh_receive.py --sizes 1 8 32 --repeat 3
+"""
+
+import argparse
+import asyncio
+import time
+
+import asyncssh
+
+from sli.async_ssh import AsyncSSHSession
+
+PROMPT = "admin@bench-fw> "
+LINE = "ethernet1/1          up      10000/full/up     00:1b:17:00:01:10   "
+
+
+async def handle_session(process):
+    """Emulate a PAN-OS cli, echoing commands and replaying output of the requested size"""
+    process.stdout.write("Welcome admin.\r\n" + PROMPT)
+    while True:
+        command = await process.stdin.readline()
+        if not command:
+            break
+        command = command.strip()
+        process.stdout.write(command + "\r\n")
+        if command.startswith("replay "):
+            remaining = int(command.split()[1])
+            block = (LINE + "\r\n") * 1024
+            while remaining > 0:
+                process.stdout.write(block[:remaining])
+                remaining -= len(block)
+                await process.stdout.drain()
+            process.stdout.write("\r\n")
+        # Split the prompt across writes, as a device may
+        process.stdout.write(PROMPT[:6])
+        await process.stdout.drain()
+        process.stdout.write(PROMPT[6:])
+    process.exit(0)
+
+
+class BenchServer(asyncssh.SSHServer):
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        return True
+
+
+async def start_server():
+    """Start the server on a free local port, returns the server and port"""
+    key = asyncssh.generate_private_key("ssh-ed25519")
+    server = await asyncssh.create_server(
+        BenchServer, "127.0.0.1", 0, server_host_keys=[key], process_factory=handle_session, line_editor=False
+    )
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def run_benchmark(sizes, repeat):
+    server, port = await start_server()
+    client = AsyncSSHSession("127.0.0.1", "admin", "admin", port=port)
+    await client.connect()
+
+    async def discard(data):
+        pass
+
+    print(f"{'Size':>8}  {'Method':<20}{'Best':>10}{'MB/s':>10}")
+    try:
+        for size in sizes:
+            nbytes = int(size * 1024 * 1024)
+            for name in ("recv_until_prompt", "stream_until_prompt"):
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    if name == "recv_until_prompt":
+                        await client.cli_command(f"replay {nbytes}")
+                    else:
+                        await client.cli_command(f"replay {nbytes}", stream=discard)
+                    times.append(time.perf_counter() - start)
+                best = min(times)
+                print(f"{size:>6}MB  {name:<20}{best:>9.3f}s{size / best:>10.1f}")
+    finally:
+        client.close()
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AsyncSSHSession receiving large outputs")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 8, 32], help="Output sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each size, the best is reported")
+    args = parser.parse_args()
+    asyncio.get_event_loop().run_until_complete(run_benchmark(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
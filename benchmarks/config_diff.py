@@ -0,0 +1,149 @@
+"""
+Benchmark of the diff engine in sli/configDiff.py against skilletlib's diff on synthetic
+configurations of address objects, address groups and security rules. The latest configuration
+changes a fraction of the objects and rules of the previous one, and adds and removes some.
+Each engine runs in its own process, reporting its runtime and peak RSS, and the outputs of
+both engines are compared.
+
+usage:
+    python benchmarks/config_diff.py --objects 20000 --rules 5000
+    python benchmarks/config_diff.py --objects 200000 --rules 50000 --format set --engines sli
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+
+def generate_config(objects, rules, changes=0.0, seed=0):
+    """Return a firewall configuration as bytes, changing a fraction of it for a given seed"""
+    rand = random.Random(seed)
+    rule_uuids = random.Random(1)
+
+    def changed():
+        return changes and rand.random() < changes
+
+    addresses = []
+    for i in range(objects):
+        if changed() and rand.random() < 0.2:
+            continue
+        ip = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}/32" if not changed() else f"172.16.{i % 256}.1/32"
+        addresses.append(f'<entry name="addr-{i}"><ip-netmask>{ip}</ip-netmask><tag><member>tag-{i % 50}</member>'
+                         f'</tag><description>address {i}</description></entry>')
+    if changes:
+        addresses.extend(f'<entry name="new-addr-{i}"><fqdn>host{i}.example.com</fqdn></entry>'
+                         for i in range(int(objects * changes)))
+
+    groups = []
+    for i in range(objects // 100):
+        members = "".join(f"<member>addr-{i * 100 + j}</member>" for j in range(0, 100, 5 if not changed() else 4))
+        groups.append(f'<entry name="group-{i}"><static>{members}</static></entry>')
+
+    security = []
+    for i in range(rules):
+        action = "allow" if not changed() else "deny"
+        security.append(
+            f'<entry name="rule-{i}" uuid="{uuid.UUID(int=rule_uuids.getrandbits(128))}"><from><member>trust</member>'
+            f'</from><to><member>untrust</member></to><source><member>group-{i % max(objects // 100, 1)}</member>'
+            "</source><destination><member>any</member></destination><application><member>web-browsing</member>"
+            "<member>ssl</member></application><service><member>application-default</member></service>"
+            f"<action>{action}</action><log-end>yes</log-end></entry>"
+        )
+
+    tags = "".join(f'<entry name="tag-{i}"><color>color{i % 16 + 1}</color></entry>' for i in range(50))
+    config = (
+        '<config version="10.1.0"><mgt-config><users><entry name="admin"><phash>x</phash></entry></users>'
+        '</mgt-config><devices><entry name="localhost.localdomain"><deviceconfig><system><hostname>bench-fw'
+        '</hostname></system></deviceconfig><vsys><entry name="vsys1">'
+        f'<tag>{tags}</tag><address>{"".join(addresses)}</address><address-group>{"".join(groups)}</address-group>'
+        f'<rulebase><security><rules>{"".join(security)}</rules></security></rulebase>'
+        '</entry></vsys></entry></devices></config>'
+    )
+    return config.encode()
+
+
+def run_engine(engine, output_format, previous_file, latest_file):
+    """Diff two configuration files with an engine, printing JSON results"""
+    with open(previous_file, "rb") as f:
+        previous = f.read()
+    with open(latest_file, "rb") as f:
+        latest = f.read()
+
+    # Both engines import skilletlib, import it before timing
+    from sli.configDiff import ConfigDiff
+    from skilletlib.panoply import Panoply
+
+    start = time.perf_counter()
+    if engine == "sli":
+        diff = ConfigDiff(previous, latest)
+        output = diff.set_commands() if output_format == "set" else diff.snippets()
+    else:
+        pan = Panoply()
+        previous, latest = previous.decode(), latest.decode()
+        if output_format == "set":
+            output = pan.generate_set_cli_from_configs(previous, latest)
+        else:
+            output = pan.generate_skillet_from_configs(previous, latest)
+    elapsed = time.perf_counter() - start
+
+    # Snippet names are random, compare the rest
+    if output_format != "set":
+        output = [[x["xpath"], x["element"], x["full_xpath"]] for x in output]
+    print(json.dumps({
+        "seconds": elapsed,
+        "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "items": len(output),
+        "digest": hashlib.sha256(json.dumps(output).encode()).hexdigest(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sli config diff against skilletlib")
+    parser.add_argument("--objects", type=int, default=20000, help="Address objects in the configurations")
+    parser.add_argument("--rules", type=int, default=5000, help="Security rules in the configurations")
+    parser.add_argument("--changes", type=float, default=0.01, help="Fraction of objects and rules changed")
+    parser.add_argument("--format", choices=["set", "snippets"], default="snippets", help="Diff output")
+    parser.add_argument("--engines", nargs="+", choices=["sli", "skilletlib"], default=["sli", "skilletlib"])
+    parser.add_argument("--run", nargs=3, metavar=("ENGINE", "PREVIOUS", "LATEST"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        return run_engine(args.run[0], args.format, args.run[1], args.run[2])
+
+    with tempfile.TemporaryDirectory() as workdir:
+        previous_file = os.path.join(workdir, "previous.xml")
+        latest_file = os.path.join(workdir, "latest.xml")
+        with open(previous_file, "wb") as f:
+            f.write(generate_config(args.objects, args.rules))
+        with open(latest_file, "wb") as f:
+            f.write(generate_config(args.objects, args.rules, args.changes, seed=1))
+        size = os.path.getsize(latest_file) / 1024 / 1024
+        print(f"Configurations of {size:.1f} MB, {args.objects} objects and {args.rules} rules, "
+              f"{args.changes:.1%} changed, {args.format} output")
+
+        print(f"{'Engine':<12}{'Items':>8}{'Seconds':>10}{'Peak RSS MB':>14}")
+        digests = set()
+        for engine in args.engines:
+            result = subprocess.run(
+                [sys.executable, __file__, "--format", args.format, "--run", engine, previous_file, latest_file],
+                stdout=subprocess.PIPE,
+                text=True,
+                check=True,
+            )
+            result = json.loads(result.stdout.strip().split("\n")[-1])
+            digests.add(result["digest"])
+            print(f"{engine:<12}{result['items']:>8}{result['seconds']:>10.2f}{result['rss'] / 1024 / 1024:>14.1f}")
+        if len(args.engines) > 1:
+            print("Outputs match" if len(digests) == 1 else "Outputs differ")
+
+
+if __name__ == "__main__":
+    main()
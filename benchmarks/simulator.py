@@ -0,0 +1,565 @@
+"""
+A local stand-in for a PAN-OS device, used to measure SLI without real firewalls. The simulator
+serves an SSH cli and an HTTPS XML API sharing one configuration:
+
+    SSH   login banner and prompt, set cli scripting-mode / pager, configure with [edit] prompts,
+          set and delete (recorded, not applied to the configuration), user password prompts,
+          commit and show commands returning output_size bytes
+    API   /api keygen, op (system info, show config running / candidate / saved / audit versions,
+          show devices connected, load config), config get / show / set / edit / delete,
+          config completions, import of configuration files and commit
+
+Output of SSH commands is delivered latency seconds after the command is received, without
+delaying the commands that follow, as a network round trip would. API requests wait latency
+seconds before responding. Start it in the background
+of a benchmark or program with
+
+    simulator = Simulator(latency=0.01, config_objects=5000)
+    simulator.start()
+    ... connect to 127.0.0.1 on simulator.ssh_port and simulator.api_port ...
+    simulator.stop()
+
+or run it in the foreground with python benchmarks/simulator.py --help
+
+The self-signed certificate of the XML API is generated with cryptography, which the
+benchmarks need installed in addition to SLI.
+"""
+
+import argparse
+import asyncio
+import datetime
+import email.parser
+import email.policy
+import os
+import re
+import ssl
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import asyncssh
+from lxml import etree
+
+DEFAULT_HOSTNAME = "sim-fw"
+OUTPUT_LINE = "ethernet1/{0:<10} up    10000/full/up    00:1b:17:00:{1:02x}:10    vsys1    untrust-zone"
+
+
+def generate_config(hostname, objects=100):
+    """Return a configuration XML string with objects address objects"""
+    addresses = "".join(
+        f'<entry name="sim-address-{i}"><ip-netmask>10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}/32'
+        f'</ip-netmask><description>simulated address {i}</description></entry>'
+        for i in range(objects)
+    )
+    return (
+        '<config version="10.1.0" urldb="paloaltonetworks">'
+        '<mgt-config><users><entry name="admin"><permissions><role-based><superuser>yes</superuser>'
+        '</role-based></permissions></entry></users></mgt-config><shared/>'
+        '<devices><entry name="localhost.localdomain"><deviceconfig><system>'
+        f'<hostname>{hostname}</hostname><timezone>US/Pacific</timezone>'
+        '</system></deviceconfig><vsys><entry name="vsys1">'
+        f'<address>{addresses}</address>'
+        '</entry></vsys></entry></devices></config>'
+    )
+
+
+def generate_certificate(directory):
+    """Write a self signed certificate and key for the API to directory, returns their paths"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "sli-simulator")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=365))
+        .sign(key, hashes.SHA256())
+    )
+    cert_file = os.path.join(directory, "simulator.crt")
+    key_file = os.path.join(directory, "simulator.key")
+    with open(cert_file, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_file, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    return cert_file, key_file
+
+
+def ensure_xpath(root, xpath):
+    """Return the element at a simple xpath below root, creating missing elements on the way"""
+    element = root
+    for step in [x for x in xpath.split("/") if x][1:]:
+        match = re.match(r"^([\w\-.]+)(?:\[@name=['\"](.*)['\"]\])?$", step)
+        if match is None:
+            raise ValueError(f"Unsupported xpath step {step}")
+        tag, name = match.groups()
+        query = f"{tag}[@name='{name}']" if name is not None else tag
+        child = element.find(query)
+        if child is None:
+            child = etree.SubElement(element, tag)
+            if name is not None:
+                child.set("name", name)
+        element = child
+    return element
+
+
+def merge_element(target, source):
+    """Merge the children of source into target as a config set would"""
+    if source.text and source.text.strip():
+        target.text = source.text
+    existing = {(x.tag, x.get("name")): x for x in target if x.tag != "member"}
+    members = {x.text for x in target if x.tag == "member"}
+    for child in list(source):
+        if child.tag == "member":
+            if child.text not in members:
+                members.add(child.text)
+                target.append(child)
+            continue
+        key = (child.tag, child.get("name"))
+        if key not in existing:
+            existing[key] = child
+            target.append(child)
+        else:
+            merge_element(existing[key], child)
+
+
+class SimulatedDevice:
+    """
+    State of the simulated device shared by the SSH and API servers. Configurations are lxml
+    trees guarded by lock, as API requests are handled by several threads
+    """
+
+    def __init__(self, hostname=DEFAULT_HOSTNAME, username="admin", password="admin", latency=0.0,
+                 output_size=4096, config_objects=100, model="PA-VM", sw_version="10.1.0", connected_devices=0):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.latency = latency  # Seconds to wait before answering each command or request
+        self.output_size = output_size  # Bytes of output returned by show commands over SSH
+        self.model = model
+        self.sw_version = sw_version
+        self.connected_devices = connected_devices  # Firewalls listed by show devices connected
+        self.api_key = "LUFRPT1TaW11bGF0b3JLZXk="
+        self.lock = threading.Lock()
+        self.running = etree.fromstring(generate_config(hostname, config_objects))
+        self.candidate = etree.fromstring(generate_config(hostname, config_objects))
+        self.versions = [(1, time.strftime("%Y/%m/%d %H:%M:%S"), etree.tostring(self.running))]
+        self.saved = {}
+        self.cli_changes = []  # set and delete commands received over SSH
+        self.stats = {"ssh_commands": 0, "api_requests": 0}
+        self._output = None
+
+    def get_output(self, command):
+        """Return output of an operational command run over SSH"""
+        if not command.startswith("show"):
+            return ""
+        if self._output is None:
+            lines = []
+            size = 0
+            while size < self.output_size:
+                lines.append(OUTPUT_LINE.format(len(lines), len(lines) % 256))
+                size += len(lines[-1]) + 2
+            self._output = "\r\n".join(lines) + "\r\n"
+        return self._output
+
+    def commit(self):
+        """Make the candidate configuration the running configuration, returns the new version"""
+        with self.lock:
+            self.running = etree.fromstring(etree.tostring(self.candidate))
+            version = self.versions[-1][0] + 1
+            self.versions.append((version, time.strftime("%Y/%m/%d %H:%M:%S"), etree.tostring(self.running)))
+            return version
+
+
+class SimulatedSSHServer(asyncssh.SSHServer):
+
+    def __init__(self, device):
+        self.device = device
+
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        return username == self.device.username and password == self.device.password
+
+
+class SimulatedCLI:
+    """A PAN-OS cli session over SSH"""
+
+    def __init__(self, device, process):
+        self.device = device
+        self.process = process
+        self.config_mode = False
+        self.delayed = asyncio.Queue()
+
+    @property
+    def prompt(self):
+        return f"{self.device.username}@{self.device.hostname}{'#' if self.config_mode else '>'} "
+
+    def write(self, data):
+        """Write output, delivered latency seconds later if set, as a network round trip would"""
+        if not self.device.latency:
+            self.process.stdout.write(data)
+            return
+        self.delayed.put_nowait((asyncio.get_event_loop().time() + self.device.latency, data))
+
+    async def deliver(self):
+        """Write delayed output in order once it is due"""
+        while True:
+            due, data = await self.delayed.get()
+            if data is None:
+                return
+            await asyncio.sleep(due - asyncio.get_event_loop().time())
+            self.process.stdout.write(data)
+
+    async def read_line(self, echo=True):
+        line = await self.process.stdin.readline()
+        if echo and line:
+            self.write(line.rstrip("\r\n") + "\r\n")
+        return line
+
+    async def run(self):
+        deliver = asyncio.ensure_future(self.deliver())
+        self.write(f"Last login: {time.ctime()}\r\n\r\nNumber of failed attempts since last successful login: 0\r\n\r\n")
+        self.write(self.prompt)
+        while True:
+            line = await self.read_line()
+            if not line:
+                break
+            command = line.strip()
+            self.device.stats["ssh_commands"] += 1
+            if command == "exit" and not self.config_mode:
+                break
+            await self.handle(command)
+            await self.process.stdout.drain()
+        self.delayed.put_nowait((0, None))
+        await deliver
+        self.process.exit(0)
+
+    async def handle(self, command):
+        if not command:
+            self.write(self.prompt)
+        elif command == "configure" and not self.config_mode:
+            self.config_mode = True
+            self.write("Entering configuration mode\r\n[edit]\r\n" + self.prompt)
+        elif command == "exit":
+            self.config_mode = False
+            self.write("Exiting configuration mode\r\n" + self.prompt)
+        elif command.startswith("set cli ") and not self.config_mode:
+            self.write(self.prompt)
+        elif command == "commit" and self.config_mode:
+            version = self.device.commit()
+            self.write(f"\r\nCommit job {version} is in progress. Use Ctrl+C to return to command prompt\r\n"
+                       f"...100%\r\nConfiguration committed successfully\r\n\r\n[edit]\r\n" + self.prompt)
+        elif self.config_mode and re.match(r"^set mgt-config users \S+ password$", command):
+            self.write("Enter password   : ")
+            await self.read_line(echo=False)
+            self.write("\r\nConfirm password : ")
+            await self.read_line(echo=False)
+            self.device.cli_changes.append(command)
+            self.write("\r\n\r\n[edit]\r\n" + self.prompt)
+        elif self.config_mode and re.match(r"^(set|delete) \S+", command):
+            self.device.cli_changes.append(command)
+            self.write("\r\n[edit]\r\n" + self.prompt)
+        elif command.startswith("show") or command.startswith("request"):
+            self.write(self.device.get_output(command) + self.prompt)
+        else:
+            self.write(f"Unknown command: {command.split(' ')[0]}\r\n"
+                       + ("\r\n[edit]\r\n" if self.config_mode else "") + self.prompt)
+
+
+class SimulatedAPIHandler(BaseHTTPRequestHandler):
+    """Handler of /api requests, the simulated device is set on the server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def device(self):
+        return self.server.device
+
+    def do_GET(self):
+        self.handle_api(parse_qs(urlparse(self.path).query), {})
+
+    def do_POST(self):
+        params = parse_qs(urlparse(self.path).query)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        content_type = self.headers.get("Content-Type", "")
+        files = {}
+        if content_type.startswith("multipart/form-data"):
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+            )
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if part.get_filename() is not None:
+                    files[name] = (part.get_filename(), part.get_payload(decode=True))
+                else:
+                    params.setdefault(name, []).append(part.get_payload(decode=True).decode())
+        else:
+            for key, value in parse_qs(body.decode()).items():
+                params.setdefault(key, []).extend(value)
+        self.handle_api(params, files)
+
+    def respond(self, body, status=200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/xml; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def success(self, result="", attributes=""):
+        self.respond(f'<response status="success"{attributes}><result>{result}</result></response>')
+
+    def error(self, message, code=None, status=200):
+        code = f' code="{code}"' if code is not None else ""
+        self.respond(f'<response status="error"{code}><msg><line>{escape(message)}</line></msg></response>', status)
+
+    def handle_api(self, params, files):
+        if urlparse(self.path).path != "/api" and urlparse(self.path).path != "/api/":
+            return self.respond("<response status=\"error\"><msg>Not found</msg></response>", 404)
+        if self.device.latency:
+            time.sleep(self.device.latency)
+        self.device.stats["api_requests"] += 1
+        params = {key: value[-1] for key, value in params.items()}
+
+        request_type = params.get("type")
+        if request_type == "keygen":
+            if params.get("user") != self.device.username or params.get("password") != self.device.password:
+                return self.error("Invalid Credential", code=403, status=403)
+            return self.success(f"<key>{self.device.api_key}</key>")
+        if params.get("key") != self.device.api_key:
+            return self.error("Invalid credentials.", code=403, status=403)
+
+        try:
+            if request_type == "op":
+                return self.handle_op(params)
+            if request_type == "config":
+                return self.handle_config(params)
+            if request_type == "import":
+                return self.handle_import(params, files)
+            if request_type == "commit":
+                version = self.device.commit()
+                return self.respond(f'<response status="success" code="19"><result><msg><line>Commit job enqueued '
+                                    f'with jobid {version}</line></msg><job>{version}</job></result></response>')
+        except (ValueError, etree.XMLSyntaxError) as e:
+            return self.error(str(e))
+        return self.error(f"Unsupported request type {request_type}", code=400)
+
+    def handle_op(self, params):
+        device = self.device
+        if params.get("action") == "complete":
+            if params.get("xpath", "").endswith("/config/audit/version"):
+                completions = "".join(f'<completion value="{v}" help-string="{d}"/>' for v, d, _ in device.versions)
+            else:
+                completions = "".join(f'<completion value="{x}"/>' for x in device.saved)
+            return self.respond(f'<response status="success"><completions>{completions}</completions></response>')
+
+        cmd = etree.fromstring(params.get("cmd", "<none/>"))
+        path = "/".join(x.tag for x in cmd.iter())
+        if path.startswith("show/system/info"):
+            return self.success(
+                f"<system><hostname>{device.hostname}</hostname><ip-address>127.0.0.1</ip-address>"
+                f"<model>{device.model}</model><serial>007200000000001</serial><sw-version>{device.sw_version}"
+                "</sw-version><family>vm</family><vm-license>VM-100</vm-license></system>"
+            )
+        if path.startswith("show/config/running") or path.startswith("show/config/candidate"):
+            with device.lock:
+                config = device.running if "running" in path else device.candidate
+                return self.success(etree.tostring(config).decode())
+        if path.startswith("show/config/saved"):
+            saved = device.saved.get(cmd.findtext(".//saved", "").strip())
+            if saved is None:
+                return self.error("Configuration file not found")
+            return self.success(saved.decode())
+        if path.startswith("show/config/audit/base-version"):
+            version = cmd.findtext(".//base-version", "").strip()
+            config = [x for v, _, x in device.versions if str(v) == version]
+            if not config:
+                return self.error(f"Configuration version {version} not found")
+            return self.success(config[0].decode())
+        if path.startswith("show/jobs/id"):
+            job = cmd.findtext(".//id", "").strip()
+            return self.success(
+                f"<job><id>{job}</id><type>Commit</type><status>FIN</status><result>OK</result>"
+                "<progress>100</progress><details><line>Configuration committed successfully</line></details></job>"
+            )
+        if path.startswith("show/devices/connected"):
+            entries = "".join(
+                f'<entry name="0072000000{i:05d}"><serial>0072000000{i:05d}</serial><hostname>sim-fw-{i}</hostname>'
+                f"<ip-address>127.0.0.1</ip-address><model>PA-VM</model><sw-version>{device.sw_version}</sw-version>"
+                "<connected>yes</connected></entry>"
+                for i in range(device.connected_devices)
+            )
+            return self.success(f"<devices>{entries}</devices>")
+        if path.startswith("load/config/from"):
+            name = cmd.findtext(".//from", "").strip()
+            if name not in device.saved:
+                return self.error(f"{name} not found")
+            with device.lock:
+                device.candidate = etree.fromstring(device.saved[name])
+            return self.success(f"<msg><line>Config loaded from {name}</line></msg>")
+        return self.success(escape(device.get_output("show")))
+
+    def handle_config(self, params):
+        device = self.device
+        action = params.get("action")
+        xpath = params.get("xpath", "/config")
+        with device.lock:
+            if action == "complete":
+                names = [x.get("name") for x in device.running.getroottree().xpath(f"{xpath}/entry")]
+                completions = "".join(f'<completion value="{x}"/>' for x in names)
+                return self.respond(f'<response status="success"><completions>{completions}</completions></response>')
+            if action in ("get", "show"):
+                config = device.candidate if action == "get" else device.running
+                found = config.getroottree().xpath(xpath)
+                elements = "".join(etree.tostring(x).decode() for x in found if isinstance(x, etree._Element))
+                return self.success(elements, f' code="{19 if found else 7}"')
+            if action == "set":
+                source = etree.fromstring(f"<root>{params.get('element', '')}</root>")
+                merge_element(ensure_xpath(device.candidate, xpath), source)
+            elif action == "edit":
+                target = ensure_xpath(device.candidate, xpath)
+                replacement = etree.fromstring(params.get("element", ""))
+                target.getparent().replace(target, replacement)
+            elif action == "delete":
+                for element in device.candidate.getroottree().xpath(xpath):
+                    element.getparent().remove(element)
+            else:
+                return self.error(f"Unsupported config action {action}", code=400)
+        self.respond('<response status="success" code="20"><msg>command succeeded</msg></response>')
+
+    def handle_import(self, params, files):
+        if "file" not in files:
+            return self.error("No file uploaded")
+        filename, content = files["file"]
+        etree.fromstring(content)
+        self.device.saved[os.path.basename(filename)] = content
+        self.respond(f'<response status="success"><msg><line>{escape(filename)} saved</line></msg></response>')
+
+
+class Simulator:
+    """
+    Run the SSH and API servers of a SimulatedDevice on 127.0.0.1 in background threads. Ports
+    of 0 pick free ports, available as ssh_port and api_port once started
+    """
+
+    def __init__(self, ssh_port=0, api_port=0, host="127.0.0.1", **device_options):
+        self.device = SimulatedDevice(**device_options)
+        self.host = host
+        self.ssh_port = ssh_port
+        self.api_port = api_port
+        self.loop = None
+        self.ssh_server = None
+        self.api_server = None
+        self.threads = []
+        self.cert_dir = None
+
+    def start(self):
+        """Start both servers, returns once they are accepting connections"""
+        self.loop = asyncio.new_event_loop()
+        self.ssh_server = self.loop.run_until_complete(asyncssh.create_server(
+            lambda: SimulatedSSHServer(self.device),
+            self.host,
+            self.ssh_port,
+            server_host_keys=[asyncssh.generate_private_key("ssh-ed25519")],
+            process_factory=lambda process: SimulatedCLI(self.device, process).run(),
+            line_editor=False,
+        ))
+        self.ssh_port = self.ssh_server.sockets[0].getsockname()[1]
+        self.threads.append(threading.Thread(target=self.loop.run_forever, daemon=True))
+
+        self.cert_dir = tempfile.TemporaryDirectory()
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(*generate_certificate(self.cert_dir.name))
+        self.api_server = ThreadingHTTPServer((self.host, self.api_port), SimulatedAPIHandler)
+        self.api_server.daemon_threads = True
+        # Handshakes happen in the request threads rather than the accepting thread
+        self.api_server.socket = ssl_context.wrap_socket(
+            self.api_server.socket, server_side=True, do_handshake_on_connect=False
+        )
+        self.api_server.device = self.device
+        self.api_port = self.api_server.server_address[1]
+        self.threads.append(threading.Thread(target=self.api_server.serve_forever, daemon=True))
+
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stop both servers"""
+        if self.api_server is not None:
+            self.api_server.shutdown()
+            self.api_server.server_close()
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_ssh(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        for thread in self.threads:
+            thread.join()
+        if self.loop is not None:
+            self.loop.close()
+            self.loop = None
+        if self.cert_dir is not None:
+            self.cert_dir.cleanup()
+        self.threads = []
+
+    async def _close_ssh(self):
+        """Stop accepting SSH connections and end open sessions"""
+        self.ssh_server.close()
+        tasks = [x for x in asyncio.all_tasks() if x is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a simulated PAN-OS device for benchmarking SLI")
+    parser.add_argument("--ssh-port", type=int, default=2222, help="SSH port, default 2222")
+    parser.add_argument("--api-port", type=int, default=4443, help="XML API port, default 4443")
+    parser.add_argument("--hostname", default=DEFAULT_HOSTNAME, help="Device hostname")
+    parser.add_argument("--username", default="admin", help="Username accepted over SSH and the API")
+    parser.add_argument("--password", default="admin", help="Password accepted over SSH and the API")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--output-size", type=int, default=4096, help="Bytes of output from show commands")
+    parser.add_argument("--config-objects", type=int, default=100, help="Address objects in the configuration")
+    parser.add_argument("--model", default="PA-VM", help="Model reported in system info, Panorama for Panorama")
+    parser.add_argument("--connected-devices", type=int, default=0, help="Firewalls listed as connected")
+    args = vars(parser.parse_args())
+
+    simulator = Simulator(args.pop("ssh_port"), args.pop("api_port"), **args)
+    simulator.start()
+    print(f"Simulating {simulator.device.hostname}, SSH on 127.0.0.1:{simulator.ssh_port}, "
+          f"XML API on https://127.0.0.1:{simulator.api_port}/api")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmarks of SLI sessions and commands against the device simulator in benchmarks/simulator.py. The
+simulator runs in its own process, so it does not compete with the benchmarked code for the
+interpreter. Each benchmark reports operations per second, and the peak memory allocated by
+SLI while running it, measured in a second run with tracemalloc as tracing slows execution.
+
+usage:
+    python benchmarks/simulator_suite.py
+    python benchmarks/simulator_suite.py --only ssh_async mass_ssh --count 500 --latency 0.005
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sli.async_ssh import AsyncSSHSession
+from sli.sli_api import run_command
+from sli.ssh import SSHSession
+
+SIMULATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulator.py")
+
+USERNAME = "admin"
+PASSWORD = "admin"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_simulator(args):
+    """Start the simulator in a subprocess, returns the process and its SSH and API ports"""
+    ssh_port, api_port = free_port(), free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, SIMULATOR,
+            "--ssh-port", str(ssh_port),
+            "--api-port", str(api_port),
+            "--latency", str(args.latency),
+            "--output-size", str(args.output_size),
+            "--config-objects", str(args.config_objects),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    # The simulator prints a line once both servers accept connections
+    process.stdout.readline()
+    return process, ssh_port, api_port
+
+
+def bench_ssh_sync(ports, args, workdir):
+    """SSHSession set commands"""
+    ssh = SSHSession("127.0.0.1", USERNAME, PASSWORD, port=ports["ssh"])
+    ssh.config_mode()
+    for i in range(args.count):
+        ssh.set_command(f"set address bench-{i} ip-netmask 10.0.0.1/32")
+    ssh.close()
+    return args.count
+
+
+def bench_ssh_async(ports, args, workdir):
+    """AsyncSSHSession show commands"""
+
+    async def run():
+        client = AsyncSSHSession("127.0.0.1", USERNAME, PASSWORD, port=ports["ssh"])
+        await client.connect()
+        for _ in range(args.count):
+            await client.cli_command("show interface all")
+        client.close()
+
+    asyncio.get_event_loop().run_until_complete(run())
+    return args.count
+
+
+def bench_mass_ssh(ports, args, workdir):
+    """mass_ssh commands, summed over all devices"""
+    script = os.path.join(workdir, "script.txt")
+    with open(script, "w") as f:
+        f.write("show interface all\n" * args.script_lines)
+    devices = ",".join(["127.0.0.1"] * args.devices)
+    run_command(
+        [
+            "mass_ssh", script, devices, "-u", USERNAME, "-p", PASSWORD, "-sp", str(ports["ssh"]),
+            "-sk", "jsonl", "-o", os.path.join(workdir, "mass_ssh.jsonl"),
+        ],
+        raise_exception=True,
+    )
+    return args.devices * args.script_lines
+
+
+def bench_load_set(ports, args, workdir):
+    """load_set set commands"""
+    set_file = os.path.join(workdir, "set_commands.txt")
+    with open(set_file, "w") as f:
+        f.write("".join(f"set address bench-{i} ip-netmask 10.0.0.1/32\n" for i in range(args.count)))
+    command = [
+        "load_set", set_file, "-d", "127.0.0.1", "-u", USERNAME, "-p", PASSWORD, "-sp", str(ports["ssh"]),
+        "-dp", str(ports["api"]), "--window", str(args.window),
+    ]
+    run_command(command + ["--via-api"] if args.via_api else command, raise_exception=True)
+    return args.count
+
+
+def bench_op(ports, args, workdir):
+    """op commands over the XML API"""
+    for _ in range(args.count):
+        run_command(
+            ["op", "show system info", "-d", "127.0.0.1", "-dp", str(ports["api"]), "-u", USERNAME, "-p", PASSWORD],
+            raise_exception=True,
+        )
+    return args.count
+
+
+def bench_diff(ports, args, workdir):
+    """diff of running and candidate configurations"""
+    for _ in range(args.diff_count):
+        run_command(
+            ["diff", "running", "candidate", "-of", "set", "-d", "127.0.0.1", "-dp", str(ports["api"]),
+             "-u", USERNAME, "-p", PASSWORD],
+            raise_exception=True,
+        )
+    return args.diff_count
+
+
+BENCHMARKS = {
+    "ssh_sync": bench_ssh_sync,
+    "ssh_async": bench_ssh_async,
+    "mass_ssh": bench_mass_ssh,
+    "load_set": bench_load_set,
+    "op": bench_op,
+    "diff": bench_diff,
+}
+
+
+def measure(benchmark, ports, args):
+    """Run a benchmark, returns operations, seconds and peak bytes allocated"""
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        operations = benchmark(ports, args, workdir)
+        elapsed = time.perf_counter() - start
+
+    peak = None
+    if not args.no_memory:
+        with tempfile.TemporaryDirectory() as workdir:
+            tracemalloc.start()
+            benchmark(ports, args, workdir)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return operations, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SLI against a simulated PAN-OS device")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run, all by default")
+    parser.add_argument("--count", type=int, default=200, help="Commands run by single session benchmarks")
+    parser.add_argument("--devices", type=int, default=50, help="Devices mass_ssh runs against")
+    parser.add_argument("--script-lines", type=int, default=10, help="Lines of the mass_ssh script")
+    parser.add_argument("--window", type=int, default=1, help="Set commands load_set sends ahead of responses")
+    parser.add_argument("--via-api", action="store_true", help="Run load_set through the XML API")
+    parser.add_argument("--diff-count", type=int, default=5, help="Diffs run by the diff benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds of device latency")
+    parser.add_argument("--output-size", type=int, default=4096, help="Bytes of output from show commands")
+    parser.add_argument("--config-objects", type=int, default=2000, help="Address objects in the configuration")
+    parser.add_argument("--no-memory", action="store_true", help="Skip measuring memory")
+    args = parser.parse_args()
+
+    # Keep contexts and caches of the benchmark apart from the user's
+    os.environ["HOME"] = tempfile.mkdtemp(prefix="sli-bench-")
+    process, ssh_port, api_port = start_simulator(args)
+    ports = {"ssh": ssh_port, "api": api_port}
+
+    print(f"{'Benchmark':<12}{'Operations':>12}{'Seconds':>10}{'Ops/sec':>10}{'Peak MB':>10}")
+    try:
+        for name in args.only or BENCHMARKS:
+            operations, elapsed, peak = measure(BENCHMARKS[name], ports, args)
+            memory = f"{peak / 1024 / 1024:>10.1f}" if peak is not None else f"{'-':>10}"
+            print(f"{name:<12}{operations:>12}{elapsed:>10.2f}{operations / elapsed:>10.1f}{memory}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
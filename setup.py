@@ -26,14 +26,13 @@ setuptools.setup(
         'click',
         'jinja2==3.0.1',
         'pycryptodome',
-        'paramiko',
         'requests',
         'xlsxwriter',
         'asyncssh',
     ],
     entry_points={
         'console_scripts': [
-            'sli= sli.cli:cli',
+            'sli= sli.client:main',
         ]
     },
 )
@@ -1,48 +1,118 @@
+"""
+SSH sessions with an NGFW cli over asyncssh. AsyncSSHSession is the one implementation of
+prompt handling, error detection and command execution, used directly by commands running
+against many devices at once and through the synchronous SSHSession facade in sli.ssh
+"""
+
+import asyncio
 import asyncssh
 import re
 
+from sli.errors import SSHCommandTimeout
+from sli.sshPool import SSHConnectionPool
+
+# Prompt of any user and hostname, matched until the session prompt is learned
+PROMPT_RE = re.compile(r"^.*@.*[#>]$")
+# Output lines starting with any of these are reported as errors
+ERROR_PREFIXES = ("Unknown command:", "Invalid syntax.")
+# Ciphers in order of preference, AES-GCM costs far less CPU per packet than asyncssh's chacha20-poly1305
+ENCRYPTION_ALGS = [
+    "aes128-gcm@openssh.com",
+    "aes256-gcm@openssh.com",
+    "aes128-ctr",
+    "aes192-ctr",
+    "aes256-ctr",
+    "chacha20-poly1305@openssh.com",
+    "aes128-cbc",
+    "aes256-cbc",
+]
+# Characters of a partial line kept to find the prompt, prompts are far shorter
+MAX_LINE_LEN = 1024
+
 
 class AsyncSSHSession:
 
     BUFFER_LEN = 9999
 
-    def __init__(self, device, username, password):
+    def __init__(self, device, username, password, connect_timeout=None, command_timeout=None, port=22, echo=False):
         self.device = device
+        self.port = port
         self.username = username
         self.password = password
+        self.connect_timeout = connect_timeout  # Seconds to connect, log in and reach a prompt
+        self.command_timeout = command_timeout  # Seconds for each command to return to a prompt
+        self.echo = echo  # Print output as it is received
+        self.mode = "op"
         self.client = None
         self.c_stdin = None
         self.c_stdout = None
         self.c_stderr = None
         self.prompt = None
         self.hostname = None
+        self._prompt_re = None
+        self._last_line = ""
         self.has_error = False
         self.error = None
+        self.applied_after_error = []  # Commands in flight when set_commands failed that were applied
 
     async def connect(self):
-        self.client = await asyncssh.connect(
+        """Connect and wait for a prompt, raises TimeoutError if connect_timeout is exceeded"""
+        if self.connect_timeout:
+            await asyncio.wait_for(self._connect(), self.connect_timeout)
+        else:
+            await self._connect()
+
+    async def _connect(self):
+        self.client, reused = await SSHConnectionPool.connect(
             self.device,
-            username=self.username,
-            password=self.password,
+            self.port,
+            self.username,
+            self.password,
             known_hosts=None,
             request_pty="force",
-            term_type="vt100"
+            term_type="vt100",
+            encryption_algs=ENCRYPTION_ALGS,
         )
-        self.c_stdin, self.c_stdout, self.c_stderr = await self.client.open_session()
+        try:
+            self.c_stdin, self.c_stdout, self.c_stderr = await self.client.open_session()
+        except asyncssh.ChannelOpenError:
+            if not reused:
+                raise
+            # The device limits channels per connection, open the session on another one
+            SSHConnectionPool.refuse_channel(self.client)
+            self.client = None
+            return await self._connect()
+        except (asyncssh.Error, OSError):
+            if not reused:
+                raise
+            # The device closed the shared connection, connect again
+            SSHConnectionPool.discard(self.client)
+            self.client = None
+            return await self._connect()
         await self._read_until_hostname()
         await self._set_cli_options()
 
+    def close(self):
+        """
+        Close the session and its channel. The connection is left open for other sessions when
+        pooled and the session logged in, and closed once no session uses it otherwise
+        """
+        if self.client is None:
+            return
+        if self.c_stdin is not None:
+            self.c_stdin.channel.close()
+        SSHConnectionPool.release(self.client, reusable=self.prompt is not None)
+        self.client = None
+
     async def _read_until_hostname(self):
         """
         Read from stdout until a prompt is found, this will be variable
         length depending on any banners
         """
-        prompt_found = None
-        while not prompt_found:
-            data = await self.c_stdout.read(self.BUFFER_LEN)
-            prompt_found = self._check_for_prompt(data)
-        self.prompt = data.strip()
+        await self._receive(self._discard)
+        self.prompt = self._last_line.strip()
         self.hostname = self.prompt.split("@")[1]
+        self._prompt_re = self._compile_prompt(self.prompt)
 
     async def _set_cli_options(self):
         """
@@ -51,6 +121,16 @@ class AsyncSSHSession:
         await self.cli_command("set cli scripting-mode on")
         await self.cli_command("set cli pager off")
 
+    @staticmethod
+    def _compile_prompt(prompt):
+        """
+        Return a pattern matching the learned prompt in operational or configuration mode, with
+        or without a state such as (active) following the hostname. Any hostname is accepted for
+        the learned user, as committing a new hostname changes the prompt mid session
+        """
+        user = prompt.split("@", 1)[0]
+        return re.compile(rf"{re.escape(user)}@[^\s()#>]+(\([^\s]*\))?[#>]")
+
     @staticmethod
     def _check_for_prompt(data):
         """
@@ -58,82 +138,273 @@ class AsyncSSHSession:
         """
         test_data = data.split("\n")
         if len(test_data):
-            return re.match('^.*@.*[#>]$', test_data[-1].strip())
+            return PROMPT_RE.match(test_data[-1].strip())
         return None
 
+    def _is_prompt(self, line):
+        """Check if the partial line at the end of the output received is a prompt"""
+        line = line.rstrip()
+        if not line.endswith(("#", ">")):
+            return False
+        if self._prompt_re is None:
+            return PROMPT_RE.match(line) is not None
+        return self._prompt_re.fullmatch(line) is not None
+
+    @staticmethod
+    def find_error(output):
+        """Return the first line of output reporting an error, None if there is none"""
+        if not any(x in output for x in ERROR_PREFIXES):
+            return None
+        return next((x.strip() for x in output.split("\n") if x.strip().startswith(ERROR_PREFIXES)), None)
+
     def error_check_output(self, output):
         """
-        Return True on detecting error in output
+        Record the first error line in output, if any
         """
-        lines = output.split("\n")
-        for line in lines:
-            if line.startswith("Unknown command:"):
-                self.has_error = True
-                self.error = line
+        error = self.find_error(output)
+        if error is not None:
+            self.has_error = True
+            self.error = error
+
+    async def _read(self):
+        """Return the next chunk of output, raises ConnectionResetError if the connection closed"""
+        data = await self.c_stdout.read(self.BUFFER_LEN)
+        if not data:
+            raise ConnectionResetError("Connection closed before a prompt was received")
+        if self.echo:
+            print(data, end="")
+        return data
+
+    @staticmethod
+    async def _discard(data):
+        pass
+
+    async def _receive(self, stream):
+        """
+        Receive data until a prompt is seen, passing each chunk to the coroutine function stream
+        with line endings normalized. Only the partial line at the end of the output is held and
+        scanned for a prompt, complete lines are checked for errors as they arrive
+        """
+        line = ""
+        carry = ""
+        while True:
+            recv_data = await self._read()
+
+            # Hold back a trailing carriage return in case the next read starts with its newline
+            recv_data = carry + recv_data
+            carry = ""
+            if recv_data.endswith("\r"):
+                recv_data, carry = recv_data[:-1], "\r"
+            recv_data = recv_data.replace("\r\n", "\n")
+            await stream(recv_data)
+
+            end = recv_data.rfind("\n")
+            if end < 0:
+                line = (line + recv_data)[-MAX_LINE_LEN:]
+                if self._is_prompt(line):
+                    break
+                continue
+
+            self.error_check_output(line + recv_data[:end])
+            line = recv_data[end + 1:][-MAX_LINE_LEN:]
+            if self._is_prompt(line):
+                break
+
+        self._last_line = line
 
     async def recv_until_prompt(self, echo=False):
         """
         Receive data from stdin until a prompt is seen, return any text
         """
-        prompt_found = None
-        data = ''
-        while not prompt_found:
-            recv_data = await self.c_stdout.read(self.BUFFER_LEN)
-            recv_data = recv_data.replace("\r\n", "\n")
-            data += recv_data
-            prompt_found = self._check_for_prompt(recv_data)
+        chunks = []
+
+        async def collect(data):
+            chunks.append(data)
+
+        await self._receive(collect)
+        data = "".join(chunks)
 
         # Return all lines except the first and last line
         if echo:
             return data
-        return "\n".join(data.split("\n")[1:-1])
+        first = data.find("\n")
+        last = data.rfind("\n")
+        if first == last:
+            return ""
+        return data[first + 1:last]
 
-    async def cli_command(self, command, echo=False):
+    async def stream_until_prompt(self, stream):
         """
-        Sends a command and returns response as string
+        Receive data until a prompt is seen, passing each chunk to the coroutine function stream
+        as it arrives. Only the current line is held, for prompt and error detection
+        """
+        await self._receive(stream)
+
+    async def _wait_for_prompt(self, coroutine, command):
+        """Await a receive coroutine, limited to command_timeout seconds if set"""
+        if not self.command_timeout:
+            return await coroutine
+        try:
+            return await asyncio.wait_for(coroutine, self.command_timeout)
+        except asyncio.TimeoutError:
+            raise SSHCommandTimeout(f"Command timed out after {self.command_timeout}s: {command}")
+
+    async def cli_command(self, command, echo=False, stream=None):
+        """
+        Sends a command and returns response as string. When stream is given, the
+        response including the echoed command and prompt is streamed to it instead
         """
         self.has_error = False
         self.c_stdin.write(command + "\n")
-        output = await self.recv_until_prompt(echo=echo)
-        self.error_check_output(output)
-        return output
+        if stream is not None:
+            await self._wait_for_prompt(self.stream_until_prompt(stream), command)
+            return ""
+        return await self._wait_for_prompt(self.recv_until_prompt(echo=echo), command)
+
+    async def config_mode(self):
+        """Enter configuration mode, unless already in it"""
+        if self.mode == "config":
+            return
+        await self.cli_command("configure")
+        self.mode = "config"
+
+    async def send_expect(self, text, expect=None, error_expect=None):
+        """
+        Send a line of text, such as a password, and receive output until expect is seen, or until
+        a prompt if expect is None. Returns False, keeping the output as the error, if error_expect
+        is seen first
+        """
+        self.has_error = False
+        self.c_stdin.write(text + "\n")
+        if expect is None:
+            output = await self._wait_for_prompt(self.recv_until_prompt(echo=True), text)
+            failed = error_expect is not None and error_expect in output
+        else:
+            output, failed = await self._wait_for_prompt(self._receive_expect(expect, error_expect), text)
+        if failed:
+            self.has_error = True
+            self.error = output.strip()
+        return not failed
+
+    async def _receive_expect(self, expect, error_expect=None):
+        """
+        Receive output until expect or error_expect is seen, scanning only new output and enough of
+        the previous output to find text split across reads. Returns the output received and
+        whether error_expect was seen
+        """
+        expects = [x for x in (error_expect, expect) if x]
+        overlap = max(len(x) for x in expects) - 1
+        chunks = []
+        tail = ""
+        while True:
+            chunks.append(await self._read())
+            tail = tail[len(tail) - overlap:] + chunks[-1] if overlap else chunks[-1]
+            if error_expect and error_expect in tail:
+                return "".join(chunks), True
+            if expect in tail:
+                return "".join(chunks), False
+
+    async def set_command(self, command):
+        """Execute a set command in config mode, returns False on error"""
+        return await self.set_commands([command]) is None
+
+    async def set_commands(self, commands, window=50, on_result=None):
+        """
+        Execute set commands in config mode, entering it if needed, keeping up to window commands
+        sent ahead of their responses. Responses are matched to commands in order by their echo,
+        each ending with a prompt, and on_result(index, command) is called as each command completes.
+
+        Sending stops on the first error, the error line is kept and the index of the failing command
+        returned, or None if every command succeeded. on_result is not called for the failing command
+        or any after it. Commands already sent after the failing one are still run by the device, those
+        applied without error are kept in applied_after_error
+        """
+        self.has_error = False
+        self.applied_after_error = []
+        await self.config_mode()
+        sent = 0
+        done = 0
+        failed = None
+        buffer = ""
+
+        while done < len(commands):
+            # Keep the window of outstanding commands full until an error is seen
+            while failed is None and sent < len(commands) and sent - done < window:
+                self.c_stdin.write(commands[sent] + "\n")
+                sent += 1
+            if done == sent:
+                break
+
+            buffer += await self._wait_for_prompt(self._read(), commands[done])
 
-    async def run_command_script(self, lines, out_file=None):
+            # Each prompt completes the response of the oldest outstanding command, identified by
+            # its echo. Prompts left over from earlier commands have no echo and are skipped
+            match = self._prompt_re.search(buffer)
+            while match and done < sent:
+                response = buffer[:match.start()]
+                buffer = buffer[match.end():]
+                match = self._prompt_re.search(buffer)
+                if "".join(commands[done].split()) not in "".join(response.split()):
+                    continue
+                error = self.find_error(response)
+                if failed is not None:
+                    if error is None:
+                        self.applied_after_error.append(commands[done])
+                elif error is not None:
+                    failed = done
+                    self.has_error = True
+                    self.error = error
+                elif on_result is not None:
+                    on_result(done, commands[done])
+                done += 1
+
+        return failed
+
+    async def run_command_script(self, lines, out_file=None, stream=None):
         """
         Take a list of lines and run them as a script, return True if no error
-        Return False if error
+        Return False if error. When stream is given, output is passed to the
+        coroutine function stream as it is received instead of being returned
         """
         self.has_error = False
         ll = lines
         if isinstance(ll, str):
             ll = ll.split("\n")
 
+        if stream is not None:
+            for line in ll:
+                if not len(line):
+                    continue
+                await self.cli_command(line.strip(), stream=stream)
+                if self.has_error:
+                    return False
+            return True
+
         # Setup output options
         session_output = ""
         if out_file:
             session_output = open(out_file, "w")
 
-        for line in ll:
-            if not len(line):
-                continue
-            output = await self.cli_command(line.strip(), echo=True)
-
-            # Save output to file if specified
-            if out_file:
-                session_output.write(output)
-            else:
-                session_output += output
+        try:
+            for line in ll:
+                if not len(line):
+                    continue
+                output = await self.cli_command(line.strip(), echo=True)
 
-            # Stop running the script if an error was found
-            self.error_check_output(output)
-            if self.has_error:
+                # Save output to file if specified
                 if out_file:
-                    session_output.close()
-                    return False
-                return session_output
+                    session_output.write(output)
+                else:
+                    session_output += output
+
+                # Stop running the script if an error was found
+                if self.has_error:
+                    return False if out_file else session_output
+        finally:
+            if out_file:
+                session_output.close()
 
         # Only return output lines if not saving to a file
         if out_file:
-            session_output.close()
             return True
         return session_output
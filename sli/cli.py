@@ -8,7 +8,7 @@ class FormatHelp(click.Command):
         super().format_help(ctx, formatter)
         commands = SkilletLineInterface.get_commands()
         print("\nAvailable Actions:\n")
-        command_list = [{"cmd": x, "desc": getattr(commands[x], "short_desc", None)} for x in commands.keys()]
+        command_list = [{"cmd": x, "desc": commands[x]["short_desc"]} for x in commands.keys()]
         print_table(command_list, {"Command": "cmd", "Description": "desc"})
         print("")
 
@@ -23,11 +23,11 @@ class FormatHelp(click.Command):
             for command in args:
                 if command in commands:
                     c = commands[command]
-                    if hasattr(c, "help_text"):
-                        print(c.help_text)
+                    if c["help_text"] is not None:
+                        print(c["help_text"])
                         ctx.exit()
-                    elif hasattr(c, "short_desc"):
-                        print(c.short_desc)
+                    elif c["short_desc"] is not None:
+                        print(c["short_desc"])
                         ctx.exit()
 
         super().parse_args(ctx, args)
@@ -40,9 +40,36 @@ class FormatHelp(click.Command):
 @click.option("-v", "--verbose", is_flag=True, help="Verbose output")
 @click.option("-d", "--device", help="Device IP or hostname")
 @click.option("-dp", "--port", help="Device port")
+@click.option("-sp", "--ssh-port", type=int, help="Device SSH port, 22 by default")
 @click.option("-db", "--debug", is_flag=True, help="Run a command in debug mode")
 @click.option("-le", "--loader-error", is_flag=True, help="Fail on SkilletLoader errors")
 @click.option("-sd", "--directory", help="Directory to load skillets from", default="./")
+@click.option(
+    "-rc",
+    "--rebuild-cache",
+    is_flag=True,
+    help="Ignore and rebuild the caches of parsed skillets, configurations and Panorama device lists",
+)
+@click.option("-ttl", "--cache-ttl", type=float, help="Seconds a cached Panorama device list is used, 900 by default")
+@click.option("-j", "--jobs", type=int, default=1, help="Number of parallel jobs, used to parse skillets and run batches")
+@click.option("-b", "--batch", help="YAML file listing commands to run as one batch")
+@click.option("-inv", "--inventory", help="Devices to run against, a mass_ssh YAML inventory or comma separated list")
+@click.option("-cc", "--concurrency", type=int, help="Maximum number of devices to run against at once")
+@click.option("-ct", "--connect-timeout", type=float, help="Seconds allowed to connect and log in to a device")
+@click.option("-cmt", "--command-timeout", type=float, help="Seconds allowed for each command on a device")
+@click.option("-rt", "--retries", type=int, default=0, help="Times to retry devices that can not be connected to")
+@click.option(
+    "-sk",
+    "--sink",
+    help="Where mass_ssh streams device output, file and jsonl write to -o",
+    type=click.Choice(["file", "prefix", "jsonl"]),
+)
+@click.option("-gz", "--gzip", is_flag=True, help="Gzip compress output files written by mass_ssh")
+@click.option("-rs", "--resume", is_flag=True, help="Resume a mass_ssh run from the journal in its -o output")
+@click.option("-val", "--validate", is_flag=True, help="Check load_config files are well formed XML before upload")
+@click.option("-mn", "--many", is_flag=True, help="Load the config_file of each inventory device with load_config")
+@click.option("-va", "--via-api", is_flag=True, help="Apply load_set commands through the XML API")
+@click.option("-win", "--window", type=int, help="Set commands load_set sends ahead of their responses")
 @click.option("-u", "--username", help="Device username")
 @click.option("-o", "--out-file", help="Output file")
 @click.option("-off", "--offline", is_flag=True, help="Offline Mode - Do not connect to Device", default=False)
@@ -0,0 +1,22 @@
+"""
+Entry point for the sli command. Commands are forwarded to a running SLI daemon when one is
+listening, otherwise the cli is imported and run in this process. Only the standard library
+is imported before deciding, keeping startup fast when the daemon handles the command. The
+daemon hands sli daemon commands back to run here, as only it can parse the command position.
+"""
+
+import os
+import sys
+
+from sli.daemon import forward_command
+
+
+def main():
+    argv = sys.argv[1:]
+    if not os.environ.get("SLI_NO_DAEMON"):
+        status = forward_command(argv)
+        if status is not None:
+            sys.exit(status)
+
+    from sli.cli import cli
+    cli()
@@ -1,29 +1,103 @@
-from sli.commands.base import BaseCommand
+"""
+Command modules are not imported when this package is loaded. The static COMMAND_MANIFEST
+describes every available command, and only the module implementing the requested action is
+imported at execution time. Regenerate the manifest after adding or changing a command with:
+
+    python -m sli.commands
+"""
+
 from pathlib import Path
 from pkgutil import iter_modules
 from inspect import isclass
 from importlib import import_module
 
+from sli.commands.manifest import COMMAND_MANIFEST
+
 # Disable SSL warning
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# Load all command modules from this package
+MANIFEST_FIELDS = ("short_desc", "help_text", "no_skillet", "no_context", "single_skillet")
+NON_COMMAND_MODULES = ("base", "manifest", "__main__")
+
+MANIFEST_HEADER = '''"""
+Generated by 'python -m sli.commands', do not edit by hand.
+
+Static description of all SLI commands, used to build help output and to locate the module
+implementing an action without importing every command module.
+"""
 
-package_dir = Path(__file__).resolve().parent
-for (_, module_name, _) in iter_modules([str(package_dir)]):
+'''
 
-    # Load each module individually
-    module = import_module(f"{__name__}.{module_name}")
-    for attr_name in dir(module):
-        attr = getattr(module, attr_name)
 
-        # Evaluate each class found in the module
-        if attr is BaseCommand:
+def get_command_class(command_name):
+    """
+    Import the module implementing command_name as described in the manifest and return
+    the command class, returns None if the command is unknown
+    """
+    entry = COMMAND_MANIFEST.get(command_name)
+    if entry is None:
+        return None
+    module = import_module(entry["module"])
+    return getattr(module, entry["class"])
+
+
+def generate_manifest():
+    """
+    Import every command module in this package and build a manifest entry for each
+    BaseCommand subclass that specifies an sli_command
+    """
+    from sli.commands.base import BaseCommand
+
+    manifest = {}
+    package_dir = Path(__file__).resolve().parent
+    for (_, module_name, _) in iter_modules([str(package_dir)]):
+        if module_name in NON_COMMAND_MODULES:
             continue
-        if isclass(attr):
-            if not len(getattr(attr, 'sli_command', '')) > 0:
+
+        # Load each module individually
+        module = import_module(f"{__name__}.{module_name}")
+        for attr_name in dir(module):
+            attr = getattr(module, attr_name)
+
+            # Evaluate only classes defined in this module, imported parents are handled by their own module
+            if attr is BaseCommand or not isclass(attr) or attr.__module__ != module.__name__:
+                continue
+            command_string = getattr(attr, "sli_command", "")
+            if not len(command_string) > 0:
                 continue
             if not issubclass(attr, BaseCommand):
-                raise ImportError(f'Command module {attr} must subclass BaseCommand')
-            globals()[attr_name] = attr
+                raise ImportError(f"Command module {attr} must subclass BaseCommand")
+
+            entry = {"module": module.__name__, "class": attr_name}
+            for field in MANIFEST_FIELDS:
+                default = False if field.startswith("no_") else None
+                entry[field] = getattr(attr, field, default)
+            manifest[command_string] = entry
+
+    return {k: manifest[k] for k in sorted(manifest)}
+
+
+def _format_manifest_value(value, indent):
+    """Render a manifest value as python source, splitting multi-line strings one line per literal"""
+    if isinstance(value, str) and "\n" in value:
+        pad = " " * (indent + 4)
+        lines = "".join(f"{pad}{line!r}\n" for line in value.splitlines(keepends=True))
+        return f"(\n{lines}{' ' * indent})"
+    return repr(value)
+
+
+def write_manifest():
+    """Regenerate manifest.py in this package from the current command modules"""
+    manifest = generate_manifest()
+    manifest_file = Path(__file__).resolve().parent.joinpath("manifest.py")
+    with manifest_file.open("w") as f:
+        f.write(MANIFEST_HEADER)
+        f.write("COMMAND_MANIFEST = {\n")
+        for command_name, entry in manifest.items():
+            f.write(f"    {command_name!r}: {{\n")
+            for key, value in entry.items():
+                f.write(f"        {key!r}: {_format_manifest_value(value, 8)},\n")
+            f.write("    },\n")
+        f.write("}\n")
+    return manifest
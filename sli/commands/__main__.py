@@ -0,0 +1,11 @@
+"""
+Regenerate the static command manifest, run after adding or modifying a command module:
+
+    python -m sli.commands
+"""
+
+from sli.commands import write_manifest
+
+if __name__ == "__main__":
+    manifest = write_manifest()
+    print(f"Wrote manifest for {len(manifest)} commands")
@@ -8,6 +8,7 @@ from ..tools import get_input
 class SkilletToAnsibleRoleCommand(AnsibleRoleCommand):
     sli_command = "ansible_role_from_skillet"
     short_desc = "Builds an Ansible Role from the a Skillet"
+    single_skillet = True
     no_skillet = False
     capture_var = None
     pan = None
@@ -1,8 +1,13 @@
-from skilletlib import Skillet
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from skilletlib import Skillet
 
 
 class BaseCommand:
     sli_command = 'unimplemented'
+    # commands operating on the one skillet selected with --name only load that skillet and its dependencies
+    single_skillet = False
 
     def __init__(self, sli):
         self.sli = sli
@@ -43,7 +48,7 @@ class BaseCommand:
     def _get_output(self):
 
         if not self.no_skillet:
-            skillet: Skillet = self.sli.skillet
+            skillet: "Skillet" = self.sli.skillet
 
             if not skillet:
                 return
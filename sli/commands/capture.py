@@ -4,7 +4,9 @@ import yaml
 from jinja2 import Template
 from skilletlib import SkilletLoader
 
+from sli.decorators import allow_inventory
 from sli.decorators import require_config
+from sli.errors import SLIException
 from .base import BaseCommand
 
 skillet_template = """
@@ -34,8 +36,16 @@ class Capture(BaseCommand):
     valid Methods:
         'list', 'object', 'expression'
 
+    A capture can run against the configuration of every device of an inventory, in the
+    mass_ssh YAML format or a comma separated list, up to --concurrency devices at a time.
+    Results of all devices are printed as JSON, or written to the file given with -o, and
+    the context variable holds the captured value of each device keyed by device.
+
+    Example: list the security rule names of all devices in an inventory
+        sli capture list "/config/devices/entry/vsys/entry/rulebase/security/rules/entry/@name" -inv devices.yaml
     """
 
+    @allow_inventory
     @require_config
     def run(self, config):
 
@@ -49,19 +59,13 @@ class Capture(BaseCommand):
             return
 
         capture_arg = None
-        capture_var = getattr(self.sli, "context_var")
+        capture_var = self.sli.context_var
         if len(self.args) > 1:
             capture_arg = self.args[1]
         if not capture_arg:
             capture_arg = input(f"\ncapture_{capture_method}: ")
 
-        skillet_yaml = Template(skillet_template).render({
-            'capture_method': capture_method,
-            'capture_arg': capture_arg
-        })
-        skillet_dict = yaml.safe_load(skillet_yaml)
-        sl = SkilletLoader()
-        skillet = sl.create_skillet(skillet_dict)
+        skillet = self._create_skillet(capture_method, capture_arg)
         self.sli.skillet = skillet
 
         # Create a secondary context object without any cached creds to ensure config
@@ -81,6 +85,41 @@ class Capture(BaseCommand):
             self.sli.context[capture_var] = output
             print(f'Output added to context as {capture_var}')
 
+    @staticmethod
+    def _create_skillet(capture_method, capture_arg):
+        """Create the validation skillet capturing from the config in the context"""
+        skillet_yaml = Template(skillet_template).render({
+            'capture_method': capture_method,
+            'capture_arg': capture_arg
+        })
+        skillet_dict = yaml.safe_load(skillet_yaml)
+        sl = SkilletLoader()
+        return sl.create_skillet(skillet_dict)
+
+    def prepare_inventory(self):
+        """Validate arguments before capturing from every device of the inventory"""
+        if len(self.args) != 2 or self.args[0] not in valid_methods:
+            print(self.help_text)
+            return False
+        return True
+
+    def run_device(self, pan, device):
+        """Capture from the running configuration of one inventory device"""
+        context = {x: y for x, y in self.sli.context.items() if not x.startswith("TARGET_")}
+        context["config"] = pan.get_configuration()
+        skillet = self._create_skillet(self.args[0], self.args[1])
+        exe = skillet.execute(context)
+        if not skillet.success:
+            raise SLIException("Unable to execute capture")
+        return exe['outputs']['capture_test']
+
+    def store_inventory_results(self, results):
+        """Store the captures of successful devices in the context, keyed by device"""
+        capture_var = self.sli.context_var
+        if self.sli.cm.use_context and capture_var:
+            self.sli.context[capture_var] = {x["device"]: x["output"] for x in results if x["status"]}
+            print(f'Output added to context as {capture_var}')
+
     def _get_output(self):
         if self.sli.skillet is not None:
             results = self.sli.skillet.get_results()
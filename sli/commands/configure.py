@@ -4,6 +4,7 @@ from skilletlib.exceptions import PanoplyException
 
 from sli.decorators import load_variables
 from sli.decorators import require_ngfw_connection_params
+from sli.decorators import require_panoply_connection
 from sli.decorators import require_single_skillet
 from sli.decorators import require_skillet_type
 from .base import BaseCommand
@@ -12,6 +13,7 @@ from .base import BaseCommand
 class ConfigureCommand(BaseCommand):
     sli_command = "configure"
     short_desc = "Execute a configuration skillet of type panos"
+    single_skillet = True
     help_text = """
     Executes a PAN-OS configuration skillet.
 
@@ -27,7 +29,12 @@ class ConfigureCommand(BaseCommand):
     @require_skillet_type("panos", "panorama")
     @require_ngfw_connection_params
     @load_variables
-    def run(self):
+    @require_panoply_connection
+    def run(self, pan):
+
+        # Execute with the pooled session, skipping authentication when its API key is cached
+        if pan.connected:
+            self.sli.skillet.panoply = pan
 
         print(f"Executing {self.sli.skillet.name}...")
         output = self.sli.skillet.execute(self.sli.context)
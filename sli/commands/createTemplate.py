@@ -10,6 +10,7 @@ from io import BytesIO
 class CreateTemplate(BaseCommand):
     sli_command = 'create_template'
     short_desc = 'Create an XML template from a panos or panorama skillet'
+    single_skillet = True
     no_context = True
     help_text = """
 
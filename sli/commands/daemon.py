@@ -0,0 +1,50 @@
+import os
+
+from sli.daemon import SOCKET_FILE, LOG_FILE, SLIDaemon, connect, send_control, start_daemon
+from .base import BaseCommand
+
+
+class DaemonCommand(BaseCommand):
+    sli_command = "daemon"
+    short_desc = "Run a background SLI process keeping skillets, contexts and sessions warm"
+    no_skillet = True
+    no_context = True
+    help_text = """
+    Manage the SLI daemon. While the daemon is running, the sli command forwards every
+    invocation to it over a local socket at ~/.sli/daemon.sock. The daemon keeps parsed
+    skillets, decrypted contexts and connected device sessions in memory so repeated
+    commands skip interpreter startup, skillet parsing and API key generation.
+
+    Output and interactive input are relayed between the terminal and the daemon. Set
+    SLI_NO_DAEMON=1 to run a single command without the daemon.
+
+    Usage:
+        sli daemon start     Start the daemon in the background, logging to ~/.sli/daemon.log
+        sli daemon run       Run the daemon in the foreground
+        sli daemon status    Show the daemon state
+        sli daemon stop      Stop the daemon
+"""
+
+    def run(self):
+        if len(self.args) != 1 or self.args[0] not in ("start", "run", "status", "stop"):
+            print(self.help_text)
+            return
+
+        action = self.args[0]
+        os.makedirs(os.path.dirname(SOCKET_FILE), exist_ok=True)
+
+        if action in ("start", "run"):
+            connection = connect()
+            if connection is not None:
+                connection.close()
+                print(f"SLI daemon is already running on {SOCKET_FILE}")
+                return
+            if action == "run":
+                SLIDaemon().serve()
+            elif start_daemon():
+                print(f"SLI daemon started on {SOCKET_FILE}, logging to {LOG_FILE}")
+            else:
+                print(f"SLI daemon failed to start, see {LOG_FILE}")
+
+        elif send_control(action) is None:
+            print("SLI daemon is not running")
@@ -1,9 +1,14 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from sli.decorators import require_ngfw_connection_params
 from sli.decorators import require_panoply_connection
 from .base import BaseCommand
 from sli.errors import InvalidArgumentsException
 from sli.errors import SLIException
-from sli.tools import load_config_file, format_xml_string, get_input, load_app_skillet
+from sli.configCache import ConfigCache
+from sli.configDiff import ConfigDiff
+from sli.tools import format_xml_string, get_input, load_app_skillet, print_table
 
 
 class DiffCommand(BaseCommand):
@@ -55,6 +60,11 @@ class DiffCommand(BaseCommand):
         Example: Get a diff between two local saved configs and same as diff.out. Note the '--offline' flag.
 
             user$ sli diff running test-file.xml test-file-2.xml --offline -o diff.out
+
+        Configuration versions such as 1 or 2 are cached under ~/.sli/configs once fetched, along with digests
+        of the configurations diffed, so repeated diffs only download and compare what changed. Use
+        --rebuild-cache to ignore the cache. Both configurations are loaded at the same time, add -v to print
+        how long loading each of them and the diff took.
     """
 
     def _parse_args(self) -> None:
@@ -133,17 +143,48 @@ class DiffCommand(BaseCommand):
     def _get_vars(self) -> list:
         return []
 
+    def _load_configs(self, cache: ConfigCache, *source_names: str) -> list:
+        """
+        Load named configs concurrently, from disk, the cache or the device. Sessions are not thread
+        safe, so each config after the first is fetched with a clone of the command's session.
+        Returns the configs in order, recording the time each took in self.timings
+        """
+
+        def load(indexed_name):
+            index, source_name = indexed_name
+            pan = self.pan.clone() if index and getattr(self.pan, "connected", False) else self.pan
+            start = time.time()
+            return cache.load_config(source_name, pan), time.time() - start
+
+        with ThreadPoolExecutor(max_workers=len(source_names)) as executor:
+            results = list(executor.map(load, enumerate(source_names)))
+        for source_name, (_, elapsed) in zip(source_names, results):
+            self.timings[f"Load {source_name}"] = elapsed
+        return [config for config, _ in results]
+
     def _get_snippets(self) -> list:
         """
         Internal method to actually perform the diff operation.
         """
 
-        previous_config = load_config_file(self.source_name, self.pan)
-        latest_config = load_config_file(self.latest_name, self.pan)
+        self.timings = {}
+        cache = ConfigCache(rebuild=self.sli.options.get("rebuild_cache", False))
+        previous_config, latest_config = self._load_configs(cache, self.source_name, self.latest_name)
+
+        start = time.time()
+        diff = ConfigDiff(previous_config, latest_config, cache=cache)
+        self.timings["Parse"] = time.time() - start
+
+        start = time.time()
         if self.sli.output_format == "set":
-            snippets = self.pan.generate_set_cli_from_configs(previous_config, latest_config)
+            snippets = diff.set_commands()
         else:
-            snippets = self.pan.generate_skillet_from_configs(previous_config, latest_config)
+            snippets = diff.snippets()
+        self.timings["Diff"] = time.time() - start
+
+        if self.sli.verbose:
+            timings = [{"phase": x, "time": "{0:.3f}s".format(y)} for x, y in self.timings.items()]
+            print_table(timings, {"Phase": "phase", "Time": "time"})
 
         return snippets
 
@@ -10,6 +10,18 @@ Display any errors
 class LoadCommand(BaseCommand):
     sli_command = 'load'
     short_desc = 'Load and display all skillets of any type'
+    help_text = """
+    Load and display all skillets of any type found in the skillet directory.
+
+    Parsed skillets are cached in ~/.sli/skillets and only files changed since the
+    last load are parsed again. Cache statistics are printed after the skillet list.
+
+    Example: Load skillets from a directory
+        sli load -sd ~/pan/Skillets
+
+    Example: Discard the cached skillets for a directory and parse everything again
+        sli load -sd ~/pan/Skillets --rebuild-cache
+"""
 
     skillets = list()
 
@@ -30,3 +42,9 @@ class LoadCommand(BaseCommand):
                 "Type": "type",
             }
         )
+        stats = getattr(self.sli.sl, "stats", None)
+        if stats is not None:
+            print(
+                f"\nSkillet cache: {stats['cached']} loaded from cache, {stats['parsed']} parsed, "
+                f"{stats['templates']} templates reused ({self.sli.sl.cache_file})"
+            )
@@ -1,7 +1,11 @@
 from .base import BaseCommand
-from sli.decorators import require_ngfw_connection_params, require_panoply_connection
-import requests
+from sli.decorators import allow_inventory, require_ngfw_connection_params, require_panoply_connection
+from sli.errors import SLIException
+from sli.inventory import load_inventory
+from sli.progressBar import MultiProgressBar, ProgressBar
+from sli.upload import MultipartFile, check_well_formed
 from lxml import etree
+from skilletlib.exceptions import PanoplyException
 import os
 
 
@@ -10,10 +14,35 @@ class LoadConfig(BaseCommand):
     short_desc = "Load an XML configuration file onto an NGFW as candidate"
     no_skillet = True
     help_text = """
+        Upload an XML configuration file to a device and load it as the candidate configuration.
+        The file is streamed from disk with a progress bar, so large configurations are never
+        held in memory. Add --validate to check the file is well formed XML before uploading it.
+
         Usage:
             sli load_config config_file.xml
+            sli load_config --validate panorama_config.xml
+
+        The same file can be loaded onto every device of an inventory, in the mass_ssh YAML format
+        or a comma separated list, up to --concurrency devices at a time. With --many, each device
+        of a YAML inventory loads its own file given as config_file instead:
+            sli load_config config_file.xml --inventory devices.yaml
+            sli load_config --many --inventory devices.yaml -cc 10
+
+        Sample structuring of devices.yaml for --many
+
+        ---
+
+        devices:
+            - device: device_one
+              config_file: device_one.xml
+
+            - device: device_two
+              config_file: device_two.xml
+
+        ---
     """
 
+    @allow_inventory
     @require_ngfw_connection_params
     @require_panoply_connection
     def run(self, pan):
@@ -22,45 +51,127 @@ class LoadConfig(BaseCommand):
             print(self.help_text)
             return
         file_name = self.args[0]
-        if not file_name.endswith(".xml"):
-            print("Target file must be an xml file")
+        if not self._check_file(file_name):
             return
 
         # Push configuration file to the device
         print(f"Loading configuration file {file_name}")
-        with open(file_name, 'rb') as f:
-            params = {
-                "type": "import",
-                "category": "configuration",
-                "key": pan.xapi.api_key
-            }
-            r = requests.post(
-                f"https://{self.sli.context['TARGET_IP']}/api",
-                params=params,
-                verify=False,
-                files={"file": f}
-            )
+        pb = None if self.sli.verbose else ProgressBar(prefix="Uploading")
+
+        def progress(sent, total):
+            percent = "{0:.1f}".format(100 * sent / total)
+            if pb is not None and percent != pb.percent:
+                pb.update(percent)
+
+        try:
+            self.upload(pan, file_name, progress)
+            if pb is not None:
+                pb.complete()
+            print(f"Loaded {file_name}")
+            print(self.load(pan, file_name))
+        except (SLIException, PanoplyException) as e:
+            if pb is not None:
+                pb.pause()
+            print(e)
+
+    def _check_file(self, file_name):
+        """Print why a configuration file can not be loaded, returns False if so"""
+        if not file_name.endswith(".xml"):
+            print(f"Target file must be an xml file: {file_name}")
+            return False
+        if not os.path.isfile(file_name):
+            print(f"File not found: {file_name}")
+            return False
+        if self.sli.options.get("validate"):
+            try:
+                check_well_formed(file_name)
+            except etree.XMLSyntaxError as e:
+                print(f"{file_name} is not well formed XML: {e}")
+                return False
+        return True
+
+    @staticmethod
+    def upload(pan, file_name, progress=None):
+        """
+        Stream a configuration file to the device with the pooled session's HTTP connection,
+        calling progress(sent, total) as it is sent. A rejected API key is regenerated and the
+        upload retried once. Raises SLIException if the device does not accept the file
+        """
+        body = MultipartFile(file_name, on_progress=progress)
+        try:
+            for attempt in range(2):
+                body.rewind()
+                r = pan.http.post(
+                    f"https://{pan.hostname}:{pan.port}/api",
+                    params={"type": "import", "category": "configuration", "key": pan.xapi.api_key},
+                    data=body,
+                    headers={"Content-Type": body.content_type},
+                    verify=False,
+                )
+                if r.status_code == 403 and attempt == 0:
+                    pan.xapi.keygen()
+                    continue
+                break
+        finally:
+            body.close()
+
         if not r.status_code == 200:
-            print(f"Unable to load configuration on firewall, {r.status_code} received")
-        print(f"Loaded {file_name}")
-        xml = etree.fromstring(r.text)
-        if not xml.xpath("@status")[0].lower() == "success":
+            raise SLIException(f"Unable to load configuration on firewall, {r.status_code} received")
+        xml = etree.fromstring(r.content)
+        if not xml.get("status", "").lower() == "success":
             err = "".join(xml.xpath("//msg/text()"))
             if not len(err):
                 err = "".join(xml.xpath("//line/text()"))
             if len(err):
-                print(f"Error from device: \n{err}")
-            else:
-                print("Unable to push configuration to device")
-            return
+                raise SLIException(f"Error from device: \n{err}")
+            raise SLIException("Unable to push configuration to device")
 
-        # Configuration file is on device, load it as candidate config
+    @staticmethod
+    def load(pan, file_name):
+        """Load an uploaded configuration file as candidate config, returns the device message"""
         file_name = file_name.replace('/', os.path.sep).split(os.path.sep)[-1]
         xml = f"<load><config><from>{file_name}</from></config></load>"
         r = pan.execute_op(xml)
         xml = etree.fromstring(r)
-        msg = xml.xpath("//line/text()")[0]
-        if len(msg):
-            print(msg)
-        else:
-            print("Unable to retrieve op results from device")
+        msg = xml.xpath("//line/text()")
+        if not len(msg):
+            raise SLIException("Unable to retrieve op results from device")
+        return msg[0]
+
+    def prepare_inventory(self):
+        """Check the files to load on every inventory device before uploading any"""
+        many = self.sli.options.get("many", False)
+        if not many and not len(self.args) == 1:
+            print(self.help_text)
+            return False
+        self.inventory_devices = load_inventory(self.sli.options["inventory"], self.sli)
+        for device in self.inventory_devices:
+            if not many:
+                device["config_file"] = self.args[0]
+            elif not device.get("config_file"):
+                print(f"No config_file given for {device['device']}")
+                return False
+        if not all(self._check_file(x) for x in set(x["config_file"] for x in self.inventory_devices)):
+            return False
+        self.pb = None if self.sli.verbose else MultiProgressBar(len(self.inventory_devices), prefix="Devices complete")
+        return True
+
+    def run_device(self, pan, device):
+        """Upload and load the configuration file of one inventory device"""
+        name = device["device"]
+
+        def progress(sent, total):
+            if self.pb is not None:
+                self.pb.update("{0:.1f}".format(100 * sent / total), name=name)
+
+        try:
+            self.upload(pan, device["config_file"], progress)
+            return self.load(pan, device["config_file"])
+        finally:
+            if self.pb is not None:
+                self.pb.finish(name)
+
+    def store_inventory_results(self, results):
+        """Complete the display if devices failed to connect, as they never reach run_device to finish"""
+        if self.pb is not None and self.pb.finished < self.pb.total:
+            self.pb.complete()
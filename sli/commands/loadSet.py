@@ -1,9 +1,24 @@
 from .base import BaseCommand
-from sli.decorators import require_ngfw_connection_params, require_ngfw_ssh_session
-from sli.progressBar import ProgressBar
+from sli.async_ssh import AsyncSSHSession
+from sli.decorators import get_ssh_session, require_ngfw_connection_params
+from sli.decorators import require_ngfw_ssh_session, require_panoply_connection
+from sli.errors import SSHCommandTimeout
+from sli.inventory import load_inventory, report_inventory_results
+from sli.progressBar import MultiProgressBar, ProgressBar
+from sli.setConverter import SetConverter
+from sli.sshPool import SSHConnectionPool, get_event_loop
 from sli.tools import get_password_input
+from asyncssh.misc import PermissionDenied
+from pan.xapi import PanXapiError
 
+import asyncio
 import re
+import time
+
+# Set commands prompting for a password
+PASSWORD_COMMAND = "^set mgt-config users.*password$"
+# Set commands merged into each config set request with --via-api
+API_BATCH_SIZE = 5000
 
 
 class LoadSet(BaseCommand):
@@ -19,11 +34,34 @@ class LoadSet(BaseCommand):
 
         Example usage printing out commands as they are processed:
             sli load_set -uc set_commands.txt -v
+
+        Large files load faster by sending commands ahead of their responses. With --window, up
+        to that many commands are sent before waiting for responses. Loading still stops on the
+        first error and reports the failing line, followed by any commands already sent after it
+        that the device applied:
+            sli load_set -uc set_commands.txt --window 100
+
+        Loading stops with an error if the device does not answer a command within --command-timeout
+        seconds, 120 by default, or does not reach a prompt within --connect-timeout seconds of connecting.
+
+        With --via-api, commands are applied through the XML API instead, merging consecutive set
+        commands into as few requests as possible. Commands that can not be converted to XML or
+        prompt for a password are applied over SSH. Once the device rejects a command, it and every
+        command after it are applied over SSH in order:
+            sli load_set -uc set_commands.txt --via-api
+
+        With --inventory, the commands are applied to every device of a mass_ssh YAML inventory
+        or comma separated list of devices concurrently over SSH, at most --concurrency devices
+        at a time, 100 by default. --window, --ssh-port, --connect-timeout and --command-timeout
+        apply to each device. Each device stops on its own first error, and a table of results is
+        printed at the end, with the full results of every device written to -o if given:
+            sli load_set -u username -p password --inventory devices.yaml --window 50 set_commands.txt
 """
 
-    @require_ngfw_connection_params
-    @require_ngfw_ssh_session
-    def run(self, ssh):
+    # Devices connected to at once with --inventory unless --concurrency is given
+    default_concurrency = 100
+
+    def run(self):
 
         # Load script as a list of lines off of disk
         if not len(self.args) == 1:
@@ -41,39 +79,301 @@ class LoadSet(BaseCommand):
             for command in invalid_commands:
                 print(f"  - {command}")
 
-        # Execute line by line until end of script
+        self.commands = commands
+        self.total = len([x for x in commands if not re.match(PASSWORD_COMMAND, x)])
+        if self.sli.options.get("inventory"):
+            return self._load_on_inventory()
+        self._load_on_device()
+
+    @require_ngfw_connection_params
+    def _load_on_device(self):
         print("Starting set command load...")
-        total = len(commands)
-        ssh.config_mode()
-        i = 0
+        self.applied = 0
+        self.pb = None
         if not self.sli.verbose:
-            pb = ProgressBar(prefix="Applying commands")
-        for command in commands:
+            self.pb = ProgressBar(prefix="Applying commands")
 
-            # Check if a password will be required as the next input
-            if re.match("^set mgt-config users.*password$", command.strip()):
-                username = command.strip().split(" ")[3]
-                if not self.sli.verbose:
-                    pb.pause()
-                password = get_password_input(f"Password for user {username}")
-                ssh.extended_set_command(command, expect="Enter password")
-                ssh.extended_set_command(password, expect="Confirm password")
-                ssh.extended_set_command(password)
-                continue
-
-            # Process normal command
-            if not ssh.set_command(command):
-                print('\n' + ssh.get_error_text())
-                print("Errors occurred while loading set commands.")
-                return
-            i += 1
-            percent = "{0:.1f}".format(100 * (i / total))
-            if self.sli.verbose:
-                print(command)
+        try:
+            if self.sli.options.get("via_api"):
+                loaded = self._load_via_api()
             else:
-                pb.update(percent)
+                loaded = self._load_via_ssh()
+        except (SSHCommandTimeout, OSError, PermissionDenied) as e:
+            if self.pb is not None:
+                self.pb.pause()
+            print(f"Errors occurred while loading set commands: {e}")
+            return
+        finally:
+            if getattr(self, "ssh", None) is not None:
+                self.ssh.close()
+        if not loaded:
+            return
 
-        if not self.sli.verbose:
-            pb.complete()
+        if self.pb is not None:
+            self.pb.complete()
 
         print('Set commands successfully loaded')
+
+    def _load_on_inventory(self):
+        """
+        Apply commands to every device of the inventory concurrently over SSH, with at most
+        --concurrency devices at a time, then report the result of each device
+        """
+        if self.sli.options.get("via_api"):
+            print("--via-api is not supported with --inventory")
+            return
+        devices = load_inventory(self.sli.options["inventory"], self.sli)
+
+        # Prompt for passwords once, as they are set on every device
+        passwords = {}
+        for command in self.commands:
+            if re.match(PASSWORD_COMMAND, command):
+                username = command.split(" ")[3]
+                if username not in passwords:
+                    passwords[username] = get_password_input(f"Password for user {username}")
+
+        concurrency = self.sli.options.get("concurrency") or self.default_concurrency
+        print(f"Starting set command load on {len(devices)} devices, {concurrency} at a time")
+        self.pb = None
+        if not self.sli.verbose:
+            self.pb = MultiProgressBar(len(devices), prefix="Devices complete")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(result, device):
+            async with semaphore:
+                await self._load_device_coroutine(result, device, passwords)
+
+        async def gather(results):
+            async with SSHConnectionPool.scope():
+                await asyncio.gather(*[bounded(x, y) for x, y in zip(results, devices)])
+
+        results = [{"device": x["device"], "status": False, "error": "", "output": None} for x in devices]
+        get_event_loop().run_until_complete(gather(results))
+        report_inventory_results(self, results)
+
+    async def _load_device_coroutine(self, result, device, passwords):
+        """Apply commands to a device, recording the outcome in result"""
+        start = time.time()
+        name = device["device"]
+        applied = 0
+        applied_after_error = []
+
+        def report(index, command):
+            nonlocal applied
+            applied += 1
+            if self.pb is None:
+                print(f"{name}: {command}")
+            else:
+                self.pb.update("{0:.1f}".format(100 * (applied / max(self.total, 1))), name=name)
+
+        client = AsyncSSHSession(
+            name,
+            device["username"],
+            device["password"],
+            connect_timeout=self.sli.options.get("connect_timeout"),
+            command_timeout=self.sli.options.get("command_timeout"),
+            port=int(device.get("ssh_port", self.sli.options.get("ssh_port") or 22)),
+        )
+        try:
+            await client.connect()
+            failed = await self._apply_commands(client, self.commands, passwords.get, report)
+            if failed is not None:
+                result["error"] = f"Failed on line: {failed}, {client.error}"
+                applied_after_error = client.applied_after_error
+            else:
+                result["status"] = True
+        except asyncio.TimeoutError:
+            result["error"] = "Timed out connecting to device"
+        except OSError:
+            result["error"] = "Unable to connect to device"
+        except PermissionDenied:
+            result["error"] = "Device rejected login"
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            client.close()
+            if self.pb is not None:
+                self.pb.finish(name)
+        result["output"] = {"applied": applied, "total": self.total, "applied_after_error": applied_after_error}
+        result["time"] = "{0:.2f}s".format(time.time() - start)
+
+    def _report(self, index, command):
+        """Report a command as applied"""
+        self.applied += 1
+        if self.pb is None:
+            print(command)
+        else:
+            self.pb.update("{0:.1f}".format(100 * (self.applied / self.total)))
+
+    @require_ngfw_ssh_session
+    def _load_via_ssh(self, ssh):
+        try:
+            return self._apply_over_ssh(ssh, self.commands)
+        finally:
+            ssh.close()
+
+    def _apply_over_ssh(self, ssh, commands):
+        """Apply commands over a synchronous SSH session, returns False after printing the error if a command failed"""
+
+        def get_password(username):
+            if self.pb is not None:
+                self.pb.pause()
+            return get_password_input(f"Password for user {username}")
+
+        failed = ssh.run(self._apply_commands(ssh.session, commands, get_password, self._report))
+        if failed is not None:
+            print('\n' + ssh.get_error_text())
+            print(f"Errors occurred while loading set commands, failed on line: {failed}")
+            if len(ssh.session.applied_after_error):
+                print("Commands sent before the error was seen were still applied:")
+                for command in ssh.session.applied_after_error:
+                    print(f"  - {command}")
+            return False
+        return True
+
+    async def _apply_commands(self, client, commands, get_password, on_result):
+        """
+        Apply commands with an AsyncSSHSession in config mode, keeping up to --window commands sent
+        ahead of responses. Passwords prompted for are given by get_password(username). Returns the
+        failing command, or None if every command was applied
+        """
+        window = self.sli.options.get("window") or 1
+        await client.config_mode()
+
+        for batch in self._split_batches(commands):
+
+            # Commands prompting for a password are a batch of their own
+            if re.match(PASSWORD_COMMAND, batch[0]):
+                password = get_password(batch[0].split(" ")[3])
+                await client.send_expect(batch[0], "Enter password")
+                await client.send_expect(password, "Confirm password")
+                await client.send_expect(password)
+                continue
+
+            # Process normal commands
+            failed = await client.set_commands(batch, window=window, on_result=on_result)
+            if failed is not None:
+                return batch[failed]
+        return None
+
+    @require_panoply_connection
+    def _load_via_api(self, pan):
+        """
+        Apply commands through the XML API. Consecutive set commands are merged into as few config
+        set requests as possible, commands that can not be converted are applied over SSH in between.
+        Once a set command is rejected by the device, it and every command after it are applied over
+        SSH, so commands that depend on it still run after it
+        """
+        converter = SetConverter(pan.get_configuration(config_source="candidate"))
+        self.ssh = None
+        self.api_requests = 0
+        api_batch = []
+        ssh_batch = []
+        over_ssh = 0
+
+        for i, command in enumerate(self.commands + [None]):
+            parsed = None
+            if command is not None and not re.match(PASSWORD_COMMAND, command):
+                try:
+                    parsed = converter.parse(command)
+                except ValueError:
+                    pass
+            if parsed is not None and parsed.action == "set":
+                if not self._flush_ssh(ssh_batch):
+                    return False
+                api_batch.append(parsed)
+                continue
+
+            # Any other command ends the batch of set commands
+            rejected = self._set_over_api(pan, converter, api_batch)
+            if rejected is not None:
+                ssh_batch = self.commands[i - len(api_batch) + rejected:]
+                if self.pb is not None:
+                    self.pb.pause()
+                print(f"The device rejected: {ssh_batch[0]}, applying it and the {len(ssh_batch) - 1} "
+                      f"commands after it over SSH")
+                over_ssh += len(ssh_batch)
+                if not self._flush_ssh(ssh_batch):
+                    return False
+                break
+            api_batch = []
+            if parsed is not None and self._delete_over_api(pan, converter, parsed):
+                continue
+            if command is not None:
+                ssh_batch.append(command)
+            over_ssh += len(ssh_batch)
+            if not self._flush_ssh(ssh_batch):
+                return False
+
+        if self.pb is not None:
+            self.pb.complete()
+            self.pb = None
+        print(f"Applied {len(self.commands) - over_ssh} commands in {self.api_requests} API requests, "
+              f"{over_ssh} over SSH")
+        return True
+
+    def _set_over_api(self, pan, converter, parsed):
+        """
+        Apply parsed set commands in order, in requests of up to API_BATCH_SIZE commands. A request
+        that does not convert or is rejected is split in half and retried, returns the index of the
+        first command rejected on its own, the commands after it are not applied, or None
+        """
+        pending = [(i, parsed[i:i + API_BATCH_SIZE]) for i in range(0, len(parsed), API_BATCH_SIZE)]
+        while pending:
+            start, batch = pending.pop(0)
+            try:
+                xpath, element = converter.prepare(batch)
+                self.api_requests += 1
+                pan.xapi.set(xpath=xpath, element=element)
+            except (ValueError, PanXapiError):
+                if len(batch) == 1:
+                    return start
+                half = len(batch) // 2
+                pending[:0] = [(start, batch[:half]), (start + half, batch[half:])]
+                continue
+            converter.accept()
+            for command in batch:
+                self._report(None, command.command)
+        return None
+
+    def _delete_over_api(self, pan, converter, parsed):
+        """Delete the xpath of a parsed delete command if it exists, returns False if it was not deleted"""
+        try:
+            self.api_requests += 1
+            pan.xapi.get(xpath=parsed.xpath)
+            if pan.xapi.element_result is None or not len(pan.xapi.element_result):
+                return False
+            self.api_requests += 1
+            pan.xapi.delete(xpath=parsed.xpath)
+        except PanXapiError:
+            return False
+        converter.remove(parsed)
+        self._report(None, parsed.command)
+        return True
+
+    def _flush_ssh(self, commands):
+        """Apply and clear commands over an SSH session opened on first use, returns False on error"""
+        if not len(commands):
+            return True
+        if self.ssh is None:
+            if self.pb is not None:
+                self.pb.pause()
+            self.ssh = get_ssh_session(self)
+        applied = self._apply_over_ssh(self.ssh, commands)
+        commands.clear()
+        return applied
+
+    @staticmethod
+    def _split_batches(commands):
+        """
+        Split commands into batches that can be sent ahead of their responses, commands prompting
+        for a password are a batch of their own
+        """
+        batches = [[]]
+        for command in commands:
+            if re.match(PASSWORD_COMMAND, command):
+                batches.append([command])
+                batches.append([])
+            else:
+                batches[-1].append(command)
+        return [x for x in batches if len(x)]
@@ -0,0 +1,797 @@
+"""
+Generated by 'python -m sli.commands', do not edit by hand.
+
+Static description of all SLI commands, used to build help output and to locate the module
+implementing an action without importing every command module.
+"""
+
+COMMAND_MANIFEST = {
+    'ansible_role': {
+        'module': 'sli.commands.ansible_role_from_diff',
+        'class': 'AnsibleRoleCommand',
+        'short_desc': 'Builds an Ansible Role from the differences between two config versions, candidate, running, previous running, etc',
+        'help_text': (
+            '\n'
+            '        ansible_role module requires 0 to 2 arguments.\n'
+            '\n'
+            '        - 0 arguments: Diff running config from previous running config\n'
+            '        - 1 argument: Diff previous config or named config against specified running config\n'
+            '        - 2 arguments: Diff first arg named config against second arg named config\n'
+            '\n'
+            '        A named config can be either a stored config, candidate, running or a number.\n'
+            '        Positive numbers must be used to specify iterations, 1 means 1 config revision ago\n'
+            '\n'
+            '        Example: Get diff between running config and previous running config\n'
+            '\n'
+            '            user$ sli ansible_role 1 -uc  -od /tmp/roles\n'
+            '\n'
+            '        Example: Get diff between running config and the candidate config\n'
+            '\n'
+            '            user$ sli ansible_role running candidate -uc -od /tmp/roles\n'
+            '\n'
+            "        Example: Get the diff of all changes made to this device using the autogenerated 'baseline' config, which is\n"
+            '        essentially blank.\n'
+            '\n'
+            '            user$ sli ansible_role baseline -uc -od /tmp/roles\n'
+            '\n'
+            '        Example: Get the diff between the second and third most recent running configs\n'
+            '\n'
+            '            user$ sli ansible_role 3 2 -uc -od /tmp/roles\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'ansible_role_from_skillet': {
+        'module': 'sli.commands.ansible_role_from_skillet',
+        'class': 'SkilletToAnsibleRoleCommand',
+        'short_desc': 'Builds an Ansible Role from the a Skillet',
+        'help_text': (
+            '\n'
+            '        ansible_role_from_skillet creates a complete Ansible Collection and Role directory structure from a skillet.\n'
+            '\n'
+            '        Example: Create a collection in the /tmp/roles directory using the test_skillet from the /tmp/skillets directory\n'
+            '\n'
+            '            user$ sli ansible_role_from_skillet --name test_skillet -sd /tmp/skillets -od /tmp/roles\n'
+            '    '
+        ),
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': True,
+    },
+    'baseline': {
+        'module': 'sli.commands.baseline',
+        'class': 'BaselineCommand',
+        'short_desc': 'Revert configuration to a near factory default, but retaining admin auth and network configuration',
+        'help_text': None,
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'capture': {
+        'module': 'sli.commands.capture',
+        'class': 'Capture',
+        'short_desc': 'Capture a value based on object, list, or expression',
+        'help_text': (
+            '\n'
+            '    Usage for capture module:\n'
+            '        sli capture [method] [query] [context-variable:optional]\n'
+            '\n'
+            '    valid Methods:\n'
+            "        'list', 'object', 'expression'\n"
+            '\n'
+            '    A capture can run against the configuration of every device of an inventory, in the\n'
+            '    mass_ssh YAML format or a comma separated list, up to --concurrency devices at a time.\n'
+            '    Results of all devices are printed as JSON, or written to the file given with -o, and\n'
+            '    the context variable holds the captured value of each device keyed by device.\n'
+            '\n'
+            '    Example: list the security rule names of all devices in an inventory\n'
+            '        sli capture list "/config/devices/entry/vsys/entry/rulebase/security/rules/entry/@name" -inv devices.yaml\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'clear_context': {
+        'module': 'sli.commands.clearContext',
+        'class': 'ClearContext',
+        'short_desc': 'Clear out contents of a specific context',
+        'help_text': None,
+        'no_skillet': True,
+        'no_context': True,
+        'single_skillet': False,
+    },
+    'commit': {
+        'module': 'sli.commands.commit',
+        'class': 'CommitCommand',
+        'short_desc': 'Commit the Candidate configuration',
+        'help_text': None,
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'configure': {
+        'module': 'sli.commands.configure',
+        'class': 'ConfigureCommand',
+        'short_desc': 'Execute a configuration skillet of type panos',
+        'help_text': (
+            '\n'
+            '    Executes a PAN-OS configuration skillet.\n'
+            '\n'
+            '    Example: Load and commit and configuration skillet\n'
+            '        sli configure --name test_skillet -sd ~/pan/Skillets -uc\n'
+            '\n'
+            '    Example: Verify the actions of a configuration skillet ONLY\n'
+            '        sli configure --debug --name test_skillet -sd ~/pan/Skillets -uc\n'
+            '\n'
+        ),
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': True,
+    },
+    'connect': {
+        'module': 'sli.commands.connect',
+        'class': 'ConnectCommand',
+        'short_desc': 'Connect to NGFW and save auth information into context if desired',
+        'help_text': None,
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'content_update': {
+        'module': 'sli.commands.content_update',
+        'class': 'ContentUpdateCommand',
+        'short_desc': 'Update NGFW dynamic content, anti-virus definitions, and wildfire',
+        'help_text': None,
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'create_template': {
+        'module': 'sli.commands.createTemplate',
+        'class': 'CreateTemplate',
+        'short_desc': 'Create an XML template from a panos or panorama skillet',
+        'help_text': (
+            '\n'
+            '\n'
+            '    Usage:\n'
+            '        sli create_template -n [skillet] [baseline-file] [out-file]\n'
+            '\n'
+        ),
+        'no_skillet': False,
+        'no_context': True,
+        'single_skillet': True,
+    },
+    'daemon': {
+        'module': 'sli.commands.daemon',
+        'class': 'DaemonCommand',
+        'short_desc': 'Run a background SLI process keeping skillets, contexts and sessions warm',
+        'help_text': (
+            '\n'
+            '    Manage the SLI daemon. While the daemon is running, the sli command forwards every\n'
+            '    invocation to it over a local socket at ~/.sli/daemon.sock. The daemon keeps parsed\n'
+            '    skillets, decrypted contexts and connected device sessions in memory so repeated\n'
+            '    commands skip interpreter startup, skillet parsing and API key generation.\n'
+            '\n'
+            '    Output and interactive input are relayed between the terminal and the daemon. Set\n'
+            '    SLI_NO_DAEMON=1 to run a single command without the daemon.\n'
+            '\n'
+            '    Usage:\n'
+            '        sli daemon start     Start the daemon in the background, logging to ~/.sli/daemon.log\n'
+            '        sli daemon run       Run the daemon in the foreground\n'
+            '        sli daemon status    Show the daemon state\n'
+            '        sli daemon stop      Stop the daemon\n'
+        ),
+        'no_skillet': True,
+        'no_context': True,
+        'single_skillet': False,
+    },
+    'diff': {
+        'module': 'sli.commands.diff',
+        'class': 'DiffCommand',
+        'short_desc': 'Get the differences between two config versions: candidate, running, previous running, etc',
+        'help_text': (
+            '\n'
+            '        Diff module requires 0 to 3 arguments.\n'
+            '\n'
+            '        - 0 arguments: Diff running config from previous running config\n'
+            '        - 1 argument: Diff previous config or named config against specified running config\n'
+            '        - 2 arguments: Diff first arg named config against second arg named config\n'
+            '        - 3 arguments: Diff first arg named config against second arg named config and save diffs into the context\n'
+            '\n'
+            '        A named config can be either a stored config, candidate, running or a number.\n'
+            '        Positive numbers must be used to specify iterations, 1 means 1 config revision ago\n'
+            '\n'
+            '        Example: Get diff between running config and previous running config in set cli format\n'
+            '\n'
+            '            user$ sli diff 1 -uc -of set\n'
+            '\n'
+            '        Example: Get diff between running config and the candidate config in xml format\n'
+            '\n'
+            '            user$ sli diff running candidate -uc -of xml\n'
+            '\n'
+            '        Example: Get diff between running config and the candidate config in skillet format\n'
+            '\n'
+            '            user$ sli diff running candidate -uc -of skillet\n'
+            '\n'
+            "        Example: Get the diff of all changes made to this device using the autogenerated 'baseline' config, which is\n"
+            '        essentially blank.\n'
+            '\n'
+            '            user$ sli diff baseline -uc -of xml\n'
+            '\n'
+            '        Example: Get the diff between the second and third most recent running configs\n'
+            '\n'
+            '            user$ sli diff 3 2\n'
+            '\n'
+            "        Example: Get a diff and save as 'candidate_diff' into the context\n"
+            '\n'
+            '            user$ sli diff running candidate candidate_diff -uc\n'
+            '\n'
+            "        Example: Get a diff from running and a local config file, save as out.xml. Note the 'file:' prefix.\n"
+            '\n'
+            '            user$ sli diff running file:test-file.xml candidate_diff -uc -o out.xml\n'
+            '\n'
+            "        Example: Get a diff between two local saved configs and same as diff.out. Note the '--offline' flag.\n"
+            '\n'
+            '            user$ sli diff running test-file.xml test-file-2.xml --offline -o diff.out\n'
+            '\n'
+            '        Configuration versions such as 1 or 2 are cached under ~/.sli/configs once fetched, along with digests\n'
+            '        of the configurations diffed, so repeated diffs only download and compare what changed. Use\n'
+            '        --rebuild-cache to ignore the cache. Both configurations are loaded at the same time, add -v to print\n'
+            '        how long loading each of them and the diff took.\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'license_activate': {
+        'module': 'sli.commands.license_activate',
+        'class': 'LicenseCommand',
+        'short_desc': 'Apply an auth-code to a PAN-OS Device',
+        'help_text': (
+            '\n'
+            '            Activate an Auth Code on a PAN-OS Device\n'
+            '\n'
+            '    Example: Activate an auth-code and be prompted for device credentials\n'
+            '        sli license_activate IBADCODE\n'
+            '\n'
+            '    Example: Activate an auth-code and use credentials stored in the context\n'
+            '        sli license_activate IBADCODE -uc\n'
+            '\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'license_deactivate': {
+        'module': 'sli.commands.license_deactivate',
+        'class': 'LicenseDeactivateCommand',
+        'short_desc': 'Deactivate an auth-code on a PAN-OS VM-Series',
+        'help_text': (
+            '\n'
+            '            De-activate an Auth Code on a PAN-OS VM-Series\n'
+            '\n'
+            '    Example: De-activate an auth-code and be prompted for device credentials\n'
+            '        sli license_deactivate\n'
+            '\n'
+            '    Example: De-activate an auth-code using a Support Licensing API Key\n'
+            '        sli license_deactivate 78A00AB9-442F-48AE-A9FE-AFA369CE93D2\n'
+            '\n'
+            '    Example: Activate an auth-code and use credentials stored in the context\n'
+            '        sli license_deactivate -uc\n'
+            '\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'list_context': {
+        'module': 'sli.commands.listContext',
+        'class': 'ListContext',
+        'short_desc': 'List all available contexts',
+        'help_text': None,
+        'no_skillet': True,
+        'no_context': True,
+        'single_skillet': False,
+    },
+    'load': {
+        'module': 'sli.commands.load',
+        'class': 'LoadCommand',
+        'short_desc': 'Load and display all skillets of any type',
+        'help_text': (
+            '\n'
+            '    Load and display all skillets of any type found in the skillet directory.\n'
+            '\n'
+            '    Parsed skillets are cached in ~/.sli/skillets and only files changed since the\n'
+            '    last load are parsed again. Cache statistics are printed after the skillet list.\n'
+            '\n'
+            '    Example: Load skillets from a directory\n'
+            '        sli load -sd ~/pan/Skillets\n'
+            '\n'
+            '    Example: Discard the cached skillets for a directory and parse everything again\n'
+            '        sli load -sd ~/pan/Skillets --rebuild-cache\n'
+        ),
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'load_config': {
+        'module': 'sli.commands.loadConfig',
+        'class': 'LoadConfig',
+        'short_desc': 'Load an XML configuration file onto an NGFW as candidate',
+        'help_text': (
+            '\n'
+            '        Upload an XML configuration file to a device and load it as the candidate configuration.\n'
+            '        The file is streamed from disk with a progress bar, so large configurations are never\n'
+            '        held in memory. Add --validate to check the file is well formed XML before uploading it.\n'
+            '\n'
+            '        Usage:\n'
+            '            sli load_config config_file.xml\n'
+            '            sli load_config --validate panorama_config.xml\n'
+            '\n'
+            '        The same file can be loaded onto every device of an inventory, in the mass_ssh YAML format\n'
+            '        or a comma separated list, up to --concurrency devices at a time. With --many, each device\n'
+            '        of a YAML inventory loads its own file given as config_file instead:\n'
+            '            sli load_config config_file.xml --inventory devices.yaml\n'
+            '            sli load_config --many --inventory devices.yaml -cc 10\n'
+            '\n'
+            '        Sample structuring of devices.yaml for --many\n'
+            '\n'
+            '        ---\n'
+            '\n'
+            '        devices:\n'
+            '            - device: device_one\n'
+            '              config_file: device_one.xml\n'
+            '\n'
+            '            - device: device_two\n'
+            '              config_file: device_two.xml\n'
+            '\n'
+            '        ---\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'load_set': {
+        'module': 'sli.commands.loadSet',
+        'class': 'LoadSet',
+        'short_desc': 'Load set commands in a file against a live NGFW to ensure no errors',
+        'help_text': (
+            '\n'
+            '        Load set commands into an NGFW from a specified file.\n'
+            '        fails out on any set command errors\n'
+            '\n'
+            '        Example usage with progress bar and timer:\n'
+            '            sli load_set -uc set_commands.txt\n'
+            '\n'
+            '        Example usage printing out commands as they are processed:\n'
+            '            sli load_set -uc set_commands.txt -v\n'
+            '\n'
+            '        Large files load faster by sending commands ahead of their responses. With --window, up\n'
+            '        to that many commands are sent before waiting for responses. Loading still stops on the\n'
+            '        first error and reports the failing line, followed by any commands already sent after it\n'
+            '        that the device applied:\n'
+            '            sli load_set -uc set_commands.txt --window 100\n'
+            '\n'
+            '        Loading stops with an error if the device does not answer a command within --command-timeout\n'
+            '        seconds, 120 by default, or does not reach a prompt within --connect-timeout seconds of connecting.\n'
+            '\n'
+            '        With --via-api, commands are applied through the XML API instead, merging consecutive set\n'
+            '        commands into as few requests as possible. Commands that can not be converted to XML or\n'
+            '        prompt for a password are applied over SSH. Once the device rejects a command, it and every\n'
+            '        command after it are applied over SSH in order:\n'
+            '            sli load_set -uc set_commands.txt --via-api\n'
+            '\n'
+            '        With --inventory, the commands are applied to every device of a mass_ssh YAML inventory\n'
+            '        or comma separated list of devices concurrently over SSH, at most --concurrency devices\n'
+            '        at a time, 100 by default. --window, --ssh-port, --connect-timeout and --command-timeout\n'
+            '        apply to each device. Each device stops on its own first error, and a table of results is\n'
+            '        printed at the end, with the full results of every device written to -o if given:\n'
+            '            sli load_set -u username -p password --inventory devices.yaml --window 50 set_commands.txt\n'
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'mass_ssh': {
+        'module': 'sli.commands.mass_ssh',
+        'class': 'MassSSH',
+        'short_desc': 'Run a command script against multiple firewalls async',
+        'help_text': (
+            '\n'
+            '        Execute a script of CLI commands against multiple firewalls asynchronously. The var\n'
+            '        script.txt must reference a file that contains the CLI commands to run, and devices\n'
+            '        must be either a comma separated list of devices, or a configuration file describing\n'
+            '        connectivity.\n'
+            '\n'
+            '        The -o option refers to a directory to create and populate with output logs from all\n'
+            '        devices configured. The contents of the directory will be overwritten if it already exists.\n'
+            '\n'
+            '        Output is streamed as it is received rather than held in memory. Select where it goes with\n'
+            '        --sink: file writes one file per device to the -o directory and is the default when -o is\n'
+            '        given, prefix prints each line prefixed with its device name and is the default otherwise,\n'
+            '        and jsonl writes records of {"device": ..., "output": ...} for all devices to the single\n'
+            '        file given with -o. Add --gzip to compress file and jsonl output.\n'
+            '\n'
+            '        Runs given -o keep a journal of the outcome of each device, mass_ssh_journal.jsonl in the -o\n'
+            '        directory, created if needed, or the output file name followed by .journal.jsonl for jsonl output.\n'
+            '        When a run is interrupted or some devices fail, run it again with --resume and the same -o\n'
+            '        to skip the devices already completed and run only the failed and pending ones. Output of\n'
+            '        completed devices is kept and the script must not change between the runs. Resumed jsonl\n'
+            '        output is appended to, so devices run again keep the partial records of earlier runs. Records\n'
+            '        of journaled runs carry the time of their run, the run of the journal end record of a\n'
+            '        device tells which of its records to keep.\n'
+            '\n'
+            '        Providing credentials in the yaml file is optional and may be passed from the CLI,\n'
+            '        however the yaml file provides support for overriding credentials for specific devices.\n'
+            '        Devices listening for SSH on a port other than 22 may set ssh_port, or use --ssh-port for all.\n'
+            '\n'
+            '        Sample structuring example of the yaml file:\n'
+            '\n'
+            '        ---\n'
+            '\n'
+            '        creds:\n'
+            '            username: global_user\n'
+            '            password: global_password\n'
+            '\n'
+            '        devices:\n'
+            '            - device: device_one\n'
+            '\n'
+            '            - device: device_two\n'
+            '              username: device_two_user\n'
+            '              password: device_two_password\n'
+            '              ssh_port: 2222\n'
+            '\n'
+            '        ---\n'
+            '\n'
+            '        Sample structuring of a script.txt configuring a new zone\n'
+            '\n'
+            '        ---\n'
+            '\n'
+            '        configure\n'
+            '        set zone new_zone\n'
+            '        commit\n'
+            '\n'
+            '        ---\n'
+            '\n'
+            '        the input script is not limited to supporting just configuration commands, show commands can be used for\n'
+            '        data gathering on a list of devices simultaneously\n'
+            '\n'
+            '        At most --concurrency devices are connected to at once, 100 by default. Use --connect-timeout\n'
+            '        to limit the seconds spent connecting and logging in to each device, and --command-timeout to\n'
+            '        limit the seconds each command may run. Devices that can not be connected to are retried\n'
+            '        up to --retries times, waiting 2 seconds before the first retry and doubling the wait after.\n'
+            '        Scripts are never retried once connected, as they may already have changed the device.\n'
+            '\n'
+            '        Usage:\n'
+            '            sli mass_ssh -u username -p password -o output_dir script.txt [comma-separated-devices | config.yaml]\n'
+            '            sli mass_ssh -cc 50 -ct 15 -cmt 120 -rt 2 script.txt config.yaml\n'
+            '            sli mass_ssh -sk jsonl -gz -o output.jsonl.gz script.txt config.yaml\n'
+            '            sli mass_ssh --resume -o output_dir script.txt config.yaml\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'mass_ssh_from_panorama': {
+        'module': 'sli.commands.mass_ssh_from_panorama',
+        'class': 'MassSSHPanorama',
+        'short_desc': 'Run a command script against multiple Panorama-connected firewalls async',
+        'help_text': (
+            '\n'
+            '        Queries a Panorama device for a list of firewalls, optionally filtered based on device facts,\n'
+            '        and executes a script of CLI commands against the firewalls asynchronously.\n'
+            '\n'
+            '        The -d, -u, and -p flags are used to connect to the desired Panorama device.\n'
+            '\n'
+            '        The var script.txt must reference a file that contains the CLI commands to run.\n'
+            '        The input script is not limited to supporting just configuration commands, show commands can be used for\n'
+            '        data gathering on a list of devices simultaneously.\n'
+            '        Sample structuring of a script.txt configuring a new zone\n'
+            '        ---\n'
+            '\n'
+            '        configure\n'
+            '        set zone new_zone\n'
+            '        commit\n'
+            '\n'
+            '        ---\n'
+            '\n'
+            '        The -o option refers to a directory to create and populate with output logs from all\n'
+            '        devices configured. The contents of the directory will be overwritten if it already exists.\n'
+            '        Output can be streamed elsewhere with --sink and compressed with --gzip, and an interrupted\n'
+            '        run resumed with --resume, see mass_ssh.\n'
+            '\n'
+            '        The optional var device_filter.json must reference a file that contains a dictionary of\n'
+            '        key value pairs. These keys match keys from the returned device facts, captured using the Panorama\n'
+            '        command `show devices connected`. Nested facts are named by their path, such as ha/state.\n'
+            '        Only devices that match ALL of the filter terms will be returned. A string value is a regex\n'
+            '        matched at the start of the fact, a list matches any of its values, and a dict may combine\n'
+            '        equals, prefix, regex, in, and min and max versions. A version bound matches all versions\n'
+            '        it is a prefix of, so a max of 10.1 includes 10.1.9-h3.\n'
+            '\n'
+            '        Sample structuring of a device_filter.json\n'
+            '        ---\n'
+            '        {\n'
+            '            "hostname": "testing-panos",\n'
+            '            "sw-version": "10.0.4",\n'
+            '            "model": "PA-VM"\n'
+            '        }\n'
+            '        ---\n'
+            '\n'
+            '        Sample of a device_filter.json using prefixes, lists and version ranges\n'
+            '        ---\n'
+            '        {\n'
+            '            "hostname": {"prefix": "dc1-"},\n'
+            '            "model": ["PA-3220", "PA-3260"],\n'
+            '            "sw-version": {"min": "10.1", "max": "10.2.3"},\n'
+            '            "ha/state": {"equals": "active"}\n'
+            '        }\n'
+            '        ---\n'
+            '\n'
+            '        The list of connected devices is cached under ~/.sli/panorama and reused for --cache-ttl\n'
+            '        seconds, 900 by default, without connecting to Panorama. Use --rebuild-cache to list the\n'
+            '        devices again. Other commands running against many devices reuse the same list with an\n'
+            '        inventory of panorama: or panorama:device_filter.json, for example:\n'
+            '            sli op "show system info" value "./sw-version" -d panorama_device --inventory panorama:filter.json\n'
+            '\n'
+            '        Usage:\n'
+            '            sli mass_ssh_from_panorama -d panorama_device -u username -p password -o output_dir script.txt [device_filter.json]\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'op': {
+        'module': 'sli.commands.op',
+        'class': 'OpCommand',
+        'short_desc': 'Run an operational command and optionally parse and capture the results into the context',
+        'help_text': (
+            '\n'
+            "    Usage for 'op' module:\n"
+            '        sli op [cmd] [capture_method] [query] [context-variable:optional]\n'
+            '\n'
+            '    Example: Get system info and return information as XML text\n'
+            '        sli op "show system info"\n'
+            '\n'
+            '    Example: Get system info, using XML command syntax, as a JSON object\n'
+            '        sli op "<show><system><info/></system></show>" object\n'
+            '\n'
+            '    Example: get system info as a JSON object and use an XPATH filter for only the plugin_versions\n'
+            '        sli op "show system info" object "./plugin_versions"\n'
+            '\n'
+            '    Example: get system info and only return the value of the sw-version tag\n'
+            '        sli op "show system info" value "./sw-version"\n'
+            '\n'
+            "    Example: get system info and only return the value of the sw-version tag and store it in the context as 'sw'\n"
+            '        sli op "show system info" text "./sw-version" sw -uc\n'
+            '\n'
+            '    Batch mode runs every command listed in a YAML file over one authenticated session,\n'
+            '    up to --jobs commands at a time, and saves all captured values to the context at once.\n'
+            '    Each entry takes the same cmd, capture_method, query and context_var as above.\n'
+            '\n'
+            '    Example: run a batch of commands 4 at a time and store the captures in the context\n'
+            '        sli op --batch cmds.yaml -j 4 -uc\n'
+            '\n'
+            '    A single command or a batch can also run against every device of an inventory, in the\n'
+            '    mass_ssh YAML format or a comma separated list, up to --concurrency devices at a time.\n'
+            '    Results of all devices are printed as JSON, or written to the file given with -o, and\n'
+            '    context variables hold the captured value of each device keyed by device.\n'
+            '\n'
+            '    Example: get the software version of all devices in an inventory, 20 at a time\n'
+            '        sli op "show system info" value "./sw-version" --inventory devices.yaml -cc 20 -o versions.json\n'
+            '\n'
+            '    An inventory of panorama:filter.json runs against the firewalls connected to the Panorama\n'
+            '    given with -d that match the filter, see mass_ssh_from_panorama. The device list is cached,\n'
+            '    so repeated fan-outs do not list the devices of the Panorama again.\n'
+            '\n'
+            '    Example: get the software version of all PA-VM firewalls managed by a Panorama\n'
+            '        sli op "show system info" value "./sw-version" -d panorama --inventory panorama:filter.json\n'
+            '\n'
+            '    Sample structuring of cmds.yaml\n'
+            '\n'
+            '    ---\n'
+            '\n'
+            '    commands:\n'
+            '        - cmd: show system info\n'
+            '          capture_method: value\n'
+            '          query: ./sw-version\n'
+            '          context_var: sw_version\n'
+            '\n'
+            '        - cmd: <show><interface>all</interface></show>\n'
+            '          capture_method: object\n'
+            '\n'
+            '    ---\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'preview': {
+        'module': 'sli.commands.preview',
+        'class': 'PreviewCommand',
+        'short_desc': 'Generate output of a panos skillet and write to file',
+        'help_text': (
+            '\n'
+            '\n'
+            '        Load and run a panos configuration skillet, saving the output to\n'
+            '        disk in a specified directory as opposed to configuring NGFW\n'
+            '\n'
+            '        Usage:\n'
+            '            sli preview -n configuration_skillet -o output_file.xml\n'
+        ),
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': True,
+    },
+    'rest': {
+        'module': 'sli.commands.rest',
+        'class': 'ValidateCommand',
+        'short_desc': 'Execute a validation skillet of type REST',
+        'help_text': None,
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': True,
+    },
+    'revert': {
+        'module': 'sli.commands.revert',
+        'class': 'RevertCommand',
+        'short_desc': 'Revert a candidate configuration on an NGFW',
+        'help_text': None,
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'rollup_playlist': {
+        'module': 'sli.commands.rollup_playlist',
+        'class': 'RollupPlaylist',
+        'short_desc': 'Rollup a panos skillet in playlist format into a single file',
+        'help_text': (
+            '\n'
+            '\n'
+            '    Usage:\n'
+            '        sli rollup_playlist -n [skillet] [out-file]\n'
+            '\n'
+        ),
+        'no_skillet': False,
+        'no_context': True,
+        'single_skillet': True,
+    },
+    'rollup_skillet': {
+        'module': 'sli.commands.rollupSkillet',
+        'class': 'RollupSkillet',
+        'short_desc': 'Rollup a panos skillet with external XML into a single file',
+        'help_text': (
+            '\n'
+            '\n'
+            '    Usage:\n'
+            '        sli rollup_skillet [skillet-file] [out-file]\n'
+            '\n'
+        ),
+        'no_skillet': True,
+        'no_context': True,
+        'single_skillet': False,
+    },
+    'save_config': {
+        'module': 'sli.commands.save_config',
+        'class': 'ConfigureCommand',
+        'short_desc': 'Save a configuration file from a device to your local system',
+        'help_text': (
+            '\n'
+            '    Save a configuration file off a device locally. config_on_device may be\n'
+            '    running, candidate, or any config file saved on a device. Specify -o config.xml\n'
+            '    to save off as config.xml, or the configuration will just be printed to the screen\n'
+            '\n'
+            '    Usage:\n'
+            '\n'
+            '        sli save_config config_on_device -o config.xml\n'
+        ),
+        'no_skillet': True,
+        'no_context': False,
+        'single_skillet': False,
+    },
+    'show_context': {
+        'module': 'sli.commands.showContext',
+        'class': 'ShowContext',
+        'short_desc': 'Print out contents of an existing context',
+        'help_text': None,
+        'no_skillet': True,
+        'no_context': True,
+        'single_skillet': False,
+    },
+    'show_skillet': {
+        'module': 'sli.commands.show_skillet',
+        'class': 'ShowSkillet',
+        'short_desc': 'Shows the contents of a Compiled Skillet in YAML format',
+        'help_text': (
+            '\n'
+            '\n'
+            '    Usage:\n'
+            '        sli show_skillet --name k12_config_skillet -sd /tmp/skillets\n'
+            '    '
+        ),
+        'no_skillet': False,
+        'no_context': True,
+        'single_skillet': True,
+    },
+    'spreadsheet': {
+        'module': 'sli.commands.spreadsheet',
+        'class': 'SpreadsheetCommand',
+        'short_desc': 'Generate a user editable spreadsheet from a template',
+        'help_text': (
+            '\n'
+            '\n'
+            '        Load a template skillet, and convert it to a spreadsheet a user\n'
+            '        can edit to manipulate the set commands output\n'
+            '\n'
+            '        Usage:\n'
+            '            sli spreadsheet -n template_skillet -o output_directory\n'
+        ),
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': True,
+    },
+    'template': {
+        'module': 'sli.commands.template',
+        'class': 'TemplateCommand',
+        'short_desc': 'Render a template and safe it to a file',
+        'help_text': (
+            '\n'
+            '\n'
+            '        Render a template and save it to a file. Templates will be created\n'
+            '        named as they are named in the skillet. If an out_directory is not\n'
+            '        specified, the current working directory will be used.\n'
+            '\n'
+            '        Usage:\n'
+            '            sli template -n template_name -o out_file\n'
+        ),
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': True,
+    },
+    'update_skillet_vars': {
+        'module': 'sli.commands.update_skillet_vars',
+        'class': 'UpdateSkilletVars',
+        'short_desc': 'Finds and updates all template variables in a Skillet',
+        'help_text': (
+            '\n'
+            '\n'
+            '    This command is useful when building or modifying an existing skillet. You can edit the\n'
+            '    XML elements or other templated attributes with Jinja {{ variables }} then run this command\n'
+            '    to update the list of variables with your new additions.\n'
+            '\n'
+            '    Usage:\n'
+            '        sli update_skillet_vars yourfile.skillet.yaml\n'
+            '    '
+        ),
+        'no_skillet': True,
+        'no_context': True,
+        'single_skillet': False,
+    },
+    'validate': {
+        'module': 'sli.commands.validate',
+        'class': 'ValidateCommand',
+        'short_desc': 'Execute a validation skillet of type pan_validation',
+        'help_text': None,
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': True,
+    },
+    'workflow': {
+        'module': 'sli.commands.workflow',
+        'class': 'WorkflowCommand',
+        'short_desc': 'Execute a workflow skillet',
+        'help_text': None,
+        'no_skillet': False,
+        'no_context': False,
+        'single_skillet': True,
+    },
+}
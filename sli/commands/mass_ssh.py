@@ -1,12 +1,15 @@
 from .base import BaseCommand
 from sli.async_ssh import AsyncSSHSession
+from sli.errors import SLIException
+from sli.inventory import get_default_credentials, load_inventory
+from sli.runJournal import RunJournal, get_journal_path
+from sli.sinks import DeviceStream, FileSink, JSONLSink, PrefixSink
+from sli.sshPool import SSHConnectionPool, get_event_loop
 from sli.tools import print_table
 import asyncio
 from asyncssh.misc import PermissionDenied
-import re
-import yaml
-from getpass import getpass
 import os
+import time
 
 
 class MassSSH(BaseCommand):
@@ -22,8 +25,24 @@ class MassSSH(BaseCommand):
         The -o option refers to a directory to create and populate with output logs from all
         devices configured. The contents of the directory will be overwritten if it already exists.
 
+        Output is streamed as it is received rather than held in memory. Select where it goes with
+        --sink: file writes one file per device to the -o directory and is the default when -o is
+        given, prefix prints each line prefixed with its device name and is the default otherwise,
+        and jsonl writes records of {"device": ..., "output": ...} for all devices to the single
+        file given with -o. Add --gzip to compress file and jsonl output.
+
+        Runs given -o keep a journal of the outcome of each device, mass_ssh_journal.jsonl in the -o
+        directory, created if needed, or the output file name followed by .journal.jsonl for jsonl output.
+        When a run is interrupted or some devices fail, run it again with --resume and the same -o
+        to skip the devices already completed and run only the failed and pending ones. Output of
+        completed devices is kept and the script must not change between the runs. Resumed jsonl
+        output is appended to, so devices run again keep the partial records of earlier runs. Records
+        of journaled runs carry the time of their run, the run of the journal end record of a
+        device tells which of its records to keep.
+
         Providing credentials in the yaml file is optional and may be passed from the CLI,
         however the yaml file provides support for overriding credentials for specific devices.
+        Devices listening for SSH on a port other than 22 may set ssh_port, or use --ssh-port for all.
 
         Sample structuring example of the yaml file:
 
@@ -39,6 +58,7 @@ class MassSSH(BaseCommand):
             - device: device_two
               username: device_two_user
               password: device_two_password
+              ssh_port: 2222
 
         ---
 
@@ -55,145 +75,197 @@ class MassSSH(BaseCommand):
         the input script is not limited to supporting just configuration commands, show commands can be used for
         data gathering on a list of devices simultaneously
 
+        At most --concurrency devices are connected to at once, 100 by default. Use --connect-timeout
+        to limit the seconds spent connecting and logging in to each device, and --command-timeout to
+        limit the seconds each command may run. Devices that can not be connected to are retried
+        up to --retries times, waiting 2 seconds before the first retry and doubling the wait after.
+        Scripts are never retried once connected, as they may already have changed the device.
+
         Usage:
             sli mass_ssh -u username -p password -o output_dir script.txt [comma-separated-devices | config.yaml]
+            sli mass_ssh -cc 50 -ct 15 -cmt 120 -rt 2 script.txt config.yaml
+            sli mass_ssh -sk jsonl -gz -o output.jsonl.gz script.txt config.yaml
+            sli mass_ssh --resume -o output_dir script.txt config.yaml
     """
 
+    # Devices connected to at once unless --concurrency is given
+    default_concurrency = 100
+    # Seconds to wait before the first connection retry, doubled for each retry after
+    retry_backoff = 2
+    # Characters of output buffered per device before being passed to the sink
+    buffer_size = 65536
+
     def get_credentials(self):
         """
         Helper function to first check options and context for credentials, then prompt user if required
         """
-        username = self.sli.options.get("username", self.sli.context.get("TARGET_USERNAME", ""))
-        password = self.sli.options.get("password", self.sli.context.get("TARGET_PASSWORD", ""))
-        while not len(username):
-            username = input("Default username: ")
-        while not len(password):
-            password = getpass("Default password: ")
-        return username, password
-
-    def load_config_from_yaml(self, out_directory):
-        """
-        Load list of devices and optional credentials from specified config.yaml file
-        """
-        # Assemble devices from YAML configuration file
-        with open(self.args[1], "r") as f:
-            devices = yaml.safe_load(f)
-        # Check for presence of devices without specific credentials
-        if len([x for x in devices["devices"] if "username" not in x and "password" not in x]):
-
-            # Get default credentials if global credentials not specified
-            username = None
-            password = None
-            if "creds" in devices:
-                username = devices["creds"].get("username")
-                password = devices["creds"].get("password")
-            if not username or not password:
-                username, password = self.get_credentials()
-
-            # Apply default parameters to all devices
-            devices = devices["devices"]
-            for device in devices:
-                if "username" not in device:
-                    device["username"] = username
-                if "password" not in device:
-                    device["password"] = password
-                device["out_file"] = f"{os.path.join(out_directory, device['device'])}.txt" if out_directory else None
-                device["coroutine"] = None
-                device["status"] = False
-                device["error"] = "",
-                device["output"] = None
-
-        return devices
-
-    def load_config_from_list(self, out_directory):
+        return get_default_credentials(self.sli)
+
+    @staticmethod
+    def init_device(device):
+        """Add the fields tracking execution to a device dict"""
+        device["coroutine"] = None
+        device["status"] = False
+        device["error"] = ""
+        return device
+
+    def get_sink(self, out_path):
         """
-        Create configuration object based on users CLI input
+        Return the sink selected with --sink, writing to out_path when it writes files. Defaults to
+        a file per device when out_path is given, otherwise to printing lines prefixed by device
         """
-        username, password = self.get_credentials()
-        return [{
-                    "device": x,
-                    "username": username,
-                    "password": password,
-                    "out_file": f"{os.path.join(out_directory,x)}.txt" if out_directory else None,
-                    "coroutine": None,
-                    "status": False,
-                    "output": None,
-                    "error": "",
-                } for x in self.args[1].split(",")]
+        sink = self.sli.options.get("sink") or ("file" if out_path else "prefix")
+        compress = self.sli.options.get("gzip", False)
+        if sink == "prefix":
+            return PrefixSink()
+        if not out_path:
+            raise SLIException(f"The {sink} sink requires an output path given with -o")
+        if sink == "jsonl":
+            return JSONLSink(out_path, compress, append=self.sli.options.get("resume", False))
+
+        # Create output directory if doesn't exist
+        if not os.path.exists(out_path):
+            os.mkdir(out_path)
+        return FileSink(out_path, compress)
 
     def load_device_configs(self, out_directory, pan=None):
         """
         Loads device configuration using YAML file or CLI-inputted list
         """
-        devices = None
-        if re.match(r".*\.y.*ml$", self.args[1]):
-            devices = self.load_config_from_yaml(out_directory)
-        else:
-            devices = self.load_config_from_list(out_directory)
-        return devices
+        return [self.init_device(x) for x in load_inventory(self.args[1], self.sli)]
 
     @staticmethod
-    async def ssh_coroutine(device, username, password, out_file, script, dev_obj):
+    async def ssh_coroutine(device, username, password, sink, script, dev_obj, connect_timeout=None,
+                            command_timeout=None, retries=0, backoff=2, buffer_size=65536, port=22, journal=None):
         """
-        Per device coroutine
+        Per device coroutine, streaming output to sink through a buffer of buffer_size characters.
+        Failures to connect are retried up to retries times, waiting backoff seconds before the first
+        retry and doubling the wait for each retry after. Once connected the script is not retried,
+        as it may already have changed the device. The outcome is recorded in journal if given,
+        with the path of the output file once the device was opened in the sink
         """
-        client = AsyncSSHSession(device, username, password)
-        try:
-            await client.connect()
-            dev_obj["output"] = await client.run_command_script(script, out_file=out_file)
-            if client.has_error:
-                dev_obj["error"] = client.error
-            else:
-                dev_obj["status"] = True
-        except OSError:
-            dev_obj["error"] = "Unable to connect to device"
-        except PermissionDenied:
-            dev_obj["error"] = "Device rejected login"
-        except Exception as e:
-            dev_obj["error"] = e
+        start = await journal.start(device) if journal is not None else time.time()
+        output = None
+        for attempt in range(retries + 1):
+            dev_obj["attempts"] = attempt + 1
+            dev_obj["error"] = ""
+            client = AsyncSSHSession(
+                device, username, password, connect_timeout=connect_timeout, command_timeout=command_timeout, port=port
+            )
+            stream = DeviceStream(sink, device, buffer_size)
+            retry = False
+            try:
+                await client.connect()
+                await stream.open()
+                output = sink.get_path(device)
+                await client.run_command_script(script, stream=stream.write)
+                if client.has_error:
+                    dev_obj["error"] = client.error
+                else:
+                    dev_obj["status"] = True
+            except asyncio.TimeoutError:
+                dev_obj["error"] = "Timed out connecting to device"
+                retry = True
+            except OSError:
+                dev_obj["error"] = "Unable to connect to device"
+                retry = client.prompt is None
+            except PermissionDenied:
+                dev_obj["error"] = "Device rejected login"
+            except Exception as e:
+                dev_obj["error"] = e
+            finally:
+                client.close()
+                await stream.close()
+
+            if not retry or attempt == retries:
+                break
+            await asyncio.sleep(backoff * 2 ** attempt)
+        dev_obj["time"] = "{0:.2f}s".format(time.time() - start)
+        if journal is not None:
+            await journal.end(device, dev_obj["status"], dev_obj["error"], output, dev_obj["attempts"], start)
 
     async def gather_ssh_tasks(self, devices):
         """
-        Run gather on individual coroutines
+        Run gather on individual coroutines, with at most --concurrency running at once. Sessions
+        to the same device share connections while the run lasts
         """
+        concurrency = self.sli.options.get("concurrency") or self.default_concurrency
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(coroutine):
+            async with semaphore:
+                await coroutine
+
         # Gather and start coroutines
-        tasks = [x["coroutine"] for x in devices]
-        print(f"Starting SSH to {len(devices)} devices")
-        await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = [bounded(x["coroutine"]) for x in devices]
+        print(f"Starting SSH to {len(devices)} devices, {concurrency} at a time")
+        async with SSHConnectionPool.scope():
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-    def execute_mass_ssh(self, script, out_directory, devices):
+    def execute_mass_ssh(self, script, out_directory, devices, sink=None):
         """
-        Executes ascyncIO entry point function and prints results to stdout
+        Executes ascyncIO entry point function and prints results to stdout. Device output is
+        streamed to sink, the sink selected by the cli options when not given. Runs given an
+        out_directory are journaled, and with --resume skip the devices a previous run completed
         """
+        resume = self.sli.options.get("resume", False)
+        if resume and not out_directory:
+            raise SLIException("--resume requires the output path of the run being resumed given with -o")
+        if sink is None:
+            sink = self.get_sink(out_directory)
+
+        journal = None
+        if out_directory:
+            journal_path = get_journal_path(out_directory, single_file=isinstance(sink, JSONLSink))
+            journal = RunJournal(journal_path, script, resume)
+            if isinstance(sink, JSONLSink):
+                sink.run = journal.run
+            completed = journal.completed()
+            pending = [x for x in devices if x["device"] not in completed]
+            if len(pending) < len(devices):
+                print(f"Resuming, skipping {len(devices) - len(pending)} devices completed by a previous run")
+            devices = pending
+            if not devices:
+                journal.close()
+                print("All devices were completed by a previous run")
+                return
+
         # Populate devices objects with coroutines
         for dev in devices:
             dev["coroutine"] = self.ssh_coroutine(
                 dev["device"],
                 dev["username"],
                 dev["password"],
-                dev["out_file"],
+                sink,
                 script,
-                dev
+                dev,
+                connect_timeout=self.sli.options.get("connect_timeout"),
+                command_timeout=self.sli.options.get("command_timeout"),
+                retries=self.sli.options.get("retries", 0),
+                backoff=self.retry_backoff,
+                buffer_size=self.buffer_size,
+                port=int(dev.get("ssh_port", self.sli.options.get("ssh_port", 22))),
+                journal=journal,
             )
 
         # Execute SSH sessions
-        asyncio.get_event_loop().run_until_complete(self.gather_ssh_tasks(devices))
-
-        # If not saving to file, print device output
-        if not out_directory:
-            for dev in devices:
-                if dev["status"]:
-                    print(f"{dev['device']}\n{'-'*len(dev['device'])}")
-                    print(dev["output"])
+        try:
+            get_event_loop().run_until_complete(self.gather_ssh_tasks(devices))
+        finally:
+            sink.finish()
+            if journal is not None:
+                journal.close()
 
         # Print results from all devices
         results = [
                 {
                     "device": x["device"],
-                    "status": "SUCCESS" if x["status"] else str(x["error"])
+                    "status": "SUCCESS" if x["status"] else str(x["error"]),
+                    "attempts": str(x.get("attempts", 0)),
+                    "time": x.get("time", ""),
                 } for x in devices
             ]
-        print_table(results, {"Device": "device", "Status": "status"})
+        print_table(results, {"Device": "device", "Status": "status", "Attempts": "attempts", "Time": "time"})
 
     def run(self):
         # Handle invalid input arguments
@@ -205,14 +277,12 @@ class MassSSH(BaseCommand):
         with open(self.args[0], "r") as f:
             script = f.read()
 
-        # Create output directory if doesn't exist
+        # Select output sink, creating the output directory if required
         out_directory = self.sli.options.get("out_file", None)
-        if out_directory:
-            if not os.path.exists(out_directory):
-                os.mkdir(out_directory)
+        sink = self.get_sink(out_directory)
 
         # Load devices configuration from YAML or CLI input
         devices = self.load_device_configs(out_directory)
 
         # Execute mass SSH
-        self.execute_mass_ssh(script, out_directory, devices)
+        self.execute_mass_ssh(script, out_directory, devices, sink)
@@ -1,11 +1,7 @@
 from .mass_ssh import MassSSH
 
 from ..decorators import require_ngfw_connection_params
-from ..decorators import require_panoply_connection
-from skilletlib.panoply import Panoply
-
-import json
-import os
+from ..panoramaDevices import load_panorama_devices
 
 
 class MassSSHPanorama(MassSSH):
@@ -32,10 +28,16 @@ class MassSSHPanorama(MassSSH):
 
         The -o option refers to a directory to create and populate with output logs from all
         devices configured. The contents of the directory will be overwritten if it already exists.
+        Output can be streamed elsewhere with --sink and compressed with --gzip, and an interrupted
+        run resumed with --resume, see mass_ssh.
 
         The optional var device_filter.json must reference a file that contains a dictionary of
         key value pairs. These keys match keys from the returned device facts, captured using the Panorama
-        command `show devices connected`. Only devices that match ALL of the filter terms will be returned.
+        command `show devices connected`. Nested facts are named by their path, such as ha/state.
+        Only devices that match ALL of the filter terms will be returned. A string value is a regex
+        matched at the start of the fact, a list matches any of its values, and a dict may combine
+        equals, prefix, regex, in, and min and max versions. A version bound matches all versions
+        it is a prefix of, so a max of 10.1 includes 10.1.9-h3.
 
         Sample structuring of a device_filter.json
         ---
@@ -46,39 +48,33 @@ class MassSSHPanorama(MassSSH):
         }
         ---
 
+        Sample of a device_filter.json using prefixes, lists and version ranges
+        ---
+        {
+            "hostname": {"prefix": "dc1-"},
+            "model": ["PA-3220", "PA-3260"],
+            "sw-version": {"min": "10.1", "max": "10.2.3"},
+            "ha/state": {"equals": "active"}
+        }
+        ---
+
+        The list of connected devices is cached under ~/.sli/panorama and reused for --cache-ttl
+        seconds, 900 by default, without connecting to Panorama. Use --rebuild-cache to list the
+        devices again. Other commands running against many devices reuse the same list with an
+        inventory of panorama: or panorama:device_filter.json, for example:
+            sli op "show system info" value "./sw-version" -d panorama_device --inventory panorama:filter.json
+
         Usage:
             sli mass_ssh_from_panorama -d panorama_device -u username -p password -o output_dir script.txt [device_filter.json]
     """
 
-    def load_config_from_panorama(self, out_directory, pan):
+    def load_config_from_panorama(self, out_directory, pan=None):
         """
         Load list of devices and credentials from specified Panorama device using
-        dict-formatted filters
+        dict-formatted filters, from the cached device list when fresh
         """
-        # Read in filter dict from file
-        if len(self.args) == 2:
-            with open(self.args[1], 'r') as f:
-                raw_filter_data = f.read()
-            filter_dict = json.loads(raw_filter_data)
-        else:
-            filter_dict = {}
-
-        # Save list of devices that match ALL filter terms
-        devices = pan.filter_connected_devices(filter_dict)
-
-        # Get default credentials of all NGFWs
-        username, password = self.get_credentials()
-
-        return [{
-                    "device": x['ip-address'],
-                    "username": username,
-                    "password": password,
-                    "out_file": f"{os.path.join(out_directory,x)}.txt" if out_directory else None,
-                    "coroutine": None,
-                    "status": False,
-                    "output": None,
-                    "error": "",
-                } for x in devices]
+        filter_file = self.args[1] if len(self.args) == 2 else None
+        return [self.init_device(x) for x in load_panorama_devices(self.sli, filter_file, pan)]
 
     def load_device_configs(self, out_directory, pan=None):
         """
@@ -87,8 +83,7 @@ class MassSSHPanorama(MassSSH):
         return self.load_config_from_panorama(out_directory, pan)
 
     @require_ngfw_connection_params
-    @require_panoply_connection
-    def run(self, pan: Panoply):
+    def run(self):
 
         # Handle invalid input arguments
         print(len(self.args))
@@ -100,14 +95,12 @@ class MassSSHPanorama(MassSSH):
         with open(self.args[0], "r") as f:
             script = f.read()
 
-        # Create output directory if doesn't exist
+        # Select output sink, creating the output directory if required
         out_directory = self.sli.options.get("out_file", None)
-        if out_directory:
-            if not os.path.exists(out_directory):
-                os.mkdir(out_directory)
+        sink = self.get_sink(out_directory)
 
         # Load devices configuration from YAML or CLI input
-        devices = self.load_device_configs(out_directory, pan)
+        devices = self.load_device_configs(out_directory)
 
         # Execute mass SSH
-        self.execute_mass_ssh(script, out_directory, devices)
+        self.execute_mass_ssh(script, out_directory, devices, sink)
@@ -1,10 +1,18 @@
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import yaml
 from jinja2 import Template
 from skilletlib import SkilletLoader
+from skilletlib.exceptions import PanoplyException
 
+from sli.decorators import allow_inventory
+from sli.decorators import get_panoply_from_context, release_panoply
 from sli.decorators import require_ngfw_connection_params
+from sli.errors import SLIException
+from sli.tools import print_table
 from .base import BaseCommand
 
 skillet_template = """
@@ -46,11 +54,61 @@ class OpCommand(BaseCommand):
 
     Example: get system info and only return the value of the sw-version tag and store it in the context as 'sw'
         sli op "show system info" text "./sw-version" sw -uc
+
+    Batch mode runs every command listed in a YAML file over one authenticated session,
+    up to --jobs commands at a time, and saves all captured values to the context at once.
+    Each entry takes the same cmd, capture_method, query and context_var as above.
+
+    Example: run a batch of commands 4 at a time and store the captures in the context
+        sli op --batch cmds.yaml -j 4 -uc
+
+    A single command or a batch can also run against every device of an inventory, in the
+    mass_ssh YAML format or a comma separated list, up to --concurrency devices at a time.
+    Results of all devices are printed as JSON, or written to the file given with -o, and
+    context variables hold the captured value of each device keyed by device.
+
+    Example: get the software version of all devices in an inventory, 20 at a time
+        sli op "show system info" value "./sw-version" --inventory devices.yaml -cc 20 -o versions.json
+
+    An inventory of panorama:filter.json runs against the firewalls connected to the Panorama
+    given with -d that match the filter, see mass_ssh_from_panorama. The device list is cached,
+    so repeated fan-outs do not list the devices of the Panorama again.
+
+    Example: get the software version of all PA-VM firewalls managed by a Panorama
+        sli op "show system info" value "./sw-version" -d panorama --inventory panorama:filter.json
+
+    Sample structuring of cmds.yaml
+
+    ---
+
+    commands:
+        - cmd: show system info
+          capture_method: value
+          query: ./sw-version
+          context_var: sw_version
+
+        - cmd: <show><interface>all</interface></show>
+          capture_method: object
+
+    ---
     """
 
+    @allow_inventory
     @require_ngfw_connection_params
     def run(self):
 
+        batch_file = self.sli.options.get("batch")
+        if batch_file:
+            entries = self._load_batch(batch_file)
+            if not self._validate_entries(entries):
+                return
+            pan = get_panoply_from_context(self)
+            try:
+                self._run_batch(pan, entries)
+            finally:
+                release_panoply(self, pan)
+            return
+
         # Render validation skillet for execution
         if len(self.args) < 1 or len(self.args) > 4:
             self._print_usage()
@@ -76,6 +134,32 @@ class OpCommand(BaseCommand):
             self._print_usage()
             return
 
+        skillet_dict = self._render_skillet_dict(cmd_str, capture_method, capture_arg)
+        sl = SkilletLoader()
+        skillet = sl.create_skillet(skillet_dict)
+
+        # Execute skillet and extract values from target
+        pan = get_panoply_from_context(self)
+        try:
+            if pan.connected:
+                skillet.panoply = pan
+            exe = skillet.execute(self.sli.context)
+        finally:
+            release_panoply(self, pan)
+        if not skillet.success:
+            print("Unable to execute command")
+            return
+
+        self._print_output(exe["outputs"]["op_output"], capture_method)
+
+        # Update context if using context
+        if self.sli.cm.use_context and len(capture_var) > 1:
+            self.sli.context[capture_var] = exe["outputs"]["op_output"]
+            print(f"Output added to context as {capture_var}")
+
+    @staticmethod
+    def _render_skillet_dict(cmd_str, capture_method, capture_arg):
+        """Render the single snippet validation skillet executing an op command"""
         if capture_method == "text":
             # either the user said they wanted text output, of they didn't specify
             # if they said text, BUT the specified a query, then what they really want is 'value'
@@ -102,27 +186,135 @@ class OpCommand(BaseCommand):
                 "output_type": output_type,
             }
         )
+        return yaml.safe_load(skillet_yaml)
 
-        skillet_dict = yaml.safe_load(skillet_yaml)
-        sl = SkilletLoader()
-        skillet = sl.create_skillet(skillet_dict)
-
-        # Execute skillet and extract values from target
-        exe = skillet.execute(self.sli.context)
-        if not skillet.success:
-            print("Unable to execute command")
-            return
-
-        output = exe["outputs"]["op_output"]
+    @staticmethod
+    def _print_output(output, capture_method):
         if capture_method != "text":
             # Print captured JSON
             print(json.dumps(output, indent=4))
         else:
             print(output)
 
-        # Update context if using context
-        if self.sli.cm.use_context and len(capture_var) > 1:
-            self.sli.context[capture_var] = output
+    @staticmethod
+    def _load_batch(batch_file):
+        """Load batch entries from a YAML file, either a list or a dict with a commands list"""
+        with open(batch_file, "r") as f:
+            batch = yaml.safe_load(f)
+        entries = batch.get("commands", []) if isinstance(batch, dict) else batch
+        if not isinstance(entries, list) or not all(isinstance(x, dict) and x.get("cmd") for x in entries):
+            raise ValueError(f"Batch file {batch_file} must list commands, each with a cmd")
+        return entries
+
+    @staticmethod
+    def _validate_entries(entries):
+        """Check the capture method of all entries, printing the first invalid one"""
+        for entry in entries:
+            if entry.get("capture_method", "text") not in valid_methods:
+                print(f"Invalid method - {entry['capture_method']} for command {entry['cmd']}")
+                return False
+        return True
+
+    def _run_batch(self, pan, entries):
+        """Execute all commands of a batch concurrently over one session"""
+        if not pan.connected:
+            print("Batch mode requires a connection to a device")
+            return
+
+        # Each worker thread uses its own session sharing the API key of the checked out session
+        local = threading.local()
+
+        def run_entry(entry):
+            if getattr(local, "pan", None) is None:
+                local.pan = pan.clone()
+            return self._run_batch_entry(local.pan, entry)
+
+        jobs = max(self.sli.options.get("jobs", 1), 1)
+        with ThreadPoolExecutor(max_workers=min(jobs, len(entries)) or 1) as executor:
+            results = list(executor.map(run_entry, entries))
+
+        for entry, result in zip(entries, results):
+            print(f"--- {entry['cmd']}")
+            if result["error"]:
+                print(f"Error: {result['error']}")
+            else:
+                self._print_output(result["output"], entry.get("capture_method", "text"))
+
+        # Merge captures into the context, it is saved once after the command completes
+        stored = []
+        for entry, result in zip(entries, results):
+            capture_var = entry.get("context_var", "")
+            if self.sli.cm.use_context and capture_var and not result["error"]:
+                self.sli.context[capture_var] = result["output"]
+                stored.append(capture_var)
+
+        print_table(
+            [dict(x, cmd=y["cmd"], status="Error" if x["error"] else "Success") for x, y in zip(results, entries)],
+            {"Command": "cmd", "Status": "status", "Time": "time"},
+        )
+        if stored:
+            print(f"Output added to context as {', '.join(stored)}")
+
+    def _run_batch_entry(self, pan, entry):
+        """Execute a single batch entry with a worker session and capture its output"""
+        start = time.time()
+        result = {"output": None, "error": ""}
+        try:
+            skillet_dict = self._render_skillet_dict(
+                str(entry["cmd"]), entry.get("capture_method", "text"), entry.get("query", ".")
+            )
+            skillet = SkilletLoader().create_skillet(skillet_dict)
+            skillet.panoply = pan
+
+            # Run the snippet directly, executing the skillet would fetch the full configuration for every command
+            context = dict(self.sli.context)
+            snippet = skillet.get_snippets()[0]
+            snippet.render_metadata(context)
+            output, status = snippet.execute(context)
+            captured = snippet.capture_outputs(output, status)
+            result["output"] = captured.get("op_output")
+        except (Exception, PanoplyException) as e:
+            result["error"] = str(e)
+        result["time"] = "{0:.2f}s".format(time.time() - start)
+        return result
+
+    def prepare_inventory(self):
+        """Build the batch entries to run against every device of the inventory"""
+        batch_file = self.sli.options.get("batch")
+        if batch_file:
+            self.entries = self._load_batch(batch_file)
+        elif 1 <= len(self.args) <= 4:
+            self.entries = [dict(zip(("cmd", "capture_method", "query", "context_var"), self.args))]
+        else:
+            self._print_usage()
+            return False
+        return self._validate_entries(self.entries)
+
+    def run_device(self, pan, device):
+        """Run all entries against one inventory device, returns the output or a dict of batch outputs"""
+        outputs = {}
+        errors = []
+        for entry in self.entries:
+            result = self._run_batch_entry(pan, entry)
+            if result["error"]:
+                errors.append(f"{entry['cmd']} - {result['error']}")
+            outputs[entry.get("context_var") or entry["cmd"]] = result["output"]
+        if errors:
+            raise SLIException("; ".join(errors))
+        return outputs if self.sli.options.get("batch") else list(outputs.values())[0]
+
+    def store_inventory_results(self, results):
+        """Store the captures of successful devices in the context, keyed by device"""
+        if not self.sli.cm.use_context:
+            return
+        batch = self.sli.options.get("batch")
+        for entry in self.entries:
+            capture_var = entry.get("context_var")
+            if not capture_var:
+                continue
+            self.sli.context[capture_var] = {
+                x["device"]: x["output"][capture_var] if batch else x["output"] for x in results if x["status"]
+            }
             print(f"Output added to context as {capture_var}")
 
     def _get_output(self):
@@ -15,6 +15,7 @@ Generate output of a panos skillet and write to file
 class PreviewCommand(BaseCommand):
     sli_command = "preview"
     short_desc = "Generate output of a panos skillet and write to file"
+    single_skillet = True
     help_text = """
 
         Load and run a panos configuration skillet, saving the output to
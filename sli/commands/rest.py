@@ -11,6 +11,7 @@ Execute a REST skillet and generate results
 class ValidateCommand(BaseCommand):
     sli_command = 'rest'
     short_desc = 'Execute a validation skillet of type REST'
+    single_skillet = True
 
     @require_single_skillet
     @require_skillet_type('rest')
@@ -8,6 +8,7 @@ from skilletlib.skillet.panos import PanosSkillet
 class RollupPlaylist(BaseCommand):
     sli_command = 'rollup_playlist'
     short_desc = 'Rollup a panos skillet in playlist format into a single file'
+    single_skillet = True
     no_context = True
     help_text = """
 
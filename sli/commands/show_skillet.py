@@ -6,6 +6,7 @@ from ..decorators import require_single_skillet
 class ShowSkillet(BaseCommand):
     sli_command = "show_skillet"
     short_desc = "Shows the contents of a Compiled Skillet in YAML format"
+    single_skillet = True
     no_skillet = False
     no_context = True
     help_text = """
@@ -14,6 +14,7 @@ Generate output of a panos skillet and write to file
 class SpreadsheetCommand(BaseCommand):
     sli_command = 'spreadsheet'
     short_desc = 'Generate a user editable spreadsheet from a template'
+    single_skillet = True
     suppress_output = True
     help_text = """
 
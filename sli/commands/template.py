@@ -11,6 +11,7 @@ Render a template and save it to a file
 class TemplateCommand(BaseCommand):
     sli_command = 'template'
     short_desc = 'Render a template and safe it to a file'
+    single_skillet = True
     help_text = """
 
         Render a template and save it to a file. Templates will be created
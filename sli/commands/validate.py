@@ -16,6 +16,7 @@ Execute a validation skillet and generate results
 class ValidateCommand(BaseCommand):
     sli_command = 'validate'
     short_desc = 'Execute a validation skillet of type pan_validation'
+    single_skillet = True
 
     @require_single_skillet
     @require_skillet_type('pan_validation')
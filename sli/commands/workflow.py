@@ -13,6 +13,7 @@ from .base import BaseCommand
 class WorkflowCommand(BaseCommand):
     sli_command = 'workflow'
     short_desc = 'Execute a workflow skillet'
+    single_skillet = True
 
     @require_single_skillet
     @require_skillet_type('workflow')
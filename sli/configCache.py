@@ -0,0 +1,155 @@
+"""
+On-disk cache of configurations used by diffs, under ~/.sli/configs. Configuration versions of
+the config audit log never change once committed, so they are stored by the sha256 of their
+contents and indexed per device by version number and commit date. Diffs against -1, -2 or a
+version number only list the versions on the device to resolve the version, downloading it
+only if it is not cached already.
+
+Digests of the large subtrees of diffed configurations are stored by the same content hash, so a
+configuration diffed again, such as an unchanged running config or a historic version, is
+compared without digesting its unchanged branches again.
+
+Only the MAX_ENTRIES most recently used configurations and digest files are kept.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from sli.tools import expandedHomePath
+from sli.tools import load_config_file
+
+CACHE_VERSION = 1
+
+MAX_ENTRIES = 50
+
+VERSION_PATTERN = re.compile(r"^-?\d+$")
+
+
+def content_key(config):
+    """Return the key a configuration and its digests are stored under"""
+    return hashlib.sha256(config.encode() if isinstance(config, str) else config).hexdigest()
+
+
+class ConfigCache:
+
+    # Serializes updates of device indexes between threads fetching configurations
+    lock = threading.Lock()
+
+    def __init__(self, rebuild=False, cache_dir=None):
+        self.rebuild = rebuild
+        self.cache_dir = cache_dir if cache_dir else expandedHomePath(".sli/configs")
+
+    def _read(self, path):
+        """Return the contents of a cache file, None if missing or unreadable. Marks it as recently used"""
+        if self.rebuild:
+            return None
+        try:
+            with open(path, "r") as f:
+                contents = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return contents
+
+    def _write(self, path, contents):
+        """Atomically write a cache file, failing to do so only prints a warning"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file, "w") as f:
+                f.write(contents)
+            os.replace(temp_file, path)
+        except OSError as e:
+            print(f"Unable to write config cache {path} - {e}")
+            return
+        self._prune(os.path.dirname(path))
+
+    @staticmethod
+    def _prune(directory):
+        """Remove all but the MAX_ENTRIES most recently used files of a cache directory"""
+        try:
+            entries = sorted(os.scandir(directory), key=lambda x: x.stat().st_mtime, reverse=True)
+            for entry in entries[MAX_ENTRIES:]:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+    def _read_json(self, path):
+        contents = self._read(path)
+        try:
+            data = json.loads(contents) if contents is not None else {}
+        except ValueError:
+            return {}
+        return data if data.get("version") == CACHE_VERSION else {}
+
+    def _write_json(self, path, data):
+        self._write(path, json.dumps(dict(data, version=CACHE_VERSION)))
+
+    def _index_file(self, pan):
+        key = hashlib.sha256(f"{pan.hostname}:{pan.port}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, "devices", f"{key}.json")
+
+    def _config_file(self, key):
+        return os.path.join(self.cache_dir, "versions", f"{key}.xml")
+
+    def _digests_file(self, key):
+        return os.path.join(self.cache_dir, "digests", f"{key}.json")
+
+    @staticmethod
+    def _resolve_version(versions, source_name):
+        """
+        Return the version and commit date of a configuration version from the versions on the
+        device, negative numbers counting back from the running config as skilletlib does
+        """
+        numbers = sorted(int(x["version"]) for x in versions)
+        if source_name.startswith("-"):
+            if len(numbers) < 2 or int(source_name) - 1 < -len(numbers):
+                return None
+            number = str(numbers[int(source_name) - 1])
+        else:
+            number = source_name
+        dates = [x["date"] for x in versions if x["version"] == number]
+        return (number, dates[0]) if dates else None
+
+    def load_config(self, source_name, pan=None):
+        """
+        Load a configuration the same way as load_config_file, returning configuration versions
+        from the cache when they have been fetched from the device before
+        """
+        if pan is None or not pan.connected or not VERSION_PATTERN.match(source_name):
+            return load_config_file(source_name, pan)
+
+        version = self._resolve_version(pan.get_configuration_versions(), source_name)
+        if version is None:
+            # Let skilletlib report the version as not found
+            return load_config_file(source_name, pan)
+        number, date = version
+
+        index_file = self._index_file(pan)
+        entry = self._read_json(index_file).get("versions", {}).get(number)
+        if entry is not None and entry["date"] == date:
+            config = self._read(self._config_file(entry["key"]))
+            if config is not None:
+                return config
+
+        config = pan.get_configuration_version(number)
+        key = content_key(config)
+        self._write(self._config_file(key), config)
+        with self.lock:
+            index = self._read_json(index_file)
+            versions = index.get("versions", {})
+            versions[number] = {"date": date, "key": key}
+            self._write_json(index_file, {"device": f"{pan.hostname}:{pan.port}", "versions": versions})
+        return config
+
+    def load_digests(self, key):
+        """Return the subtree digests stored for a configuration, keyed by element path"""
+        digests = self._read_json(self._digests_file(key)).get("digests", {})
+        return {k: bytes.fromhex(v) for k, v in digests.items()}
+
+    def save_digests(self, key, digests):
+        """Store the subtree digests of a configuration, keyed by element path"""
+        self._write_json(self._digests_file(key), {"digests": {k: v.hex() for k, v in digests.items()}})
@@ -0,0 +1,404 @@
+"""
+Diff of two PAN-OS configurations producing the snippets and set commands of skilletlib's
+generate_skillet_from_configs and generate_set_cli_from_configs. Both documents are parsed once,
+then the diff walks the latest configuration, matching elements to the previous configuration
+through keyed indexes of their children by tag and entry name. Matched subtrees are compared by
+digest before descending into them, so unchanged branches are skipped. Digests of elements are
+built from the digests of their children, down to elements holding only leaves which are digested
+from their serialization in C, so each element is digested once for the whole diff.
+
+Output follows skilletlib, including its ordering of snippets and set commands, with two
+differences in cases that do not occur in PAN-OS configurations: lists of identical elements are
+compared by digest rather than with xmldiff, and a set command is only compared with commands of
+the same path in the previous configuration.
+"""
+
+import random
+import re
+from hashlib import blake2b
+from itertools import islice
+
+from lxml import etree
+from skilletlib.panoply import Panoply
+
+from sli.configCache import content_key
+
+# Attributes removed before comparing elements, uuids are unique to each device
+IGNORED_ATTRIBUTES = ("uuid",)
+
+# Snippet xpaths that are not user configurable
+IGNORED_XPATHS = (
+    '/config/mgt-config/users/entry[@name="admin"]',
+    "/config/shared/content-preview",
+    "/config/readonly",
+)
+
+# Set commands that can not recreate configuration, by prefix, whole command and part
+IGNORED_SET_PREFIXES = (
+    "set mgt-config users admin phash",
+    "set shared content-preview",
+    "set read-only",
+    "set readonly",
+)
+IGNORED_SET_COMMANDS = (
+    "set shared application",
+    "set shared application-group",
+    "set shared service",
+    "set shared service-group",
+)
+IGNORED_SET_PARTS = (
+    "deviceconfig setting management initcfg",
+    "deviceconfig setting management disable-predefined-reports",
+)
+
+# Elements in a subtree small enough to digest from its serialization
+SMALL_SUBTREE = 64
+
+LEAF_SPLIT_RE = re.compile(r"/devices/.*?/|vsys/.*?/")
+SLASH_MARKER = "****"
+
+
+def parse_config(config):
+    """
+    Parse a configuration from a string or bytes, dropping blank text, comments and processing
+    instructions, and IGNORED_ATTRIBUTES as they are never part of a diff
+    """
+    parser = etree.XMLParser(remove_blank_text=True, remove_comments=True, remove_pis=True, huge_tree=True)
+    root = etree.fromstring(config.encode() if isinstance(config, str) else config, parser=parser)
+    etree.strip_attributes(root, *IGNORED_ATTRIBUTES)
+    return root
+
+
+def subtree_digest(element):
+    """
+    Return a digest of an element and everything under it. Serializing and hashing both run in
+    C, which is far faster than visiting each element from Python, but serializing large
+    subtrees again for each of their ancestors would not be
+    """
+    return blake2b(etree.tostring(element, with_tail=False), digest_size=16).digest()
+
+
+def quote_arg(value):
+    """Quote a set command argument as pan-python does"""
+    if '"' in value:
+        return f"'{value}'"
+    if " " in value:
+        return f'"{value}"'
+    return value
+
+
+def ordered(items, leaf_xpath):
+    """
+    Order items such as snippets by the xpaths of skilletlib, given a function returning the
+    leaf xpath of each item. Items are kept in their order within each xpath and duplicates dropped
+    """
+    xpaths, post_xpaths = Panoply.get_ordered_xpaths()
+    buckets = [[] for _ in xpaths]
+    rest = []
+    post = []
+    seen = set()
+    for item, key in items:
+        if key in seen:
+            continue
+        seen.add(key)
+        leaf = leaf_xpath(item)
+        bucket = next((i for i, x in enumerate(xpaths) if leaf.startswith(x)), None)
+        if bucket is not None:
+            buckets[bucket].append(item)
+        elif any(leaf.startswith(x) for x in post_xpaths):
+            post.append(item)
+        else:
+            rest.append(item)
+    return [x for bucket in buckets for x in bucket] + rest + post
+
+
+def snippet_leaf_xpath(full_xpath):
+    """Return the part of an xpath after any device and vsys entries, as used for ordering"""
+    leaf = LEAF_SPLIT_RE.split(full_xpath)[-1]
+    return re.sub(r"^\./", "", leaf)
+
+
+def order_snippets(snippets):
+    """Order snippets in the order they need to be applied"""
+    return ordered(
+        [(x, tuple(x.items())) for x in snippets], lambda x: snippet_leaf_xpath(x.get("full_xpath", ""))
+    )
+
+
+def order_set_commands(commands):
+    """
+    Order set commands in the order they need to be applied, dropping duplicates. Commands are
+    ordered as pseudo xpaths as skilletlib does, which also removes the default device and vsys
+    from their paths
+    """
+    xpaths = [
+        x.replace("devices localhost.localdomain vsys vsys1 log-settings profiles", "shared log-settings profiles")
+        .replace("devices localhost.localdomain vsys vsys1 ", "")
+        .replace("devices localhost.localdomain ", "")
+        .replace("set ", "")
+        .replace("/", SLASH_MARKER)
+        .replace(" ", "/")
+        for x in commands
+    ]
+    xpaths = ordered([(x, x) for x in xpaths], snippet_leaf_xpath)
+    return [f"set {x.replace('/', ' ').replace(SLASH_MARKER, '/')}" for x in xpaths]
+
+
+def is_ignored_set_command(command):
+    return (
+        command.startswith(IGNORED_SET_PREFIXES)
+        or command in IGNORED_SET_COMMANDS
+        or any(x in command for x in IGNORED_SET_PARTS)
+    )
+
+
+class ConfigDiff:
+    """
+    Diff of a previous and latest configuration, given as XML strings or bytes. With a
+    ConfigCache, digests of large elements are loaded from and stored to the cache by the
+    content of each configuration
+
+    Usage:
+        diff = ConfigDiff(previous_config, latest_config)
+        snippets = diff.snippets()
+        commands = diff.set_commands()
+    """
+
+    def __init__(self, previous_config, latest_config, cache=None):
+        self.previous = parse_config(previous_config)
+        self.latest = parse_config(latest_config)
+        # Digests of large elements, kept as they are compared after their ancestors
+        self.digests = {}
+        self.cache = cache
+        # Cache key and cached digests by element path of each configuration, by root element
+        self.keys = {}
+        self.cached = {}
+        if cache is not None:
+            for root, config in ((self.previous, previous_config), (self.latest, latest_config)):
+                self.keys[root] = content_key(config)
+                self.cached[root] = cache.load_digests(self.keys[root])
+
+    def _digest(self, element):
+        """
+        Return the digest of an element. Subtrees of up to SMALL_SUBTREE elements are digested
+        from their serialization, larger ones from the digests of their children, which are kept
+        so each large element is only visited once for the whole diff
+        """
+        digest = self.digests.get(element)
+        if digest is not None:
+            return digest
+        if sum(1 for _ in islice(element.iter(), SMALL_SUBTREE + 1)) <= SMALL_SUBTREE:
+            return subtree_digest(element)
+        if self.cached:
+            tree = element.getroottree()
+            digest = self.cached[tree.getroot()].get(tree.getpath(element))
+            if digest is not None:
+                self.digests[element] = digest
+                return digest
+        h = blake2b(f"{element.tag}{element.items()}{element.text}".encode(), digest_size=16)
+        for child in element:
+            h.update(self._digest(child) if len(child) else etree.tostring(child, with_tail=False))
+        digest = self.digests[element] = h.digest()
+        return digest
+
+    def _unchanged(self, latest, previous):
+        """Check if two elements with children have identical subtrees"""
+        return len(latest) and len(previous) and self._digest(latest) == self._digest(previous)
+
+    def _save_digests(self):
+        """Store the digests of large elements of each configuration computed by this diff"""
+        if self.cache is None:
+            return
+        for root, key in self.keys.items():
+            tree = root.getroottree()
+            digests = {tree.getpath(k): v for k, v in self.digests.items() if k.getroottree().getroot() is root}
+            if not digests.keys() <= self.cached[root].keys():
+                self.cached[root].update(digests)
+                self.cache.save_digests(key, self.cached[root])
+
+    # Snippets
+
+    @staticmethod
+    def _path_entry(element):
+        """Return the xpath step matching element by its attributes, or by tag if it has none"""
+        if not element.attrib:
+            return element.tag
+        attributes = " and ".join(f'@{k}="{v}"' for k, v in element.items())
+        return f"{element.tag}[{attributes}]"
+
+    @staticmethod
+    def _index_children(parent):
+        """
+        Return indexes of the children of parent by tag and name, by tag, and by tag and text,
+        each holding children in order
+        """
+        by_name = {}
+        by_tag = {}
+        by_text = {}
+        for child in parent:
+            by_name.setdefault((child.tag, child.get("name")), []).append(child)
+            by_tag.setdefault(child.tag, []).append(child)
+            by_text.setdefault((child.tag, child.text), child)
+        return by_name, by_tag, by_text
+
+    @staticmethod
+    def _find_child(index, element, is_list, position):
+        """
+        Return the child of the indexed parent matched by the xpath step skilletlib builds for
+        element, the first of any that match
+        """
+        by_name, by_tag, by_text = index
+        if element.attrib:
+            attributes = dict(element.items())
+            candidates = by_name.get((element.tag, attributes["name"]), []) if "name" in attributes \
+                else by_tag.get(element.tag, [])
+            return next((x for x in candidates if all(x.get(k) == v for k, v in attributes.items())), None)
+        same = by_tag.get(element.tag, [])
+        if not is_list:
+            return same[0] if same else None
+        text = (element.text or "").strip()
+        if text:
+            return by_text.get((element.tag, text))
+        return same[position - 1] if position <= len(same) else None
+
+    @staticmethod
+    def _is_list(children):
+        """Check if children are two or more leaves of the same tag, such as members"""
+        if len(children) <= 1:
+            return False
+        return all(not len(x) and x.tag == children[0].tag for x in children)
+
+    def _changed_elements(self, element, parts, previous, changed):
+        """
+        Add (parts, element) to changed for each element under element, at the xpath steps parts,
+        that is not found in previous or differs from it
+        """
+        if previous is None:
+            # Blank elements not found are not a change
+            if len(element) or element.attrib or (element.text and element.text.strip()):
+                changed.append((parts, element))
+            return
+
+        if not len(element):
+            if previous.text != element.text:
+                changed.append((parts, element))
+            return
+        if self._unchanged(element, previous):
+            return
+
+        is_list = self._is_list(element)
+        index = self._index_children(previous)
+        for position, child in enumerate(element, 1):
+            if child.attrib:
+                step = self._path_entry(child)
+            elif is_list:
+                text = (child.text or "").strip()
+                step = f'{child.tag}[text()="{text}"]' if text else f"{child.tag}[{position}]"
+            else:
+                step = child.tag
+            found = self._find_child(index, child, is_list, position)
+            self._changed_elements(child, parts + [step], found, changed)
+
+    def snippets(self):
+        """
+        Return snippets of the elements of the latest configuration not found in or differing from
+        the previous configuration, as dicts of name, xpath, element and full_xpath
+        """
+        changed = []
+        for child in self.latest:
+            self._changed_elements(child, [".", child.tag], self.previous.find(child.tag), changed)
+        self._save_digests()
+
+        snippets = []
+        for parts, element in changed:
+            xpath = "/".join(parts)
+            full_xpath = "/config/" + "/".join(parts[1:])
+            set_xpath = "/config" + "".join(f"/{x}" for x in parts[1:-1])
+            if any(x in set_xpath for x in IGNORED_XPATHS) or any(x in full_xpath for x in IGNORED_XPATHS):
+                continue
+
+            tag = re.sub(r"\[.*\]", "", parts[-1])
+            snippets.append({
+                "name": f"{tag}-{int(random.random() * 1000000)}",
+                "xpath": set_xpath,
+                "element": etree.tostring(element, pretty_print=True, encoding="unicode").strip(),
+                "full_xpath": xpath,
+            })
+        return order_snippets(snippets)
+
+    # Set commands
+
+    @staticmethod
+    def _child_path(child, path):
+        """Return the set command path of a child element, as pan-python builds it"""
+        if child.tag not in ("entry", "member"):
+            path += " " + child.tag
+        name = child.get("name")
+        if name is not None:
+            path += " " + quote_arg(name)
+        return path
+
+    def _set_lines(self, element, path, lines):
+        """Add the set commands of element at path and all elements under it to lines"""
+        if not len(element):
+            text = element.text.strip() if element.text else None
+            lines.append(f"{path} {quote_arg(element.text)}" if text else path)
+            return
+        for child in element:
+            self._set_lines(child, self._child_path(child, path), lines)
+
+    def _diff_groups(self, groups, previous_groups, commands):
+        """Add set commands of groups of children by set command path not found in previous_groups"""
+        for child_path, children in groups.items():
+            previous_children = previous_groups.get(child_path, [])
+            if len(children) == 1 and len(previous_children) <= 1:
+                self._set_diff(children[0], previous_children[0] if previous_children else None, child_path, commands)
+                continue
+
+            # Children sharing a path, such as members, are compared by their set commands
+            lines = []
+            previous_lines = []
+            for child in children:
+                self._set_lines(child, child_path, lines)
+            for child in previous_children:
+                self._set_lines(child, child_path, previous_lines)
+            previous_lines = set(previous_lines)
+            commands.extend(x for x in lines if x not in previous_lines)
+
+    def _groups(self, element, path=None):
+        """
+        Return the children of element grouped by their set command path, in order. Children of
+        the root are given paths from their tag and name only when path is None
+        """
+        groups = {}
+        for child in element:
+            if path is None:
+                child_path = f"set {child.tag}" + (f" {quote_arg(child.get('name'))}" if child.get("name") else "")
+            else:
+                child_path = self._child_path(child, path)
+            groups.setdefault(child_path, []).append(child)
+        return groups
+
+    def _set_diff(self, latest, previous, path, commands):
+        """Add set commands of latest not found among the set commands of previous at path"""
+        if previous is not None and self._unchanged(latest, previous):
+            return
+        if previous is None or not len(latest) or not len(previous):
+            lines = []
+            self._set_lines(latest, path, lines)
+            previous_lines = []
+            if previous is not None:
+                self._set_lines(previous, path, previous_lines)
+            previous_lines = set(previous_lines)
+            commands.extend(x for x in lines if x not in previous_lines)
+            return
+        self._diff_groups(self._groups(latest, path), self._groups(previous, path), commands)
+
+    def set_commands(self):
+        """Return the set commands of the latest configuration not found in the previous configuration"""
+        commands = []
+        if not self._unchanged(self.latest, self.previous):
+            self._diff_groups(self._groups(self.latest), self._groups(self.previous), commands)
+        self._save_digests()
+        commands = [x.replace("\n", " ") for x in commands if not is_ignored_set_command(x)]
+        return order_set_commands(commands)
@@ -1,4 +1,6 @@
 from sli.tools import expandedHomePath
+from sli.tools import file_fingerprint
+import copy
 import os
 import json
 import yaml
@@ -12,6 +14,10 @@ SLI's context manager, load, manipulate, and store context objects
 
 class ContextManager():
 
+    # Decrypted contexts keyed by context file, kept between commands by long running
+    # processes such as the SLI daemon. Disabled unless set to a dict
+    memory_contexts = None
+
     def __init__(self, options):
         self._setup_directory()
         self.options = options
@@ -28,8 +34,7 @@ class ContextManager():
         """Create initial directories required for context management in SLI"""
         directories = [expandedHomePath(d) for d in ['.sli', '.sli/skillets', '.sli/context']]
         for directory in directories:
-            if not os.path.exists(directory):
-                os.mkdir(directory)
+            os.makedirs(directory, exist_ok=True)
 
     @staticmethod
     def remove_context(context_name):
@@ -44,7 +49,7 @@ class ContextManager():
     def clean_context(self, context_name):
         """Remove all keys from a contexts except NGFW credentials"""
         context = self.load_context(from_file=context_name)
-        creds_strings = "TARGET_IP", "TARGET_USERNAME", "TARGET_PASSWORD"
+        creds_strings = "TARGET_IP", "TARGET_USERNAME", "TARGET_PASSWORD", "TARGET_API_KEYS"
         keys = [x for x in context.keys() if x not in creds_strings]
         for key in keys:
             context.pop(key)
@@ -70,6 +75,32 @@ class ContextManager():
         self.context_password = getpass.getpass('Context encryption password: ')
         return self.context_password
 
+    def _get_memory_context(self):
+        """Return a copy of the in-memory context for the current context file if it is still current"""
+        if self.memory_contexts is None:
+            return None
+        entry = self.memory_contexts.get(self.context_file)
+        if entry is None or entry['fingerprint'] != file_fingerprint(self.context_file):
+            return None
+        if entry['encrypted']:
+            # A password supplied for this command must match the one used to decrypt the context
+            if len(self.context_password) > 0 and self.context_password != entry['password']:
+                return None
+            self.encrypt_context = True
+            self.context_password = entry['password']
+        return copy.deepcopy(entry['context'])
+
+    def _set_memory_context(self, context):
+        """Keep a copy of the context as stored in the current context file"""
+        if self.memory_contexts is None:
+            return
+        self.memory_contexts[self.context_file] = {
+            'fingerprint': file_fingerprint(self.context_file),
+            'context': copy.deepcopy(context),
+            'encrypted': bool(self.encrypt_context),
+            'password': self.context_password,
+        }
+
     def load_environment(self):
         """Load and return specified environment file from options"""
         context = {}
@@ -107,6 +138,12 @@ class ContextManager():
         if not os.path.exists(self.context_file):
             return context
 
+        memory_context = self._get_memory_context()
+        if memory_context is not None:
+            context.update(memory_context)
+            context.update(self.load_environment())
+            return context
+
         try:
             with open(self.context_file, 'r') as f:
                 context_file_json = json.loads(f.read())
@@ -133,11 +170,13 @@ class ContextManager():
                     print('Invalid context decryption key\n')
                     self.context_password = ''
                     password = self._get_context_password()
+            self._set_memory_context(decrypted_dict)
             decrypted_dict.update(self.load_environment())
             return decrypted_dict
 
         # Assume unencrypted context content, return context
         context.update(context_file_json.get('context', context))
+        self._set_memory_context(context)
         context.update(self.load_environment())
         return context
 
@@ -180,3 +219,4 @@ class ContextManager():
                     'context': context
                 }
                 f.write(json.dumps(write_dict, indent=4))
+        self._set_memory_context(context)
@@ -0,0 +1,338 @@
+"""
+SLI daemon, a long running process executing sli commands on behalf of the sli client.
+
+The daemon keeps parsed skillets, decrypted contexts, connected Panoply sessions and SSH
+connections in memory between commands. The sli client forwards its argv, working directory and
+environment over a local Unix socket and relays output and input as newline delimited
+JSON messages:
+
+    client -> daemon   {"argv": [...], "cwd": "...", "env": {...}} or {"control": "status" | "stop"}
+    daemon -> client   {"type": "output", "stream": "stdout" | "stderr", "data": "..."}
+    daemon -> client   {"type": "input"}, answered with {"type": "input", "data": "line"}
+    daemon -> client   {"type": "password", "prompt": "..."}, answered the same with input read without echo
+    daemon -> client   {"type": "local"}, the client runs the command itself, used for sli daemon
+    daemon -> client   {"type": "exit", "status": 0}
+
+Passwords read with getpass while a command runs are prompted for by the client, on its own
+terminal and without echo, rather than on the terminal of the daemon.
+
+Only the standard library is imported at module level so the client stays fast to start.
+"""
+
+import getpass
+import json
+import os
+import socket
+import sys
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+SOCKET_FILE = os.path.join(os.path.expanduser("~"), ".sli", "daemon.sock")
+LOG_FILE = os.path.join(os.path.expanduser("~"), ".sli", "daemon.log")
+START_TIMEOUT = 10
+
+
+def send_message(connection, message):
+    """Send a single JSON message terminated by a newline"""
+    connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def connect(socket_file=SOCKET_FILE):
+    """Return a socket connected to a running daemon, or None if no daemon is listening"""
+    if not os.path.exists(socket_file):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_file)
+    except OSError:
+        connection.close()
+        return None
+    return connection
+
+
+def forward_command(argv, socket_file=SOCKET_FILE):
+    """
+    Forward an sli command to a running daemon, relaying output and input until it completes.
+    Returns the exit status of the command, or None if no daemon is running or the command must
+    run in this process
+    """
+    connection = connect(socket_file)
+    if connection is None:
+        return None
+    return _relay(connection, {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)})
+
+
+def send_control(control, socket_file=SOCKET_FILE):
+    """Send a control request (status or stop) to a running daemon, returns None if not running"""
+    connection = connect(socket_file)
+    if connection is None:
+        return None
+    return _relay(connection, {"control": control})
+
+
+def _relay(connection, request):
+    """Send a request and relay the daemon responses to this process until an exit message"""
+    with connection:
+        send_message(connection, request)
+        reader = connection.makefile("r", encoding="utf-8")
+        for line in reader:
+            message = json.loads(line)
+            if message["type"] == "output":
+                stream = sys.stderr if message.get("stream") == "stderr" else sys.stdout
+                stream.write(message["data"])
+                stream.flush()
+            elif message["type"] == "input":
+                send_message(connection, {"type": "input", "data": sys.stdin.readline()})
+            elif message["type"] == "password":
+                send_message(connection, {"type": "input", "data": getpass.getpass(message["prompt"])})
+            elif message["type"] == "local":
+                return None
+            elif message["type"] == "exit":
+                return message["status"]
+    print("Lost connection to SLI daemon", file=sys.stderr)
+    return 1
+
+
+class SocketWriter:
+    """File-like object sending writes to the client as output messages"""
+
+    def __init__(self, connection, stream):
+        self.connection = connection
+        self.stream = stream
+        self.broken = False
+
+    def write(self, data):
+        if data and not self.broken:
+            try:
+                send_message(self.connection, {"type": "output", "stream": self.stream, "data": data})
+            except OSError:
+                # Client went away, drop remaining output and let the command finish
+                self.broken = True
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class SocketReader:
+    """File-like object requesting a line of input from the client whenever one is read"""
+
+    def __init__(self, connection, reader):
+        self.connection = connection
+        self.reader = reader
+
+    def _request(self, message):
+        try:
+            send_message(self.connection, message)
+            line = self.reader.readline()
+        except OSError:
+            return ""
+        if not line:
+            return ""
+        return json.loads(line).get("data", "")
+
+    def readline(self, size=-1):
+        return self._request({"type": "input"})
+
+    def getpass(self, prompt="Password: ", stream=None):
+        """Replacement of getpass.getpass, the client reads the password without echo"""
+        return self._request({"type": "password", "prompt": prompt})
+
+    def isatty(self):
+        return False
+
+
+class SLIDaemon:
+
+    def __init__(self, socket_file=SOCKET_FILE):
+        self.socket_file = socket_file
+        self.running = False
+        self.start_time = time.time()
+        self.commands_run = 0
+        self.cli = None
+
+    def _enable_warm_state(self):
+        """Import sli once and switch on the in-memory caches shared between commands"""
+        from sli.cli import cli
+        from sli.skilletLineInterface import SkilletLineInterface
+
+        self.cli = cli
+        SkilletLineInterface.enable_shared_caches()
+
+    def _status(self):
+        """Return a status report of the daemon and its warm state"""
+        from sli.contextManager import ContextManager
+        from sli.panoplyPool import PanoplyPool
+        from sli.skilletCache import CachedSkilletLoader
+        from sli.sshPool import SSHConnectionPool
+
+        uptime = int(time.time() - self.start_time)
+        return "\n".join([
+            f"SLI daemon running, pid {os.getpid()}, socket {self.socket_file}",
+            f"   Uptime: {uptime // 60}m {uptime % 60}s",
+            f"   Commands run: {self.commands_run}",
+            f"   Skillet directories cached: {len(CachedSkilletLoader.memory_cache)}",
+            f"   Contexts cached: {len(ContextManager.memory_contexts)}",
+            f"   Idle device sessions: {PanoplyPool.idle_count()}",
+            f"   SSH connections: {SSHConnectionPool.open_count()} open, {SSHConnectionPool.idle_count()} idle",
+        ]) + "\n"
+
+    def serve(self):
+        """Listen on the socket and execute requests one at a time until stopped"""
+        self._enable_warm_state()
+        if os.path.exists(self.socket_file):
+            os.remove(self.socket_file)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # Create the socket accessible to the user only, as requests carry the client environment
+            umask = os.umask(0o077)
+            try:
+                server.bind(self.socket_file)
+            finally:
+                os.umask(umask)
+            server.listen()
+            self.running = True
+            print(f"SLI daemon listening on {self.socket_file}", flush=True)
+            while self.running:
+                connection, _ = server.accept()
+                with connection:
+                    try:
+                        self.handle(connection)
+                    except (OSError, ValueError) as e:
+                        print(f"Error handling request: {e}", flush=True)
+        finally:
+            server.close()
+            if os.path.exists(self.socket_file):
+                os.remove(self.socket_file)
+
+    def handle(self, connection):
+        """Handle a single client request"""
+        reader = connection.makefile("r", encoding="utf-8")
+        line = reader.readline()
+        if not line:
+            # Connection only checking the daemon is listening
+            return
+        request = json.loads(line)
+        control = request.get("control")
+
+        if control == "stop":
+            self.running = False
+            send_message(connection, {"type": "output", "stream": "stdout", "data": "SLI daemon stopped\n"})
+            status = 0
+        elif control == "status":
+            send_message(connection, {"type": "output", "stream": "stdout", "data": self._status()})
+            status = 0
+        elif self._get_action(request["argv"]) == "daemon":
+            # Managing the daemon from within itself would block it, the client runs it instead
+            send_message(connection, {"type": "local"})
+            return
+        else:
+            status = self.run_command(request, connection, reader)
+            self.commands_run += 1
+
+        send_message(connection, {"type": "exit", "status": status})
+
+    def _get_action(self, argv):
+        """Return the action of a command line, parsed without running or validating it"""
+        try:
+            ctx = self.cli.make_context("sli", list(argv), resilient_parsing=True)
+        except Exception:
+            return None
+        return str(ctx.params.get("action", "")).replace("-", "_")
+
+    def run_command(self, request, connection, reader):
+        """Execute a forwarded command with the client's directory, environment and stdio"""
+        cwd = os.getcwd()
+        environ = dict(os.environ)
+        stdin = sys.stdin
+        socket_reader = SocketReader(connection, reader)
+        patched = self._patch_getpass(socket_reader.getpass)
+        try:
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+            sys.stdin = socket_reader
+            with redirect_stdout(SocketWriter(connection, "stdout")), redirect_stderr(SocketWriter(connection, "stderr")):
+                return self._invoke(request["argv"])
+        finally:
+            for module, function in patched:
+                module.getpass = function
+            sys.stdin = stdin
+            os.environ.clear()
+            os.environ.update(environ)
+            os.chdir(cwd)
+
+    @staticmethod
+    def _patch_getpass(replacement):
+        """
+        Point getpass.getpass, and the names modules imported it as, at replacement. Returns the
+        patched modules and their original function to restore
+        """
+        original = getpass.getpass
+        patched = [(getpass, original)]
+        for module in list(sys.modules.values()):
+            try:
+                if module is not getpass and getattr(module, "getpass", None) is original:
+                    patched.append((module, original))
+            except Exception:
+                continue
+        for module, _ in patched:
+            module.getpass = replacement
+        return patched
+
+    def _invoke(self, argv):
+        """Run the click cli in-process and return an exit status"""
+        import click
+
+        try:
+            self.cli.main(args=argv, prog_name="sli", standalone_mode=False)
+            return 0
+        except click.exceptions.Exit as e:
+            return e.exit_code
+        except click.ClickException as e:
+            e.show()
+            return e.exit_code
+        except click.Abort:
+            print("Aborted!", file=sys.stderr)
+            return 1
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+            return 1
+
+
+def start_daemon(socket_file=SOCKET_FILE, log_file=LOG_FILE):
+    """
+    Start the daemon in the background, detached from the terminal, and wait for it to listen.
+    Returns True once the daemon accepts connections
+    """
+    pid = os.fork()
+    if pid == 0:
+        # Detach from the controlling terminal and fork again so the daemon is not a session leader
+        os.setsid()
+        if os.fork() > 0:
+            os._exit(0)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        log = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        os.dup2(devnull, 0)
+        os.dup2(log, 1)
+        os.dup2(log, 2)
+        try:
+            SLIDaemon(socket_file).serve()
+        finally:
+            os._exit(0)
+
+    os.waitpid(pid, 0)
+    deadline = time.time() + START_TIMEOUT
+    while time.time() < deadline:
+        connection = connect(socket_file)
+        if connection is not None:
+            connection.close()
+            return True
+        time.sleep(0.1)
+    return False
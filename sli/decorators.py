@@ -1,13 +1,38 @@
 from getpass import getpass
 from skilletlib.panoply import Panoply
+from sli.inventory import report_inventory_results, run_on_inventory
+from sli.panoplyPool import API_KEYS, PanoplyPool, get_key_id
 from sli.tools import get_var
-from sli.ssh import SSHSession
+from sli.ssh import DEFAULT_COMMAND_TIMEOUT, SSHSession
 from sli.errors import InvalidArgumentsException
 from lxml import etree
 from skilletlib.exceptions import TargetConnectionException
 from skilletlib.exceptions import SkilletLoaderException
 
 
+def allow_inventory(func):
+    """
+    Commands decorated with this run against every device of the inventory given with
+    --inventory instead of a single device. The command's run_device(pan, device) is called
+    for each device and its return value stored as the device output. A command may define
+    prepare_inventory() to validate arguments first, returning False to abort, which may load
+    the inventory itself into inventory_devices, and store_inventory_results(results) to add
+    results to the context
+    """
+
+    def wrap(command):
+        if not command.sli.options.get("inventory"):
+            return func(command)
+        if hasattr(command, "prepare_inventory") and not command.prepare_inventory():
+            return
+        results = run_on_inventory(command, command.run_device, getattr(command, "inventory_devices", None))
+        if hasattr(command, "store_inventory_results"):
+            command.store_inventory_results(results)
+        report_inventory_results(command, results)
+
+    return wrap
+
+
 def require_ngfw_connection_params(func):
     """
     Validate that SLI command has appropriate context paramaters
@@ -29,7 +54,10 @@ def require_panoply_connection(func):
 
     def wrap(command):
         pan = get_panoply_from_context(command)
-        return func(command, pan)
+        try:
+            return func(command, pan)
+        finally:
+            release_panoply(command, pan)
 
     return wrap
 
@@ -55,7 +83,10 @@ def require_config(func):
         else:
             ensure_ngfw_connection_params(command)
             pan = get_panoply_from_context(command)
-            contents = pan.get_configuration()
+            try:
+                contents = pan.get_configuration()
+            finally:
+                release_panoply(command, pan)
             command.sli.context["config"] = contents
             config = etree.fromstring(contents, parser).getroottree()
         return func(command, config)
@@ -65,24 +96,32 @@ def require_config(func):
 
 def require_ngfw_ssh_session(func):
     """
-    Decorator to require a connected SSH paramiko session be passed to
+    Decorator to require a connected SSH session be passed to
     the calling command. The SSH session will already have an invoked shell
     """
     # Note: -dp option and TARGET_PORT context parameters refer to https api only
 
     def wrap(command):
-        print(f"Connecting to {command.sli.context['TARGET_IP']}...")
-        ssh = SSHSession(
-            command.sli.context["TARGET_IP"],
-            username=command.sli.context["TARGET_USERNAME"],
-            password=command.sli.context["TARGET_PASSWORD"],
-        )
-        print("Connected.")
-        return func(command, ssh)
+        return func(command, get_ssh_session(command))
 
     return wrap
 
 
+def get_ssh_session(command):
+    """Return an SSH session with an invoked shell to the target device"""
+    print(f"Connecting to {command.sli.context['TARGET_IP']}...")
+    ssh = SSHSession(
+        command.sli.context["TARGET_IP"],
+        username=command.sli.context["TARGET_USERNAME"],
+        password=command.sli.context["TARGET_PASSWORD"],
+        port=command.sli.options.get("ssh_port", 22),
+        connect_timeout=command.sli.options.get("connect_timeout"),
+        command_timeout=command.sli.options.get("command_timeout") or DEFAULT_COMMAND_TIMEOUT,
+    )
+    print("Connected.")
+    return ssh
+
+
 def load_variables(func):
     """Load variables from skillet and get user input if not supplied"""
 
@@ -172,7 +211,9 @@ def ensure_ngfw_connection_params(command):
 def get_panoply_from_context(command):
     """
     Support function for decorators to retrieve a connected panoply
-    session instantiated from the context
+    session instantiated from the context. Sessions are checked out of
+    PanoplyPool, authenticating with an API key cached in the context when
+    available, and must be returned with release_panoply
     """
 
     # check for offline mode
@@ -183,7 +224,15 @@ def get_panoply_from_context(command):
 
     context = command.sli.context
     api_port = int(context["TARGET_PORT"]) if "TARGET_PORT" in context else 443
-    pan = Panoply(context["TARGET_IP"], context["TARGET_USERNAME"], context["TARGET_PASSWORD"], api_port=api_port)
+    key_id = get_key_id(context["TARGET_IP"], api_port, context["TARGET_USERNAME"])
+    pan = PanoplyPool.checkout(
+        context["TARGET_IP"],
+        api_port,
+        context["TARGET_USERNAME"],
+        context["TARGET_PASSWORD"],
+        api_key=context.get(API_KEYS, {}).get(key_id),
+    )
+    pan.key_id = key_id
 
     wait = command.sli.options.get("wait")
     if wait:
@@ -195,3 +244,15 @@ def get_panoply_from_context(command):
     if not pan.connected:
         raise TargetConnectionException("Unable to connect to device")
     return pan
+
+
+def release_panoply(command, pan):
+    """
+    Store the API key of a session in the context, it is saved with the context and
+    encrypted when context encryption is enabled, then return the session to the pool
+    """
+    key_id = getattr(pan, "key_id", None)
+    api_key = pan.xapi.api_key if pan.xapi is not None else None
+    if key_id is not None and api_key:
+        command.sli.context.setdefault(API_KEYS, {})[key_id] = api_key
+    PanoplyPool.release(pan)
@@ -16,3 +16,8 @@ class SLILoaderError(SLIException):
     normal exception handling to ensure it is always raised
     """
     pass
+
+
+class SSHCommandTimeout(SLIException):
+    """Raised when an SSH command does not return to a prompt in time"""
+    pass
@@ -0,0 +1,151 @@
+"""
+Device inventories shared by commands that run against many devices. An inventory is either
+a comma separated list of devices or a YAML file of devices with optional credentials:
+
+    creds:
+        username: global_user
+        password: global_password
+
+    devices:
+        - device: device_one
+
+        - device: device_two
+          username: device_two_user
+          password: device_two_password
+          port: 4443
+          ssh_port: 2222
+
+The optional port is the XML API port used by commands running over the API, and ssh_port
+the port used by commands running over SSH.
+
+An inventory of panorama: selects the firewalls connected to the Panorama given with -d, and
+panorama:filter.json those matching the terms of a filter file, see sli/panoramaDevices.py.
+The device list of the Panorama is cached, so fan-outs run one after another list it once.
+"""
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from getpass import getpass
+
+import yaml
+from skilletlib.exceptions import PanoplyException
+from skilletlib.exceptions import TargetConnectionException
+
+from sli.panoplyPool import API_KEYS, PanoplyPool, get_key_id
+from sli.tools import print_table
+
+DEFAULT_CONCURRENCY = 10
+
+# Inventory source prefix selecting firewalls connected to a Panorama
+PANORAMA_PREFIX = "panorama:"
+
+
+def get_default_credentials(sli):
+    """Check options and context for credentials, then prompt user if required"""
+    username = sli.options.get("username", sli.context.get("TARGET_USERNAME", ""))
+    password = sli.options.get("password", sli.context.get("TARGET_PASSWORD", ""))
+    while not len(username):
+        username = input("Default username: ")
+    while not len(password):
+        password = getpass("Default password: ")
+    return username, password
+
+
+def is_inventory_file(source):
+    return re.match(r".*\.y.*ml$", source) is not None
+
+
+def load_inventory(source, sli):
+    """
+    Load devices from a YAML inventory file or a comma separated list of devices, returns a list
+    of device dicts each with at least device, username and password populated
+    """
+    if source.startswith(PANORAMA_PREFIX):
+        from sli.panoramaDevices import load_panorama_devices
+
+        return load_panorama_devices(sli, source[len(PANORAMA_PREFIX):])
+
+    if not is_inventory_file(source):
+        username, password = get_default_credentials(sli)
+        return [{"device": x, "username": username, "password": password} for x in source.split(",")]
+
+    with open(source, "r") as f:
+        inventory = yaml.safe_load(f)
+    devices = inventory["devices"]
+
+    # Get default credentials only if some device does not specify its own
+    if len([x for x in devices if "username" not in x or "password" not in x]):
+        username = inventory.get("creds", {}).get("username")
+        password = inventory.get("creds", {}).get("password")
+        if not username or not password:
+            username, password = get_default_credentials(sli)
+        for device in devices:
+            device.setdefault("username", username)
+            device.setdefault("password", password)
+
+    return devices
+
+
+def run_on_inventory(command, run_device, devices=None):
+    """
+    Run run_device(pan, device) for every device in the inventory given with --inventory, or the
+    devices already loaded from it, over the XML API with at most --concurrency devices at a time.
+    Sessions authenticate with API keys cached in the context. Returns a result dict per device
+    with device, status, error, output and time
+    """
+    if devices is None:
+        devices = load_inventory(command.sli.options["inventory"], command.sli)
+    concurrency = command.sli.options.get("concurrency") or DEFAULT_CONCURRENCY
+    api_keys = command.sli.context.setdefault(API_KEYS, {})
+
+    def run(device):
+        start = time.time()
+        result = {"device": device["device"], "status": False, "error": "", "output": None}
+        port = int(device.get("port", 443))
+        key_id = get_key_id(device["device"], port, device["username"])
+        pan = None
+        try:
+            pan = PanoplyPool.checkout(
+                device["device"], port, device["username"], device["password"], api_key=api_keys.get(key_id)
+            )
+            if not pan.connected:
+                raise TargetConnectionException("Unable to connect to device")
+            result["output"] = run_device(pan, device)
+            result["status"] = True
+        except (Exception, PanoplyException) as e:
+            result["error"] = str(e)
+        finally:
+            if pan is not None:
+                if pan.xapi is not None and pan.xapi.api_key:
+                    api_keys[key_id] = pan.xapi.api_key
+                PanoplyPool.release(pan)
+        result["time"] = "{0:.2f}s".format(time.time() - start)
+        return result
+
+    print(f"Running {command.sli_command} on {len(devices)} devices, {concurrency} at a time")
+    with ThreadPoolExecutor(max_workers=max(min(concurrency, len(devices)), 1)) as executor:
+        return list(executor.map(run, devices))
+
+
+def report_inventory_results(command, results):
+    """
+    Output combined JSON results of all devices, to the file given with -o if specified, and print
+    a table of device results
+    """
+    combined = {
+        x["device"]: {"status": "success" if x["status"] else "error", "error": x["error"], "output": x["output"]}
+        for x in results
+    }
+    out_file = command.sli.options.get("out_file")
+    if out_file:
+        with open(out_file, "w") as f:
+            f.write(json.dumps(combined, indent=4))
+        print(f"Results written to {out_file}")
+    else:
+        print(json.dumps(combined, indent=4))
+
+    table = [{"device": x["device"], "status": "SUCCESS" if x["status"] else x["error"], "time": x["time"]}
+             for x in results]
+    print_table(table, {"Device": "device", "Status": "status", "Time": "time"})
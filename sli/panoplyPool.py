@@ -0,0 +1,182 @@
+"""
+Pooled Panoply sessions for SLI commands. A session authenticates with a cached API key when
+one is known, skipping the keygen request, and only fetches device facts once they are used.
+Long running processes such as the SLI daemon and the programmatic API keep idle sessions in
+PanoplyPool between commands so later commands against the same device reuse them.
+"""
+
+import functools
+import threading
+
+import requests
+from pan import xapi
+from skilletlib.exceptions import LoginException, PanoplyException
+from skilletlib.panoply import Panoply
+
+# Context key holding API keys of devices connected to, keyed by get_key_id
+API_KEYS = "TARGET_API_KEYS"
+
+
+def get_key_id(hostname, port, username):
+    """Return the identifier an API key is stored under in the context"""
+    return f"{username}@{hostname}:{port}"
+
+
+def refresh_rejected_key(method):
+    """
+    Wrap a public PanXapi request method to generate a new API key and retry the request once
+    when it fails because the device rejected the current key
+    """
+
+    @functools.wraps(method)
+    def wrap(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except xapi.PanXapiError:
+            if self.api_username is None or self.api_password is None or not self.key_rejected():
+                raise
+        self.keygen()
+        return method(self, *args, **kwargs)
+
+    return wrap
+
+
+class KeyRefreshXapi(xapi.PanXapi):
+    """
+    PanXapi generating a new API key and retrying the request once when the device rejects
+    the current key, allowing cached keys to be used without validating them first
+    """
+
+    ad_hoc = refresh_rejected_key(xapi.PanXapi.ad_hoc)
+    show = refresh_rejected_key(xapi.PanXapi.show)
+    get = refresh_rejected_key(xapi.PanXapi.get)
+    delete = refresh_rejected_key(xapi.PanXapi.delete)
+    set = refresh_rejected_key(xapi.PanXapi.set)
+    edit = refresh_rejected_key(xapi.PanXapi.edit)
+    move = refresh_rejected_key(xapi.PanXapi.move)
+    rename = refresh_rejected_key(xapi.PanXapi.rename)
+    clone = refresh_rejected_key(xapi.PanXapi.clone)
+    override = refresh_rejected_key(xapi.PanXapi.override)
+    multi_config = refresh_rejected_key(xapi.PanXapi.multi_config)
+    user_id = refresh_rejected_key(xapi.PanXapi.user_id)
+    commit = refresh_rejected_key(xapi.PanXapi.commit)
+    op = refresh_rejected_key(xapi.PanXapi.op)
+    export = refresh_rejected_key(xapi.PanXapi.export)
+    import_file = refresh_rejected_key(xapi.PanXapi.import_file)
+    log = refresh_rejected_key(xapi.PanXapi.log)
+    report = refresh_rejected_key(xapi.PanXapi.report)
+
+    def key_rejected(self):
+        """Check whether the last request failed with an HTTP 403 or an XML error response with code 403"""
+        return self.status_code == "403" or "code: 403" in (self.status_detail or "")
+
+
+class PooledPanoply(Panoply):
+    """
+    Panoply session using KeyRefreshXapi. When created with an api_key, connecting does not
+    contact the device, the key is validated by the first request made with it
+    """
+
+    def __init__(self, hostname, api_username, api_password, api_port=443, api_key=None):
+        self._facts = None
+        self._http = None
+        super().__init__(hostname, api_username, api_password, api_port=api_port, api_key=api_key)
+
+    @property
+    def facts(self):
+        """Device facts, fetched on first use"""
+        if self._facts is None and self.connected:
+            self._facts = self.get_facts()
+        return self._facts if self._facts is not None else {}
+
+    @facts.setter
+    def facts(self, value):
+        self._facts = value if value else None
+
+    @property
+    def http(self):
+        """
+        requests session for API requests pan-python does not support, such as streamed uploads.
+        Its connections are kept alive for as long as this session stays in the pool
+        """
+        if self._http is None:
+            self._http = requests.Session()
+        return self._http
+
+    def connect(self, allow_offline=False):
+        """Connect as Panoply.connect does, without fetching facts and without a keygen when a key is cached"""
+        self.xapi = KeyRefreshXapi(
+            api_username=self.user,
+            api_password=self.pw,
+            hostname=self.hostname,
+            port=self.port,
+            serial=self.serial_number,
+            api_key=self.key,
+        )
+        if self.key is not None:
+            self.connected = True
+            self.connected_message = "connected with cached api key"
+            return
+
+        try:
+            self.key = self.xapi.keygen()
+        except xapi.PanXapiError as pxe:
+            if "403" in str(pxe):
+                raise LoginException("Invalid credentials logging into device")
+            if not allow_offline:
+                raise PanoplyException("Could not connect to device!")
+            self.connected = False
+            self.connected_message = "device is not currently available"
+            return
+        self.connected = True
+
+    def clone(self):
+        """
+        Return a new session for the same device using this session's API key, without contacting
+        the device. Sessions are not thread safe, concurrent requests each need their own session
+        """
+        pan = PooledPanoply(self.hostname, self.user, self.pw, api_port=self.port, api_key=self.xapi.api_key)
+        pan._facts = self._facts
+        return pan
+
+
+class PanoplyPool:
+
+    # Idle sessions keyed by (hostname, port, username), disabled unless set to a dict
+    sessions = None
+    lock = threading.Lock()
+
+    @classmethod
+    def checkout(cls, hostname, port, username, password, api_key=None):
+        """Return an idle pooled session for the device and user, or a new session"""
+        pool_key = (hostname, port, username)
+        if cls.sessions is not None:
+            with cls.lock:
+                idle = cls.sessions.get(pool_key)
+                pan = idle.pop() if idle else None
+            if pan is not None:
+                # Keep the password current in case the cached key has to be regenerated
+                pan.pw = password
+                pan.xapi.api_password = password
+                return pan
+
+        pan = PooledPanoply(hostname, username, password, api_port=port, api_key=api_key)
+        pan.pool_key = pool_key
+        return pan
+
+    @classmethod
+    def release(cls, pan):
+        """Return a session obtained from checkout to the idle sessions"""
+        pool_key = getattr(pan, "pool_key", None)
+        if cls.sessions is None or pool_key is None or not pan.connected:
+            return
+        with cls.lock:
+            cls.sessions.setdefault(pool_key, []).append(pan)
+
+    @classmethod
+    def idle_count(cls):
+        """Return the number of idle sessions in the pool"""
+        if cls.sessions is None:
+            return 0
+        with cls.lock:
+            return sum(len(x) for x in cls.sessions.values())
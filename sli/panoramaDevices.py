@@ -0,0 +1,242 @@
+"""
+Snapshots of the firewalls connected to a Panorama, cached under ~/.sli/panorama so commands
+run against Panorama managed firewalls do not wait on `show devices connected` every run. A
+snapshot is used for --cache-ttl seconds after it was fetched, 900 by default, and fetched again
+with --rebuild-cache. While a snapshot is fresh the Panorama is not connected to at all.
+
+Each device of a snapshot is a dict of its facts, the text elements of its entry in
+`show devices connected`, nested facts named by their path such as ha/state. Snapshots are
+filtered with a dict of terms, all of which a device must match:
+
+    {
+        "hostname": "^dc1-",                        regex matched at the start of the fact
+        "model": ["PA-3220", "PA-3260"],            one of the values
+        "serial": {"prefix": "0123"},
+        "sw-version": {"min": "10.1", "max": "10.2.3"},
+        "ha/state": {"equals": "active"}
+    }
+
+Version ranges compare numbers in order, a bound matching all versions it is a prefix of, so a
+max of 10.1 includes 10.1.9-h3. Facts are indexed on first use by their sorted distinct values,
+so equality, prefix and range terms are looked up rather than compared against every device.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from lxml import etree
+
+from sli.errors import SLIException
+from sli.inventory import get_default_credentials
+from sli.panoplyPool import API_KEYS, PanoplyPool, get_key_id
+from sli.tools import expandedHomePath
+
+CACHE_VERSION = 1
+
+# Seconds a cached snapshot is used unless --cache-ttl is given
+DEFAULT_TTL = 900
+
+OPERATORS = {"equals", "prefix", "regex", "in", "min", "max"}
+
+
+def version_key(version):
+    return tuple(int(x) for x in re.findall(r"\d+", version))
+
+
+def parse_devices(output):
+    """Return the facts of each device in the XML output of `show devices connected`"""
+    root = etree.fromstring(output.encode() if isinstance(output, str) else output)
+    devices = []
+    for entry in root.findall("entry" if root.tag == "devices" else ".//devices/entry"):
+        facts = {"name": entry.get("name", "")}
+        for element in entry.iterdescendants():
+            if not isinstance(element.tag, str) or len(element) or element.text is None:
+                continue
+            path = [element.tag]
+            parent = element.getparent()
+            while parent is not entry:
+                path.append(parent.tag)
+                parent = parent.getparent()
+            facts.setdefault("/".join(reversed(path)), element.text.strip())
+        devices.append(facts)
+    return devices
+
+
+class DeviceSnapshot:
+
+    def __init__(self, devices, fetched=None):
+        self.devices = devices
+        self.fetched = fetched if fetched is not None else time.time()
+        # Per fact, its sorted distinct values and the indexes of the devices holding each
+        self.indexes = {}
+
+    @property
+    def age(self):
+        return time.time() - self.fetched
+
+    def _index(self, fact):
+        if fact not in self.indexes:
+            positions = {}
+            for i, device in enumerate(self.devices):
+                if fact in device:
+                    positions.setdefault(device[fact], []).append(i)
+            self.indexes[fact] = (sorted(positions), positions)
+        return self.indexes[fact]
+
+    def _match(self, fact, term):
+        """Return the indexes of the devices whose fact matches a filter term"""
+        values, positions = self._index(fact)
+        if isinstance(term, str):
+            term = {"regex": term}
+        elif isinstance(term, list):
+            term = {"in": term}
+        elif not isinstance(term, dict) or not term or set(term) - OPERATORS:
+            raise SLIException(f"Invalid filter term for {fact}, operators are {', '.join(sorted(OPERATORS))}")
+
+        selected = values
+        if "equals" in term:
+            selected = [x for x in [str(term["equals"])] if x in positions]
+        if "in" in term:
+            wanted = {str(x) for x in term["in"]}
+            selected = [x for x in selected if x in wanted]
+        if "prefix" in term:
+            prefix = str(term["prefix"])
+            selected = selected[bisect_left(selected, prefix):bisect_left(selected, prefix + "\uffff")]
+        if "min" in term or "max" in term:
+            selected = sorted((x for x in selected if version_key(x)), key=version_key)
+            keys = [version_key(x) for x in selected]
+            start, end = 0, len(selected)
+            if "min" in term:
+                bound = version_key(str(term["min"]))
+                start = bisect_left([x[:len(bound)] for x in keys], bound)
+            if "max" in term:
+                bound = version_key(str(term["max"]))
+                end = bisect_right([x[:len(bound)] for x in keys], bound)
+            selected = selected[start:end]
+        if "regex" in term:
+            pattern = re.compile(term["regex"])
+            selected = [x for x in selected if pattern.match(x)]
+        return {i for x in selected for i in positions[x]}
+
+    def filter(self, terms=None):
+        """Return the devices matching all filter terms, in the order Panorama listed them"""
+        if not terms:
+            return list(self.devices)
+        matched = None
+        for fact, term in terms.items():
+            indexes = self._match(fact, term)
+            matched = indexes if matched is None else matched & indexes
+            if not matched:
+                return []
+        return [self.devices[i] for i in sorted(matched)]
+
+
+class PanoramaDeviceCache:
+
+    def __init__(self, ttl=DEFAULT_TTL, rebuild=False, cache_dir=None):
+        self.ttl = ttl
+        self.rebuild = rebuild
+        self.cache_dir = cache_dir if cache_dir else expandedHomePath(".sli/panorama")
+
+    def _snapshot_file(self, hostname, port):
+        key = hashlib.sha256(f"{hostname}:{port}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, hostname, port):
+        """Return the cached snapshot of a Panorama if fetched less than ttl seconds ago, None otherwise"""
+        if self.rebuild:
+            return None
+        try:
+            with open(self._snapshot_file(hostname, port), "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CACHE_VERSION or time.time() - data["fetched"] > self.ttl:
+            return None
+        return DeviceSnapshot(data["devices"], data["fetched"])
+
+    def fetch(self, pan):
+        """Fetch the devices connected to a Panorama and cache the snapshot"""
+        if pan.facts.get("model", "") != "Panorama":
+            raise SLIException(f"{pan.hostname} is not a Panorama, unable to list connected devices")
+        snapshot = DeviceSnapshot(parse_devices(pan.execute_cli("show devices connected")))
+        path = self._snapshot_file(pan.hostname, pan.port)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump({
+                    "version": CACHE_VERSION,
+                    "device": f"{pan.hostname}:{pan.port}",
+                    "fetched": snapshot.fetched,
+                    "devices": snapshot.devices,
+                }, f)
+            os.replace(temp_file, path)
+        except OSError as e:
+            print(f"Unable to write Panorama device cache {path} - {e}")
+        return snapshot
+
+
+def get_device_snapshot(sli, pan=None):
+    """
+    Return the snapshot of the devices connected to the Panorama given with -d, from the cache
+    when fresh, otherwise fetched with pan or a session checked out of PanoplyPool
+    """
+    context = sli.context
+    hostname = sli.options.get("device") or context.get("TARGET_IP")
+    if pan is not None:
+        hostname = pan.hostname
+    if not hostname:
+        raise SLIException("Listing Panorama devices requires the Panorama given with -d")
+    port = int(pan.port if pan is not None else sli.options.get("port") or context.get("TARGET_PORT") or 443)
+
+    cache = PanoramaDeviceCache(sli.options.get("cache_ttl", DEFAULT_TTL), sli.options.get("rebuild_cache", False))
+    snapshot = cache.load(hostname, port)
+    if snapshot is not None:
+        print(f"Using devices of {hostname} listed {int(snapshot.age)}s ago, refresh with --rebuild-cache")
+        return snapshot
+    if pan is not None:
+        return cache.fetch(pan)
+
+    username = sli.options.get("username") or context.get("TARGET_USERNAME")
+    password = sli.options.get("password") or context.get("TARGET_PASSWORD")
+    if not username or not password:
+        username, password = get_default_credentials(sli)
+    api_keys = context.setdefault(API_KEYS, {})
+    key_id = get_key_id(hostname, port, username)
+    pan = PanoplyPool.checkout(hostname, port, username, password, api_key=api_keys.get(key_id))
+    try:
+        if not pan.connected:
+            raise SLIException(f"Unable to connect to Panorama {hostname}")
+        return cache.fetch(pan)
+    finally:
+        if pan.xapi is not None and pan.xapi.api_key:
+            api_keys[key_id] = pan.xapi.api_key
+        PanoplyPool.release(pan)
+
+
+def load_filter(filter_file):
+    """Load the filter terms of a JSON filter file, no terms when not given"""
+    if not filter_file:
+        return {}
+    with open(filter_file, "r") as f:
+        return json.load(f)
+
+
+def load_panorama_devices(sli, filter_file=None, pan=None):
+    """
+    Return inventory devices of the firewalls connected to the Panorama given with -d that match
+    the terms of a filter file, using the default credentials. The facts of each device are kept
+    under facts
+    """
+    devices = get_device_snapshot(sli, pan).filter(load_filter(filter_file))
+    username, password = get_default_credentials(sli)
+    return [
+        {"device": x["ip-address"], "username": username, "password": password, "facts": x}
+        for x in devices if x.get("ip-address")
+    ]
@@ -1,4 +1,5 @@
 from math import floor
+import threading
 import time
 
 """
@@ -54,3 +55,81 @@ class ProgressBar:
         """Call this to pause a progress bar and get a new line"""
         time_string = self._get_time()
         print(f'\r{self.prefix} |{self.bar}| Paused {self.percent}% {time_string}')
+
+
+class MultiProgressBar(ProgressBar):
+    """
+    Progress bars of several concurrent tasks on consecutive lines, redrawn in place with ANSI
+    escape codes. Only tasks in progress are shown, above a bar of the tasks finished out of total.
+    Redraws are limited to one per interval seconds, as tasks may update far more often. The display
+    completes once every task is finished, tasks may be updated from several threads
+
+    Usage:
+        pb = MultiProgressBar(len(devices), prefix="Devices")
+        pb.update(percentage_complete, name=device)
+        pb.finish(device)
+    """
+
+    def __init__(self, total, length=50, prefix="Progress", clock=True, fill='█', interval=0.1):
+        self.length = length
+        self.prefix = prefix
+        self.clock = clock
+        self.fill = fill
+        self.interval = interval
+        self.start_time = time.time()
+        self.total = total
+        self.finished = 0
+        self.tasks = {}
+        self.lines = 0
+        self.drawn = 0
+        self.percent = 0
+        self.bar = None
+        self.lock = threading.Lock()
+
+    def _get_bar(self, percent):
+        filledLength = floor(self.length * (float(percent) / 100))
+        return self.fill * filledLength + '-' * (self.length - filledLength)
+
+    def _draw(self, force=False):
+        if not force and time.time() - self.drawn < self.interval:
+            return
+        self.drawn = time.time()
+        width = max([len(x) for x in self.tasks] + [len(self.prefix)])
+        lines = [f"{name:<{width}} |{self._get_bar(percent)}| {percent}%" for name, percent in self.tasks.items()]
+        self.percent = "{0:.1f}".format(100 * self.finished / max(self.total, 1))
+        self.bar = self._get_bar(self.percent)
+        lines.append(f"{self.prefix:<{width}} |{self.bar}| {self.finished}/{self.total} {self._get_time()}")
+
+        # Move to the first line drawn last time, then redraw and clear any lines left below
+        up = f"\x1b[{self.lines - 1}F" if self.lines > 1 else "\r"
+        print(up + "\n".join(f"{x}\x1b[K" for x in lines) + "\x1b[J", end="", flush=True)
+        self.lines = len(lines)
+
+    def update(self, percent, name=None):
+        """Report a new percentage for the task name"""
+        with self.lock:
+            self.tasks[name] = percent
+            self._draw()
+
+    def finish(self, name):
+        """Remove the task name from display and count it finished"""
+        with self.lock:
+            self.tasks.pop(name, None)
+            self.finished += 1
+            self._draw(force=True)
+            if self.finished >= self.total:
+                print('\n')
+
+    def complete(self):
+        """Display the final overall bar, for when tasks are abandoned before finishing"""
+        with self.lock:
+            self.tasks = {}
+            self._draw(force=True)
+            print('\n')
+
+    def pause(self):
+        """Call this to stop redrawing in place and get a new line"""
+        with self.lock:
+            self._draw(force=True)
+            print()
+            self.lines = 0
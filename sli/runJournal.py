@@ -0,0 +1,120 @@
+"""
+Append-only journal of a mass_ssh run, so an interrupted run can be resumed. Each line is a JSON
+record, written and flushed as the run progresses on a writer thread of the journal, so disk
+writes never block the event loop running the device sessions:
+
+    {"event": "run", "script": sha256 of the script, "time": ...}
+    {"event": "start", "run": ..., "device": ..., "time": ...}
+    {"event": "end", "run": ..., "device": ..., "status": "success" | "failed", "error": ...,
+     "output": ..., "attempts": ..., "started": ..., "finished": ...}
+
+Start and end records carry the time of the run record of the run they belong to. The output of
+an end record is the file output of the device was written to, null if none was.
+
+A device is completed once its latest end record has a success status. Devices that failed, or
+were started or never reached before the run was interrupted, are pending and run again on
+resume. A line cut short by an interruption is ignored when the journal is read.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sli.errors import SLIException
+
+# Journal file written to the -o directory
+JOURNAL_FILE = "mass_ssh_journal.jsonl"
+
+
+def get_journal_path(out_path, single_file=False):
+    """
+    Return the journal path of a run given out_path with -o, next to it when output is written to
+    it as a single file, otherwise inside it as a directory, which is created if missing
+    """
+    if single_file or os.path.isfile(out_path):
+        return f"{out_path}.journal.jsonl"
+    os.makedirs(out_path, exist_ok=True)
+    return os.path.join(out_path, JOURNAL_FILE)
+
+
+def script_digest(script):
+    return hashlib.sha256(script.encode()).hexdigest()
+
+
+class RunJournal:
+
+    def __init__(self, path, script, resume=False):
+        """
+        Open the journal of a run of script. A new journal replaces any existing one unless
+        resuming, in which case the records of the previous run are loaded and appended to
+        """
+        self.path = path
+        self.records = self.read(path) if resume else []
+        scripts = {x["script"] for x in self.records if x.get("event") == "run"}
+        if scripts and scripts != {script_digest(script)}:
+            raise SLIException(
+                f"The script differs from the one of the run journaled in {path}, run without --resume to start over"
+            )
+
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.run = time.time()
+        self.write({"event": "run", "script": script_digest(script), "time": self.run})
+
+    @staticmethod
+    def read(path):
+        """Return the records of a journal, an empty list if there is none"""
+        records = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def completed(self):
+        """Return the devices completed successfully according to the loaded records"""
+        status = {}
+        for record in self.records:
+            if record.get("event") == "end":
+                status[record["device"]] = record["status"]
+        return {device for device, x in status.items() if x == "success"}
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    async def write_in_writer(self, record):
+        """Write a record on the writer thread, keeping records in order"""
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.write, record)
+
+    async def start(self, device):
+        """Record a device being started, returning the start time"""
+        started = time.time()
+        await self.write_in_writer({"event": "start", "run": self.run, "device": device, "time": started})
+        return started
+
+    async def end(self, device, success, error, output, attempts, started):
+        """Record the outcome of a device"""
+        await self.write_in_writer({
+            "event": "end",
+            "run": self.run,
+            "device": device,
+            "status": "success" if success else "failed",
+            "error": str(error),
+            "output": output,
+            "attempts": attempts,
+            "started": started,
+            "finished": time.time(),
+        })
+
+    def close(self):
+        self.executor.shutdown()
+        self.file.close()
@@ -0,0 +1,339 @@
+"""
+Conversion of PAN-OS firewall set and delete commands to xpaths and XML elements for the XML API.
+The cli grammar is not available, so a command is read as a path of keywords where the token
+following a keyword holding named entries is an entry name, and the final token of a set command
+is its value unless it is an entry name. Values in [ ] and values of keywords holding member lists
+are member lists. Keywords are known to hold entries from ENTRY_PATHS and member lists from
+MEMBER_PATHS, and both are learned from a device configuration given to learn.
+
+Commands are placed under vsys1 unless they start with a device or configuration level keyword,
+as the cli of a firewall does. When a configuration is given, the elements of each batch of
+commands are merged into a copy of it as a config set request would and checked before they
+are sent, the device still rejects elements that do not fit its schema.
+"""
+
+import re
+import shlex
+from copy import deepcopy
+
+from lxml import etree
+
+CONFIG_XPATH = "/config"
+DEVICE_STEPS = [("devices", "localhost.localdomain")]
+VSYS_STEPS = DEVICE_STEPS + [("vsys", "vsys1")]
+
+# First keywords of commands outside of vsys1
+CONFIG_KEYWORDS = {"mgt-config", "shared", "devices", "readonly"}
+DEVICE_KEYWORDS = {"deviceconfig", "network", "vsys", "platform"}
+
+# Objects held by a vsys or shared
+OBJECTS = [
+    "address", "address-group", "service", "service-group", "application-group", "application-filter",
+    "tag", "zone", "schedule", "region", "external-list", "profile-group", "application", "dynamic-user-group",
+]
+
+# Security profiles held by a vsys or shared, and referenced by profile groups and rules
+PROFILES = [
+    "virus", "spyware", "vulnerability", "url-filtering", "file-blocking", "wildfire-analysis", "data-filtering",
+]
+
+# Keyword paths holding named entries, matched against the end of a command's keyword path
+ENTRY_PATHS = {f"vsys/{x}" for x in OBJECTS} | {f"shared/{x}" for x in OBJECTS} | {
+    f"profiles/{x}" for x in PROFILES + ["custom-url-category", "decryption", "dos-protection", "hip-objects",
+                                         "hip-profiles"]
+} | {
+    f"server-profile/{x}" for x in ["syslog", "email", "snmptrap", "http", "ldap", "radius", "tacplus", "kerberos"]
+} | {
+    "vsys", "devices", "rules", "mgt-config/users", "interface/ethernet", "interface/aggregate-ethernet",
+    "interface/loopback", "interface/tunnel", "interface/vlan", "units", "layer3/ip", "network/virtual-router",
+    "network/virtual-wire", "network/vlan", "static-route", "ike/gateway", "tunnel/ipsec", "ipsec-tunnel",
+    "ike-crypto-profiles", "ipsec-crypto-profiles", "interface-management-profile", "zone-protection-profile",
+    "monitor-profile", "bfd-profile", "lldp-profile", "qos/profile", "qos/interface", "dhcp/interface",
+    "bgp/peer-group", "peer-group/peer", "ospf/area", "area/interface", "redist-profile", "certificate",
+    "certificate-profile", "ssl-tls-service-profile", "authentication-profile", "authentication-sequence",
+    "log-settings/profiles", "match-list", "syslog", "local-user-database/user", "local-user-database/user-group",
+} | {f"{x}/server" for x in ["syslog", "email", "http", "ldap", "radius", "tacplus", "kerberos"]}
+
+# Keyword paths holding member lists, matched like ENTRY_PATHS, the longest match of both wins
+MEMBER_PATHS = {f"rules/{x}" for x in [
+    "from", "to", "source", "destination", "source-user", "category", "application", "service", "source-hip",
+    "destination-hip", "hip-profiles", "tag", "source-imei", "source-imsi", "source-nw-slice",
+]} | {f"{x}/tag" for x in OBJECTS + ["service-group"]} | {
+    f"profile-group/{x}" for x in PROFILES
+} | {
+    f"profile-setting/profiles/{x}" for x in PROFILES
+} | {
+    f"url-filtering/{x}" for x in ["alert", "allow", "block", "continue", "override"]
+} | {
+    "profile-setting/group", "address-group/static", "service-group/members", "application-group/members",
+    "zone/network/layer3", "zone/network/layer2", "zone/network/virtual-wire", "zone/network/tap",
+    "zone/network/tunnel", "import/network/interface", "virtual-router/interface", "custom-url-category/list",
+    "dynamic-ip-and-port/translated-address",
+}
+
+TAG_RE = re.compile(r"^[A-Za-z_][\w\-.]*$")
+
+
+def merge_element(target, source):
+    """
+    Merge the children of source into target as a config set request does. Text replaces the text
+    of target, members are added to those of target and other children are merged into the child
+    of target with the same tag and name, or appended if there is none
+    """
+    if source.text and source.text.strip():
+        target.text = source.text
+    existing = {(x.tag, x.get("name")): x for x in target if x.tag != "member"}
+    members = {x.text for x in target if x.tag == "member"}
+    for child in list(source):
+        if child.tag == "member":
+            if child.text not in members:
+                members.add(child.text)
+                target.append(child)
+            continue
+        key = (child.tag, child.get("name"))
+        if key not in existing:
+            existing[key] = child
+            target.append(child)
+        else:
+            merge_element(existing[key], child)
+
+
+class ParsedCommand:
+    """A set or delete command as path steps of (tag, entry name or None) and a value"""
+
+    def __init__(self, command, action, steps, value):
+        self.command = command
+        self.action = action
+        self.steps = steps
+        self.value = value  # None, a string or a list of members
+
+    @property
+    def xpath(self):
+        return steps_to_xpath(self.steps)
+
+
+def quote(value):
+    return f'"{value}"' if "'" in value else f"'{value}'"
+
+
+def steps_to_xpath(steps):
+    """Return the xpath of a list of path steps"""
+    xpath = CONFIG_XPATH
+    for tag, name in steps:
+        xpath += f"/{tag}" if name is None else f"/{tag}/entry[@name={quote(name)}]"
+    return xpath
+
+
+class SetConverter:
+
+    def __init__(self, config=None):
+        self.entry_paths = set(ENTRY_PATHS)
+        self.member_paths = set(MEMBER_PATHS)
+        self.config = None  # Configuration learned, with the elements of accepted requests merged in
+        self.pending = None  # Configuration merged by prepare, kept once the request is accepted
+        if config is not None:
+            self.learn(config)
+
+    def learn(self, config):
+        """
+        Learn keyword paths holding named entries and member lists from a configuration XML string,
+        requests are prepared against the configuration from then on
+        """
+        root = etree.fromstring(config.encode() if isinstance(config, str) else config)
+        for tag, paths in (("entry", self.entry_paths), ("member", self.member_paths)):
+            for element in root.iter(tag):
+                # Only the first of each list is looked at, the path is the same for the rest
+                previous = element.getprevious()
+                if previous is not None and previous.tag == tag:
+                    continue
+                tags = [x.tag for x in element.iterancestors() if x.tag != "entry"][::-1][1:]
+                if tags:
+                    paths.add("/".join(tags))
+        self.config = root
+
+    @staticmethod
+    def _match(tags, paths):
+        """Return the length of the longest end of a keyword path found in paths, 0 if there is none"""
+        for i in range(len(tags)):
+            if "/".join(tags[i:]) in paths:
+                return len(tags) - i
+        return 0
+
+    def _holds_entries(self, tags):
+        return self._match(tags, self.entry_paths) > self._match(tags, self.member_paths)
+
+    def _holds_members(self, tags):
+        return self._match(tags, self.member_paths) > self._match(tags, self.entry_paths)
+
+    def parse(self, command):
+        """Return a ParsedCommand, raises ValueError if the command can not be converted"""
+        tokens = shlex.split(command) if '"' in command or "'" in command else command.split()
+        if len(tokens) < 2 or tokens[0] not in ("set", "delete"):
+            raise ValueError(f"Not a set or delete command: {command}")
+        action, tokens = tokens[0], tokens[1:]
+
+        value = None
+        if "[" in tokens:
+            start = tokens.index("[")
+            if tokens[-1] != "]" or action != "set":
+                raise ValueError(f"Unsupported member list: {command}")
+            value = tokens[start + 1:-1]
+            tokens = tokens[:start]
+
+        if tokens[0] in CONFIG_KEYWORDS:
+            steps = []
+        elif tokens[0] in DEVICE_KEYWORDS:
+            steps = list(DEVICE_STEPS)
+        else:
+            steps = list(VSYS_STEPS)
+        tags = [x[0] for x in steps]
+
+        i = 0
+        while i < len(tokens):
+            tag = tokens[i]
+            if not TAG_RE.match(tag):
+                raise ValueError(f"Unable to convert {tag} in: {command}")
+            tags.append(tag)
+            if self._holds_entries(tags) and i + 1 < len(tokens):
+                steps.append((tag, tokens[i + 1]))
+                i += 2
+            elif action == "set" and value is None and i == len(tokens) - 2:
+                steps.append((tag, None))
+                value = [tokens[-1]] if self._holds_members(tags) else tokens[-1]
+                break
+            elif action == "delete" and i + 1 < len(tokens) and self._holds_members(tags):
+                # Members are not addressed by a path step
+                raise ValueError(f"Unsupported member delete: {command}")
+            else:
+                steps.append((tag, None))
+                i += 1
+
+        # devices and vsys steps above are only anchors, commands must reach below them
+        if len(steps) <= len(VSYS_STEPS) and steps == VSYS_STEPS[:len(steps)] and value is None:
+            raise ValueError(f"Unable to convert: {command}")
+        return ParsedCommand(command, action, steps, value)
+
+    @staticmethod
+    def common_steps(parsed):
+        """Return the path steps shared by parsed commands, leaving at least one step of each"""
+        common = parsed[0].steps[:-1]
+        for command in parsed[1:]:
+            i = 0
+            while i < len(common) and i < len(command.steps) - 1 and common[i] == command.steps[i]:
+                i += 1
+            common = common[:i]
+        return common
+
+    @staticmethod
+    def build(parsed, common):
+        """
+        Return the elements setting parsed commands, relative to the path steps common, serialized
+        as one string for a config set request
+        """
+        root = etree.Element("root")
+        elements = {(): root}
+        for command in parsed:
+            steps = tuple(command.steps[len(common):])
+            for i in range(1, len(steps) + 1):
+                if steps[:i] in elements:
+                    continue
+                tag, name = steps[i - 1]
+                parent = elements[steps[:i - 1]]
+                # Entries of a keyword share its element
+                element = elements.get((steps[:i - 1], tag))
+                if element is None:
+                    element = etree.SubElement(parent, tag)
+                    elements[(steps[:i - 1], tag)] = element
+                if name is not None:
+                    element = etree.SubElement(element, "entry", name=name)
+                elements[steps[:i]] = element
+
+            element = elements[steps]
+            if isinstance(command.value, list):
+                members = [x.text for x in element.findall("member")]
+                for member in command.value:
+                    if member not in members:
+                        etree.SubElement(element, "member").text = member
+            elif command.value is not None:
+                element.text = command.value
+        return "".join(etree.tostring(x).decode() for x in root)
+
+    def prepare(self, parsed):
+        """
+        Return the xpath and element of a config set request applying parsed set commands. Without
+        a configuration the request is anchored at their common path steps. Otherwise it is anchored
+        at the deepest of those present in the configuration, the element is merged into a copy of it
+        with merge_element and ValueError raised for the first command that does not end up as the
+        single element holding its value. The copy replaces the configuration on accept
+        """
+        common = self.common_steps(parsed)
+        self.pending = None
+        if self.config is None:
+            return steps_to_xpath(common), self.build(parsed, common)
+
+        while common and not len(self.config.xpath(steps_to_xpath(common))):
+            common = common[:-1]
+        xpath = steps_to_xpath(common)
+        element = self.build(parsed, common)
+        merged = deepcopy(self.config)
+        merge_element(merged.xpath(xpath)[0], etree.fromstring(f"<root>{element}</root>"))
+        entries = {}
+        for command in parsed:
+            self.check(merged, command, entries)
+        self.pending = merged
+        return xpath, element
+
+    def accept(self):
+        """Keep the configuration merged by prepare once its request was applied"""
+        if self.pending is not None:
+            self.config = self.pending
+            self.pending = None
+
+    def remove(self, parsed):
+        """Remove the element of a parsed delete command applied to the device from the configuration"""
+        if self.config is not None:
+            for element in self.config.xpath(parsed.xpath):
+                element.getparent().remove(element)
+
+    @staticmethod
+    def find(config, steps, entries):
+        """
+        Return the elements of config at path steps, as an xpath would without searching every entry
+        of a keyword for each name. entries caches the entries of keyword elements by name
+        """
+        found = [config]
+        for tag, name in steps:
+            found = [x for element in found for x in element if x.tag == tag]
+            if name is not None:
+                for element in found:
+                    if element not in entries:
+                        entries[element] = {}
+                        for x in element:
+                            if x.tag == "entry":
+                                entries[element].setdefault(x.get("name"), []).append(x)
+                found = [x for element in found for x in entries[element].get(name, [])]
+        return found
+
+    @classmethod
+    def check(cls, config, command, entries=None):
+        """
+        Raise ValueError unless a parsed set command resolves to a single element of config holding
+        its value, a member list or text, along a path where entries are not mixed with other nodes
+        """
+        found = cls.find(config, command.steps, {} if entries is None else entries)
+        if len(found) != 1:
+            raise ValueError(f"{command.command} resolves to {len(found)} elements of the configuration")
+        element = found[0]
+        if isinstance(command.value, list):
+            if any(x.tag != "member" for x in element) or (element.text or "").strip():
+                raise ValueError(f"{command.command} sets members of {element.tag}, which holds other nodes")
+        elif command.value is not None and len(element):
+            raise ValueError(f"{command.command} sets the value of {element.tag}, which holds other nodes")
+
+        # Elements are merged in after their siblings, so a neighbour tells if entries are mixed in
+        node = element
+        while node.getparent() is not None:
+            for sibling in (node.getprevious(), node.getnext()):
+                if sibling is not None and (sibling.tag == "entry") != (node.tag == "entry"):
+                    raise ValueError(f"{command.command} mixes entries of {node.getparent().tag} with other nodes")
+            node = node.getparent()
@@ -0,0 +1,203 @@
+"""
+Output sinks receiving the output of device sessions as it arrives, so output of many devices
+is never held in memory at once. Each device writes through a DeviceStream buffering at most
+buffer_size characters before passing them to the sink.
+
+Sinks writing files open, write, compress and close them on a writer thread of their own, so
+disk and gzip work never blocks the event loop running the device sessions. A single thread
+per sink keeps writes in order, including writes of all devices to one jsonl file.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_BUFFER_SIZE = 65536
+MAX_PARTIAL_LINE = 65536
+
+
+def open_text(path, compress=False, append=False):
+    """Open a text file for writing, gzip compressed if requested"""
+    if compress:
+        return gzip.open(path, "at" if append else "wt", encoding="utf-8")
+    return open(path, "a" if append else "w", encoding="utf-8")
+
+
+class OutputSink(ABC):
+    """
+    Base class of output sinks. Calls for a single device are made in order, open before
+    any write and close once the device session ends
+    """
+
+    async def open(self, device):
+        pass
+
+    @abstractmethod
+    async def write(self, device, data):
+        pass
+
+    async def close(self, device):
+        pass
+
+    def finish(self):
+        """Called once all devices are done"""
+        pass
+
+    def get_path(self, device):
+        """Return the path output of a device is written to, None if not written to a file"""
+        return None
+
+
+class WriterThreadSink(OutputSink):
+    """Base class of sinks running blocking file operations on a writer thread"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def run_in_writer(self, function, *args):
+        """Run function(*args) on the writer thread and return its result"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def finish(self):
+        self.executor.shutdown()
+
+
+class FileSink(WriterThreadSink):
+    """Write output of each device to its own file in a directory, optionally gzip compressed"""
+
+    def __init__(self, directory, compress=False):
+        super().__init__()
+        self.directory = directory
+        self.compress = compress
+        self.files = {}
+
+    def get_path(self, device):
+        return os.path.join(self.directory, f"{device}.txt.gz" if self.compress else f"{device}.txt")
+
+    async def open(self, device):
+        self.files[device] = await self.run_in_writer(open_text, self.get_path(device), self.compress)
+
+    async def write(self, device, data):
+        await self.run_in_writer(self.files[device].write, data)
+
+    async def close(self, device):
+        f = self.files.pop(device, None)
+        if f is not None:
+            await self.run_in_writer(f.close)
+
+
+class PrefixSink(OutputSink):
+    """Print output lines to stdout as they complete, each prefixed with the device name"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.partial = {}
+
+    def _print(self, device, line):
+        print(f"{device}: {line}", file=self.stream if self.stream is not None else sys.stdout)
+
+    async def write(self, device, data):
+        lines = (self.partial.get(device, "") + data).split("\n")
+        partial = lines.pop()
+        for line in lines:
+            self._print(device, line)
+        # Print overly long lines in pieces rather than holding them
+        if len(partial) > MAX_PARTIAL_LINE:
+            self._print(device, partial)
+            partial = ""
+        self.partial[device] = partial
+
+    async def close(self, device):
+        partial = self.partial.pop(device, "")
+        if partial.strip():
+            self._print(device, partial)
+
+
+class JSONLSink(WriterThreadSink):
+    """
+    Write output of all devices to one file as JSON lines of {"device": ..., "output": ...},
+    one record per chunk written. Compressed with gzip if requested or the path ends in .gz,
+    appended to the file rather than replacing it if requested. Records are tagged with run
+    when given, telling apart the output of the runs appended to one file
+    """
+
+    def __init__(self, path, compress=False, append=False, run=None):
+        super().__init__()
+        self.path = path
+        self.compress = compress or path.endswith(".gz")
+        self.append = append
+        self.run = run
+        self.file = None
+
+    def get_path(self, device):
+        return self.path
+
+    def _open(self):
+        if self.file is None:
+            self.file = open_text(self.path, self.compress, self.append)
+
+    async def open(self, device):
+        await self.run_in_writer(self._open)
+
+    async def write(self, device, data):
+        record = {"device": device, "output": data} if self.run is None else {"run": self.run, "device": device, "output": data}
+        await self.run_in_writer(self.file.write, json.dumps(record) + "\n")
+
+    def finish(self):
+        super().finish()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class CallbackSink(OutputSink):
+    """Pass output chunks to callback(device, data), awaited if it is a coroutine function"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    async def write(self, device, data):
+        result = self.callback(device, data)
+        if asyncio.iscoroutine(result):
+            await result
+
+
+class DeviceStream:
+    """Buffer output of one device, writing it to the sink once buffer_size characters are held"""
+
+    def __init__(self, sink, device, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.sink = sink
+        self.device = device
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.size = 0
+        self.opened = False
+
+    async def open(self):
+        await self.sink.open(self.device)
+        self.opened = True
+
+    async def write(self, data):
+        self.buffer.append(data)
+        self.size += len(data)
+        if self.size >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self):
+        if self.buffer:
+            data = "".join(self.buffer)
+            self.buffer = []
+            self.size = 0
+            await self.sink.write(self.device, data)
+
+    async def close(self):
+        """Flush remaining output and close the device in the sink, if it was opened"""
+        if not self.opened:
+            return
+        self.opened = False
+        await self.flush()
+        await self.sink.close(self.device)
@@ -0,0 +1,382 @@
+"""
+SkilletLoader with a persistent on-disk cache of parsed skillet definitions. Each skillet
+directory gets an index file under ~/.sli/skillets holding the parsed skillet dicts, keyed
+by the absolute path of the skillet file and fingerprinted by file modification time and
+size. Only skillet files that changed since the last run are parsed again.
+
+Template files referenced through a snippet 'file' attribute are inlined into the cached
+definition for skillet types that load them as the snippet element, and are fingerprinted
+the same way.
+
+When a single skillet is requested by name, a lightweight header index (name, type and the
+byte offset of the name line of every skillet file) is used to parse only the named skillet
+and the skillets it depends on, instead of the entire directory.
+
+With jobs greater than 1, skillet files missing from the cache are parsed across a process
+pool before the directory is loaded. The regular SkilletLoader pass then consumes those
+results in its own order, so loaded skillets and skillet_errors match a serial load.
+
+Long running processes such as the SLI daemon can set CachedSkilletLoader.memory_cache to a
+dict to keep the indexes in memory between loads instead of reading them from disk each time.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from skilletlib import Skillet
+from skilletlib import SkilletLoader
+from skilletlib.exceptions import SkilletLoaderException
+
+from sli.tools import expandedHomePath
+from sli.tools import file_fingerprint
+
+CACHE_VERSION = 1
+
+# Skillet types that load a snippet 'file' (or 'payload' for rest) as the snippet element
+TEMPLATE_SKILLET_TYPES = ("panos", "panorama", "panorama-gpcs", "template", "rest")
+
+SKILLET_FILE_PATTERNS = ("*.skillet.y*ml", ".meta-cnc.y*ml")
+HEADER_PATTERN = re.compile(rb"^(name|type):[ \t]*(.*?)[ \t]*$")
+
+
+def read_skillet_header(path):
+    """
+    Scan a skillet file for its top level name and type without parsing the YAML,
+    returns a dict of name, type and the byte offset of the name line
+    """
+    header = {"name": None, "type": None, "offset": None}
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            match = HEADER_PATTERN.match(line.rstrip(b"\r\n"))
+            if match and header[match.group(1).decode()] is None:
+                value = match.group(2).decode("utf-8", errors="replace").split(" #")[0].strip().strip("'\"")
+                header[match.group(1).decode()] = value
+                if match.group(1) == b"name":
+                    header["offset"] = offset
+                if header["name"] is not None and header["type"] is not None:
+                    break
+            offset += len(line)
+    return header
+
+
+def _init_parse_worker():
+    """Silence skilletlib logging in pool workers, errors are reported by the serial pass"""
+    logging.disable(logging.CRITICAL)
+
+
+def parse_skillet_file(path):
+    """
+    Process pool worker, parse a single skillet file. Returns a tuple of path, parsed skillet
+    dict (None on error or if it can not be cached) and the time taken in seconds
+    """
+    start = time.time()
+    try:
+        skillet_dict = json.loads(json.dumps(SkilletLoader().load_skillet_dict_from_path(path)))
+    except (SkilletLoaderException, OSError, TypeError, ValueError):
+        # Failed files are parsed again by the serial pass, which records the error
+        skillet_dict = None
+    return path, skillet_dict, time.time() - start
+
+
+class CachedSkilletLoader(SkilletLoader):
+
+    # Shared in-memory indexes keyed by cache file, disabled unless set to a dict
+    memory_cache = None
+
+    def __init__(self, rebuild=False, cache_dir=None, jobs=1):
+        super().__init__()
+        self.rebuild = rebuild
+        self.jobs = jobs
+        self.cache_dir = cache_dir if cache_dir else expandedHomePath(".sli/skillets")
+        self.cache_file = ""  # Populated when loading a directory
+        self.index = {}
+        self.headers = {}
+        self.seen = set()
+        self.changed = False  # Index is only written to disk when modified during a load
+        self.prefetched = set()
+        self.timings = {}  # Parse time in seconds of each skillet file parsed during this load
+        self.stats = {"cached": 0, "parsed": 0, "templates": 0}
+
+    def _get_cache_file(self, directory):
+        """Return the index file used for a given skillet directory"""
+        key = hashlib.sha256(str(Path(directory).resolve()).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self, directory):
+        """Load the skillet and header indexes for a skillet directory, empty if missing or outdated"""
+        self.cache_file = self._get_cache_file(directory)
+        self.index = {}
+        self.headers = {}
+        self.seen = set()
+        self.changed = self.rebuild
+        if self.rebuild:
+            return
+        if self.memory_cache is not None and self.cache_file in self.memory_cache:
+            # Copied so loaders running in other threads never see this load's changes mid-iteration
+            skillets, headers = self.memory_cache[self.cache_file]
+            self.index, self.headers = dict(skillets), dict(headers)
+            return
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                index = json.loads(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable skillet cache {self.cache_file} - {e}")
+            return
+        if index.get("version") != CACHE_VERSION:
+            return
+        self.index = index.get("skillets", {})
+        self.headers = index.get("headers", {})
+
+    def _save_index(self, directory):
+        """Write entries seen during this load to disk, dropping skillets that no longer exist"""
+        skillets = {k: v for k, v in self.index.items() if k in self.seen}
+        headers = {k: v for k, v in self.headers.items() if k in self.seen}
+        if len(skillets) != len(self.index) or len(headers) != len(self.headers):
+            self.changed = True
+        if self.memory_cache is not None:
+            self.memory_cache[self.cache_file] = (skillets, headers)
+        if not self.changed:
+            return
+
+        write_dict = {
+            "version": CACHE_VERSION,
+            "directory": str(Path(directory).resolve()),
+            "skillets": skillets,
+            "headers": headers,
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_file = f"{self.cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file, "w") as f:
+                f.write(json.dumps(write_dict))
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            print(f"Unable to write skillet cache {self.cache_file} - {e}")
+
+    def load_all_skillets_from_dir(self, directory):
+        """Load all skillets from directory, using and refreshing the on-disk cache"""
+        self._load_index(directory)
+        if self.jobs > 1:
+            self._prefetch(directory)
+        skillets = super().load_all_skillets_from_dir(directory)
+        self._save_index(directory)
+        return skillets
+
+    def _prefetch(self, directory):
+        """Parse skillet files that are missing from the cache across a process pool"""
+        paths = []
+        for skillet_file in self._find_skillet_files(Path(directory)):
+            path = str(skillet_file.absolute())
+            entry = self.index.get(path)
+            if entry is None or entry["fingerprint"] != file_fingerprint(path):
+                paths.append(path)
+        if len(paths) < 2:
+            return
+
+        chunksize = max(1, len(paths) // (self.jobs * 4))
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_parse_worker) as executor:
+            results = list(executor.map(parse_skillet_file, paths, chunksize=chunksize))
+
+        for path, skillet_dict, elapsed in results:
+            self.timings[path] = elapsed
+            if skillet_dict is None:
+                continue
+            self.seen.add(path)
+            self.prefetched.add(path)
+            self.changed = True
+            self.index[path] = {"fingerprint": file_fingerprint(path), "skillet": skillet_dict, "templates": None}
+
+    def _find_skillet_files(self, directory):
+        """Recursively list skillet files the same way SkilletLoader searches a directory"""
+        skillet_files = []
+        for pattern in SKILLET_FILE_PATTERNS:
+            skillet_files.extend(directory.glob(pattern))
+        for d in directory.iterdir():
+            if not d.is_dir() or d.is_symlink():
+                continue
+            if any(pattern == d.name or str(d.absolute()).endswith(pattern) for pattern in self.skip_dirs):
+                continue
+            skillet_files.extend(self._find_skillet_files(d))
+        return skillet_files
+
+    def _build_header_index(self, directory):
+        """Return a mapping of skillet name to skillet file paths, scanning only changed files"""
+        names = {}
+        for skillet_file in self._find_skillet_files(Path(directory)):
+            path = str(skillet_file.absolute())
+            self.seen.add(path)
+            fingerprint = file_fingerprint(path)
+            header = self.headers.get(path)
+            if header is None or header["fingerprint"] != fingerprint:
+                try:
+                    header = read_skillet_header(path)
+                except OSError:
+                    continue
+                header["fingerprint"] = fingerprint
+                self.headers[path] = header
+                self.changed = True
+            if header["name"]:
+                names.setdefault(header["name"], []).append(path)
+        return names
+
+    @staticmethod
+    def _get_dependencies(skillet_dict):
+        """Return names of skillets required to build a skillet, through includes or a workflow"""
+        snippets = skillet_dict.get("snippets", [])
+        dependencies = [x["include"] for x in snippets if "include" in x]
+        if skillet_dict.get("type") == "workflow":
+            dependencies.extend(x["name"] for x in snippets if "name" in x)
+        return dependencies
+
+    def load_named_skillets(self, directory, skillet_name):
+        """
+        Load only the skillet named skillet_name from directory along with the skillets it
+        depends on. Returns None if the skillet could not be located through the header
+        index, in which case the caller should load the entire directory.
+        """
+        self._load_index(directory)
+        self.skillet_errors = list()
+        names = self._build_header_index(directory)
+        if skillet_name not in names:
+            self._save_index(directory)
+            return None
+
+        # Parse the requested skillet and walk its dependencies, recording dependency order
+        skillet_dicts = {}
+        ordered = []
+
+        def visit(name):
+            if name in skillet_dicts:
+                return
+            skillet_dicts[name] = None
+            for path in names.get(name, []):
+                try:
+                    skillet_dict = self.load_skillet_dict_from_path(path)
+                except (SkilletLoaderException, OSError) as e:
+                    self.skillet_errors.append({"path": path, "error": str(e)})
+                    continue
+                if skillet_dict.get("name") != name:
+                    continue
+                skillet_dicts[name] = skillet_dict
+                for dependency in self._get_dependencies(skillet_dict):
+                    visit(dependency)
+                ordered.append(skillet_dict)
+                return
+
+        visit(skillet_name)
+        if skillet_dicts[skillet_name] is None:
+            # The header did not match the parsed skillet, fall back to a full load
+            self._save_index(directory)
+            return None
+
+        # Dependencies are created before the skillets including them, the same as a full load
+        for skillet_dict in ordered:
+            try:
+                if any("include" in x for x in skillet_dict.get("snippets", [])):
+                    skillet_dict = self.compile_skillet_dict(skillet_dict)
+                self.skillets.append(self.create_skillet(skillet_dict))
+            except SkilletLoaderException as e:
+                self.skillet_errors.append({"path": skillet_dict.get("name", ""), "error": str(e)})
+
+        self._save_index(directory)
+        return self.skillets
+
+    def load_skillet_dict_from_path(self, skillet_path):
+        """Return a parsed skillet dict from the cache if the file is unchanged, parse it otherwise"""
+        path = str(Path(skillet_path).absolute())
+        self.seen.add(path)
+        fingerprint = file_fingerprint(path)
+        entry = self.index.get(path)
+
+        if entry is not None and fingerprint is not None and entry["fingerprint"] == fingerprint:
+            if path in self.prefetched:
+                self.prefetched.discard(path)
+                self.stats["parsed"] += 1
+            else:
+                self.stats["cached"] += 1
+            skillet_dict = copy.deepcopy(entry["skillet"])
+            self._apply_templates(entry, skillet_dict)
+            return skillet_dict
+
+        start = time.time()
+        skillet_dict = super().load_skillet_dict_from_path(skillet_path)
+        self.timings[path] = time.time() - start
+        self.stats["parsed"] += 1
+        self.changed = True
+
+        # A JSON round trip both copies the dict before skilletlib mutates it and
+        # ensures it can be stored, skillets with unsupported values are not cached
+        try:
+            cached_dict = json.loads(json.dumps(skillet_dict))
+        except (TypeError, ValueError):
+            self.index.pop(path, None)
+            return skillet_dict
+        self.index[path] = {"fingerprint": fingerprint, "skillet": cached_dict, "templates": None}
+        return skillet_dict
+
+    def _apply_templates(self, entry, skillet_dict):
+        """Inline cached template contents into snippets if no template file has changed"""
+        templates = entry.get("templates")
+        if not templates:
+            return
+        for template in templates:
+            if file_fingerprint(template["path"]) != template["fingerprint"]:
+                # Let skilletlib read the templates again and record them on create_skillet
+                entry["templates"] = None
+                self.changed = True
+                return
+        snippets = skillet_dict.get("snippets", [])
+        for template in templates:
+            for snippet in snippets:
+                if snippet.get("name") == template["name"] and snippet.get(template["attribute"]) == template["file"]:
+                    snippet["element"] = template["element"]
+                    self.stats["templates"] += 1
+
+    def create_skillet(self, skillet_dict: dict) -> Skillet:
+        """Create a skillet and record any template files it inlined for future loads"""
+        skillet = super().create_skillet(skillet_dict)
+
+        skillet_file = os.path.join(skillet_dict.get("snippet_path", ""), skillet_dict.get("skillet_filename", ""))
+        entry = self.index.get(skillet_file)
+        if entry is None or entry["templates"] is not None or skillet.type not in TEMPLATE_SKILLET_TYPES:
+            return skillet
+
+        # Skillets built from includes are compiled from others, only cache templates of plain skillets
+        cached_snippets = entry["skillet"].get("snippets", [])
+        if any("include" in x for x in cached_snippets):
+            return skillet
+
+        templates = []
+        for snippet in skillet.snippet_stack:
+            attribute = "payload" if snippet.get("payload") else "file"
+            if not snippet.get(attribute) or not isinstance(snippet.get("element"), str):
+                continue
+
+            # Only record snippets that did not define an element inline
+            original = [x for x in cached_snippets if x.get("name") == snippet.get("name")]
+            if not original or original[0].get("element"):
+                continue
+
+            template_path = str(Path(skillet.path).joinpath(snippet[attribute]).resolve())
+            templates.append({
+                "name": snippet["name"],
+                "attribute": attribute,
+                "file": snippet[attribute],
+                "path": template_path,
+                "fingerprint": file_fingerprint(template_path),
+                "element": snippet["element"],
+            })
+        entry["templates"] = templates
+        self.changed = True
+        return skillet
@@ -1,17 +1,11 @@
-from skilletlib import Skillet
-from skilletlib import SkilletLoader
-from inspect import isclass
-from types import ModuleType
 import traceback
 
-from sli import commands
+from sli.commands import COMMAND_MANIFEST, get_command_class
 from sli.contextManager import ContextManager
-from sli.commands.base import BaseCommand
 from sli.errors import InvalidArgumentsException, SLIException, SLILoaderError
+from sli.tools import print_table
 from sli.tools import store_traceback
 
-from skilletlib.exceptions import LoginException, TargetConnectionException
-
 
 class SkilletLineInterface:
 
@@ -21,14 +15,19 @@ class SkilletLineInterface:
         self.args = args
         self._unpack_options()
         self.command_map = {}
-        self._load_commands()
         self._verify_command()
-        self.sl = SkilletLoader()
-        self.no_skillet = getattr(self.command_map[self.action], "no_skillet", False) is True
-        self.no_context = getattr(self.command_map[self.action], "no_context", False) is True
+        self._load_commands()
+        self.sl = None
+        self.no_skillet = COMMAND_MANIFEST[self.action]["no_skillet"] is True
+        self.no_context = COMMAND_MANIFEST[self.action]["no_context"] is True
 
         # Load skillets only if the command requires them
         if not self.no_skillet:
+            from sli.skilletCache import CachedSkilletLoader
+            self.sl = CachedSkilletLoader(
+                rebuild=self.options.get("rebuild_cache", False),
+                jobs=self.options.get("jobs", 1),
+            )
             self._load_skillets()
             self._verify_loaded_skillets()
 
@@ -38,7 +37,8 @@ class SkilletLineInterface:
             self.context = self.cm.load_context()
         else:
             self.context = self.cm.load_environment()
-        self.skillet: Skillet = None  # Active running skillet
+        self.skillet = None  # Active running skillet
+        self.exception = None  # Error raised by the command, if any
 
     def _unpack_options(self):
         """Unpack options onto self where required"""
@@ -50,42 +50,35 @@ class SkilletLineInterface:
         if self.report_file:
             self.generate_report = True
 
-    def _load_commands(self, command_map=None):
+    def _load_commands(self):
         """
-        Loads a list of commands from the sli.commands package. Does so by iterating over contents of the
-        package and locating types of 'type' that have an sli_command specified.
+        Imports only the module implementing the requested action, as located through the
+        command manifest, and adds its command class to the command map
         """
-
-        if command_map is None:
-            command_map = self.command_map
-
-        # Go through each module in the commands package
-        for item in dir(commands):
-            item_obj = getattr(commands, item)
-            if isinstance(item_obj, ModuleType):
-
-                # Get only the attributes which are classes
-                for item_attr in dir(item_obj):
-                    item_attr_obj = getattr(item_obj, item_attr)
-                    if isclass(item_attr_obj):
-
-                        # Only load commands that subclass BaseCommand
-                        if item_attr_obj == BaseCommand or not issubclass(item_attr_obj, BaseCommand):
-                            continue
-
-                        # Load only SLI command modules that are appropriately written
-                        command_string = getattr(item_attr_obj, "sli_command", "")
-                        if len(command_string) > 0:
-                            command_map[command_string] = item_attr_obj
+        self.command_map[self.action] = get_command_class(self.action)
 
     def _verify_command(self):
-        """Called in __init__ to verify a submitted command is valid before running SkilletLoader"""
-        if self.action not in self.command_map:
+        """Called in __init__ to verify a submitted command is valid before importing or running SkilletLoader"""
+        if self.action not in COMMAND_MANIFEST:
             raise InvalidArgumentsException('Invalid action, run "sli --help" for list of available actions')
 
     def _load_skillets(self):
         """Called in __init__ to front end SkilletLoader"""
-        self.skillets = self.sl.load_all_skillets_from_dir(self.options.get("directory", "./"))
+        directory = self.options.get("directory", "./")
+        self.skillets = None
+
+        # Commands working on a single named skillet only load that skillet and its dependencies
+        name = self.options.get("name")
+        if name and COMMAND_MANIFEST[self.action]["single_skillet"]:
+            self.skillets = self.sl.load_named_skillets(directory, name)
+        if self.skillets is None:
+            self.skillets = self.sl.load_all_skillets_from_dir(directory)
+
+        if self.verbose and len(self.sl.timings):
+            timings = [{"path": x, "time": "{0:.3f}s".format(self.sl.timings[x])} for x in sorted(self.sl.timings)]
+            print("Skillet parse times:")
+            print_table(timings, {"Skillet File": "path", "Parse Time": "time"})
+
         if len(self.sl.skillet_errors) > 0:
             print("Errors on loading skillets:")
             for err in self.sl.skillet_errors:
@@ -100,13 +93,32 @@ class SkilletLineInterface:
         if len(self.skillets) < 1:
             raise SLIException("No skillets were loaded.")
 
-    @classmethod
-    def get_commands(self):
-        """Load commands for purposes other than execution"""
-
-        command_map = {}
-        self._load_commands(self, command_map=command_map)
-        return command_map
+    @staticmethod
+    def enable_shared_caches():
+        """
+        Keep parsed skillets, decrypted contexts, connected device sessions and SSH connections in
+        memory between commands run in this process, used by the SLI daemon and the programmatic API
+        """
+        from sli.panoplyPool import PanoplyPool
+        from sli.skilletCache import CachedSkilletLoader
+        from sli.sshPool import SSHConnectionPool
+
+        if CachedSkilletLoader.memory_cache is None:
+            CachedSkilletLoader.memory_cache = {}
+        if ContextManager.memory_contexts is None:
+            ContextManager.memory_contexts = {}
+        if PanoplyPool.sessions is None:
+            PanoplyPool.sessions = {}
+        if SSHConnectionPool.connections is None:
+            SSHConnectionPool.connections = {}
+
+    @staticmethod
+    def get_commands():
+        """
+        Return manifest entries of all commands for purposes other than execution,
+        no command modules are imported
+        """
+        return COMMAND_MANIFEST
 
     def execute(self):
         """Run supplied SLI command"""
@@ -117,12 +129,17 @@ class SkilletLineInterface:
             run_func()
         except SLILoaderError as sl_exc:
             raise sl_exc
-        except (LoginException, TargetConnectionException) as exc:
-            print(f"Login error: {exc}")
-            if self.options.get("raise_exception"):
-                raise exc
-        except Exception as exc:
-            if self.options.get("raise_exception"):
+        except BaseException as exc:
+            self.exception = exc
+            # skilletlib exceptions subclass BaseException, they are imported here so
+            # commands that never touch skilletlib do not pay for importing it
+            from skilletlib.exceptions import LoginException, TargetConnectionException
+
+            if isinstance(exc, (LoginException, TargetConnectionException)):
+                print(f"Login error: {exc}")
+                if self.options.get("raise_exception"):
+                    raise exc
+            elif not isinstance(exc, Exception) or self.options.get("raise_exception"):
                 raise exc
             else:
                 print(f"Error: {exc}")
@@ -1,56 +1,198 @@
 """
-A Programamtic entrypoint for sli commands, populates sys.argv
-as if the command were called from the CLI directly.
+A programmatic entrypoint for sli commands. Commands run in-process without touching
+sys.argv, and return an SLIResult describing the outcome. Parsed skillets, decrypted
+contexts and connected device sessions are kept in memory and shared between calls.
 usage:
 
 from sli.sli_api import run_command
-run_command("sli configure -n my_skillet.skillet.yaml -d 192.168.1.1 -u username -p password")
+result = run_command("sli configure -n my_skillet.skillet.yaml -d 192.168.1.1 -u username -p password")
+if not result.success:
+    print(result.output)
+
+run_command may be called from multiple threads. Commands using the same context run
+one at a time, and output printed by a command is captured per thread. Commands should
+not rely on interactive prompts, supply credentials and variables as options instead.
 """
 
+import copy
+import io
+import shlex
 import sys
+import threading
+
+import click
+
 from sli.cli import cli
-from sli.errors import SLIException, InvalidArgumentsException
+from sli.errors import SLIException
+from sli.skilletLineInterface import SkilletLineInterface
+
+setup_lock = threading.Lock()
+context_locks = {}
+thread_output = None  # ThreadOutput installed as sys.stdout on first use
+
+
+class SLIResult:
+    """Outcome of a command run with run_command"""
+
+    def __init__(self, args):
+        self.args = args
+        self.status = 0
+        self.output = ""  # Printed output, empty when not captured
+        self.exception = None
+        self.context = {}
+        self.context_changes = {"added": {}, "changed": {}, "removed": []}
+        self.skillet_results = None
+
+    @property
+    def success(self):
+        return self.status == 0
+
+    def __repr__(self):
+        return f"SLIResult(args={self.args!r}, status={self.status})"
+
+
+class ThreadOutput:
+    """
+    Replacement for sys.stdout sending output of threads running API commands to their own
+    buffer, output of any other thread is written to the original stream
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    @property
+    def buffer(self):
+        return getattr(self.local, "buffer", None)
+
+    def write(self, data):
+        if self.buffer is None:
+            return self.stream.write(data)
+        return self.buffer.write(data)
+
+    def flush(self):
+        if self.buffer is None:
+            self.stream.flush()
+
+    def isatty(self):
+        return self.buffer is None and self.stream.isatty()
 
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
 
-def start_quote(text):
-    """Check for text starting quote"""
-    return text.startswith("'") or text.startswith('"')
 
+def _setup():
+    """Enable the shared caches and per thread output capture, once per process"""
+    global thread_output
+    with setup_lock:
+        SkilletLineInterface.enable_shared_caches()
+        if thread_output is None:
+            thread_output = ThreadOutput(sys.stdout)
+            sys.stdout = thread_output
 
-def end_quote(text):
-    """Check for text ending quote"""
-    return text.endswith("'") or text.endswith('"')
 
+def _get_context_lock(context_name):
+    """Return the lock serializing commands that use a given context"""
+    with setup_lock:
+        return context_locks.setdefault(context_name, threading.Lock())
 
-def remove_quote(text):
-    """Remove quotes from text"""
-    return text.replace("'", "").replace('"', "")
+
+def _split_command(command):
+    """Split a command string or list into arguments, dropping a leading sli"""
+    args = shlex.split(command) if isinstance(command, str) else list(command)
+    if len(args) > 0 and args[0] == "sli":
+        args = args[1:]
+    return args
+
+
+def _diff_context(before, after):
+    """Return keys added, changed and removed by a command"""
+    changes = {"added": {}, "changed": {}, "removed": []}
+    for key, value in after.items():
+        if key not in before:
+            changes["added"][key] = value
+        elif before[key] != value:
+            changes["changed"][key] = value
+    changes["removed"] = [x for x in before if x not in after]
+    return changes
+
+
+def _execute(args, result):
+    """Parse arguments as the cli would and execute the command, populating result"""
+    with cli.make_context("sli", list(args)) as ctx:
+        kwargs = dict(ctx.params)
+        extra_args = ctx.args
+
+    action = kwargs.pop("action").replace("-", "_")
+    options = {key: kwargs[key] for key in kwargs if kwargs[key] is not None}
+
+    with _get_context_lock(options.get("context_name", "default")):
+        sli = SkilletLineInterface(options, action, extra_args)
+        before = copy.deepcopy(sli.context)
+        try:
+            sli.execute()
+        finally:
+            result.exception = sli.exception
+            result.context = sli.context
+            result.context_changes = _diff_context(before, sli.context)
+
+    if sli.skillet is not None and result.exception is None:
+        result.skillet_results = sli.skillet.get_results()
+    if result.exception is not None:
+        result.status = 1
+
+
+def run_command(command, capture_output=True, capture_exceptions=False, raise_exception=False):
+    """
+    Run an sli command in this process and return an SLIResult. The command may be a string
+    as typed on the command line or a list of arguments, a leading "sli" is optional.
+
+    Exceptions raised by the command propagate to the caller as they would from the cli, while
+    errors the cli reports itself are printed and recorded on result.exception, and raised too
+    with raise_exception or the -re option. With capture_exceptions, raised exceptions are
+    recorded on the result instead, unless raise_exception or -re is given. With capture_output,
+    everything the command prints is returned in result.output instead of being written to stdout.
+    """
+    _setup()
+    args = _split_command(command)
+    result = SLIResult(args)
+    buffer = io.StringIO() if capture_output else None
+    thread_output.local.buffer = buffer
+
+    try:
+        _execute(args, result)
+    except click.exceptions.Exit as e:
+        result.status = e.exit_code
+    except KeyboardInterrupt:
+        raise
+    except BaseException as e:
+        # skilletlib exceptions subclass BaseException
+        result.exception = e
+        if isinstance(e, click.ClickException):
+            result.status = e.exit_code
+        elif isinstance(e, SystemExit):
+            result.status = e.code if isinstance(e.code, int) else 1
+        else:
+            result.status = 1
+        if not capture_exceptions or raise_exception or "-re" in args or "--raise-exception" in args:
+            raise
+        if isinstance(e, click.ClickException):
+            print(f"Error: {e.format_message()}")
+    finally:
+        thread_output.local.buffer = None
+        if buffer is not None:
+            result.output = buffer.getvalue()
+
+    if result.exception is not None and raise_exception:
+        raise result.exception
+    return result
 
 
 def sli_command(command):
     """
-    Break a given command apart and load it into sys.argv as if
-    it was processed normally from the cli
+    Run a command string starting with sli, printing its output as if it was run from the
+    cli. Kept for compatibility, returns the SLIResult of run_command
     """
-    cmd = command.strip().split(" ")
-    if not cmd[0] == "sli":
+    if not command.strip().split(" ")[0] == "sli":
         raise SLIException("SLI command did not start with sli")
-    cmd = cmd[1:]
-    arg = ''
-    in_arg = False
-    for c in cmd:
-        if start_quote(c):
-            in_arg = True
-            arg += remove_quote(c)
-        elif in_arg and end_quote(c):
-            in_arg = False
-            arg += " " + remove_quote(c)
-            sys.argv.append(arg)
-            arg = ''
-        elif in_arg:
-            arg += " " + c
-        else:
-            sys.argv.append(c)
-    if in_arg:
-        raise InvalidArgumentsException("No closing quote found in SLI arguments")
-    cli(standalone_mode=False)
+    return run_command(command, capture_output=False)
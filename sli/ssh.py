@@ -1,103 +1,99 @@
-import paramiko
-
 """
 Provides a raw SSH session with an NGFW, useful for scripting checks against
-a user session
+a user session. SSHSession is a synchronous facade over AsyncSSHSession, running it on the
+event loop of the current thread, so blocking commands share the prompt handling, error
+detection, windowed set commands and connection reuse of the sessions used against many
+devices at once
 """
 
+import asyncio
 
-class SSHSession:
+from sli.async_ssh import AsyncSSHSession
+from sli.errors import SSHCommandTimeout
+from sli.sshPool import get_event_loop
+
+# Seconds allowed for each command to return to a prompt unless a command_timeout is given
+DEFAULT_COMMAND_TIMEOUT = 120
 
-    BUFFER_LEN = 9999
 
-    def __init__(self, device, username, password, echo=False):
+class SSHSession:
+
+    def __init__(self, device, username, password, echo=False, port=22, connect_timeout=None,
+                 command_timeout=DEFAULT_COMMAND_TIMEOUT):
         self.device = device
+        self.port = port
         self.username = username
-        self.password = password
         self.echo = echo
-        self._connect()
-        self._get_prompt()
-        self.mode = "op"
-        self.error_text = ""
-
-    def _connect(self):
-        self.client = paramiko.client.SSHClient()
-        self.client.load_system_host_keys()
-        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        self.client.connect(
-            self.device,
-            username=self.username,
-            password=self.password
+        # Logging in must reach a prompt within connect_timeout, or command_timeout if not given
+        self.connect_timeout = connect_timeout or command_timeout
+        self.session = AsyncSSHSession(
+            device,
+            username,
+            password,
+            connect_timeout=self.connect_timeout,
+            command_timeout=command_timeout,
+            port=port,
+            echo=echo,
         )
-        self.channel = self.client.invoke_shell()
-
-    def _get_prompt(self):
-        recvd = ""
-        while ">" not in recvd:
-            recvd = self.channel.recv(self.BUFFER_LEN).decode()
-            if self.echo:
-                print(recvd)
-        self.prompt = recvd.strip()
+        self.loop = get_event_loop()
+        try:
+            self.run(self.session.connect())
+        except asyncio.TimeoutError:
+            self.session.close()
+            raise SSHCommandTimeout(f"Command timed out after {self.connect_timeout}s: login")
+
+    def run(self, coroutine):
+        """Run a coroutine, such as a method of the AsyncSSHSession, to completion and return its result"""
+        return self.loop.run_until_complete(coroutine)
+
+    @property
+    def prompt(self):
+        return self.session.prompt
+
+    @property
+    def mode(self):
+        return self.session.mode
+
+    def close(self):
+        """Close the session, see AsyncSSHSession.close"""
+        channel = self.session.c_stdin.channel if self.session.c_stdin is not None else None
+        self.session.close()
+        if channel is not None:
+            self.run(channel.wait_closed())
 
     def get_error_text(self):
         """Get error text generated by this module"""
-        return self.error_text
+        return self.session.error or ""
+
+    def cli_command(self, cmd):
+        """Execute a command and return its output"""
+        return self.run(self.session.cli_command(cmd))
 
     def config_mode(self):
         """Enter configuration mode"""
-
-        self.prompt = self.prompt.replace(">", "#")
-        self.channel.send("configure\n")
-        recvd = ""
-        while self.prompt not in recvd:
-            recvd = self.channel.recv(self.BUFFER_LEN).decode()
-            if self.echo:
-                print(recvd)
-        self.mode = "config"
+        self.run(self.session.config_mode())
 
     def set_command(self, cmd):
         """Execute a set command inside config mode, returns False on error"""
-
-        if not self.mode == "config":
-            self.config_mode()
-        self.channel.send(f"{cmd}\n")
-        total_received = ""
-        received = ""
-
-        # Scan the output until the prompt is found
-        while "[edit]" not in total_received:
-            received = self.channel.recv(self.BUFFER_LEN).decode()
-            if self.echo:
-                print(received)
-            total_received += received
-            received = ""
-
-        # Check the output for any errors
-        error_text = ['Unknown command:', 'Invalid syntax.']
-        for et in error_text:
-            if et in total_received:
-                self.error_text = total_received
-                return False
-        return True
-
-    def extended_set_command(self, cmd, expect="[edit]", error_expect=None):
-        """Extended version of set_command to expect a given non-typical prompt from the NGFW"""
-
+        return self.run(self.session.set_command(cmd))
+
+    def set_commands(self, commands, window=50, on_result=None):
+        """
+        Execute set commands in config mode, keeping up to window commands sent ahead of their
+        responses, see AsyncSSHSession.set_commands. Returns the index of the failing command, or
+        None if every command succeeded
+        """
+        return self.run(self.session.set_commands(commands, window=window, on_result=on_result))
+
+    def extended_set_command(self, cmd, expect=None, error_expect=None):
+        """
+        Extended version of set_command to expect a given non-typical prompt from the NGFW, or the
+        prompt if expect is None. Returns False if error_expect is seen first
+        """
         if not self.mode == "config":
             raise Exception("SLI SSH extended_set_command called not from config mode")
+        return self.run(self.session.send_expect(cmd, expect=expect, error_expect=error_expect))
 
-        self.channel.send(f"{cmd}\n")
-        total_received = ""
-        received = ""
-
-        # Scan the output until expected text is found
-        while expect not in total_received:
-            received = self.channel.recv(self.BUFFER_LEN).decode()
-            if self.echo:
-                print(received)
-            total_received += received
-            if error_expect:
-                if error_expect in total_received:
-                    self.error_text = total_received
-                    return False
-        return True
+    def run_command_script(self, lines, out_file=None):
+        """Run lines as a script, see AsyncSSHSession.run_command_script"""
+        return self.run(self.session.run_command_script(lines, out_file=out_file))
@@ -0,0 +1,312 @@
+"""
+Shared asyncssh connections for SLI SSH sessions. Each session opens its own channel, and
+sessions against the same device and user share a connection, up to max_channels sessions on
+one connection at once, so concurrent sessions to a device skip the TCP and SSH handshakes of
+all but one of them. Closing a session closes its channel, and a connection with no channels
+left stays open for the next session until unused for idle_timeout seconds.
+
+At most max_connections connections are open at once across all devices. A session needing a
+new connection beyond that closes the least recently used idle connection, or waits for a
+session to close when none is idle. Devices limiting channels per connection below
+max_channels refuse a channel, which lowers the limit of that connection.
+
+The pool is disabled unless enabled with SkilletLineInterface.enable_shared_caches, as the SLI
+daemon and the programmatic API do so connections outlive a command, or for the duration of a
+run with SSHConnectionPool.scope, as commands connecting to many devices at once do. Otherwise
+every session opens a connection of its own, closed when the session is.
+
+Connections belong to the event loop they were opened on and are only shared on that loop.
+Connections of other threads are closed on their own loop with call_soon_threadsafe.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import threading
+import time
+
+import asyncssh
+
+
+def get_event_loop():
+    """Return the event loop of the current thread, creating one if it has none or it was closed"""
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = None
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop
+
+
+class PooledConnection:
+    """An asyncssh connection of SSHConnectionPool and the sessions using it"""
+
+    def __init__(self, pool_key, max_channels):
+        self.connection = None
+        self.pool_key = pool_key
+        self.loop = pool_key[0]
+        self.opened = self.loop.create_future()  # Result is the connection once open
+        self.thread = threading.get_ident()
+        self.channels = 1  # Sessions with a channel open, or opening one, on the connection
+        self.max_channels = max_channels
+        self.reusable = True
+        self.released = time.monotonic()
+
+    def close(self):
+        """
+        Close the connection from any thread. Connections of another thread are closed on their
+        own event loop, and those of a closed loop are left as they can no longer be used
+        """
+        if self.connection is None or self.loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop or (running is None and self.thread == threading.get_ident()):
+            self.connection.close()
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.connection.close)
+        except RuntimeError:
+            pass  # The loop was closed meanwhile
+
+
+class SSHConnectionPool:
+
+    # Open connections keyed by get_pool_key, lists of PooledConnection. Disabled unless set to a dict
+    connections = None
+    # Sessions sharing one connection at once
+    max_channels = 4
+    # Connections open at once across all devices, in use or idle, including those being opened
+    max_connections = 100
+    # Seconds an idle connection is kept
+    idle_timeout = 300
+    lock = threading.Lock()
+    # Event loops and futures of sessions waiting for the open connections to drop below max_connections
+    waiters = []
+
+    @staticmethod
+    def get_pool_key(device, port, username, password):
+        """
+        Return the key a connection is pooled under. The password is part of it, so a connection
+        is only shared by sessions that could have logged in themselves
+        """
+        digest = hashlib.sha256(password.encode()).hexdigest()
+        return asyncio.get_running_loop(), device, port, username, digest
+
+    @classmethod
+    async def connect(cls, device, port, username, password, **kwargs):
+        """
+        Return a pooled connection to the device for the user with a free channel, or open a new
+        one with asyncssh.connect and kwargs, waiting while max_connections are open. The caller
+        opens one channel on it and calls release once the channel is closed. Returns the
+        connection and whether it was already open
+        """
+        pool_key = cls.get_pool_key(device, port, username, password)
+        pooled = None
+        while True:
+            with cls.lock:
+                if cls.connections is None:
+                    break
+                cls._evict()
+                pooled = cls._find_channel(pool_key)
+                if pooled is None and (cls._open_count() < cls.max_connections or cls._close_idle()):
+                    # Channel limits learned from refusals of the device carry over to new connections
+                    max_channels = min([x.max_channels for x in cls.connections.get(pool_key, [])] + [cls.max_channels])
+                    pooled = PooledConnection(pool_key, max_channels)
+                    cls.connections.setdefault(pool_key, []).append(pooled)
+                    break
+                if pooled is None:
+                    waiter = pool_key[0].create_future()
+                    cls.waiters.append((pool_key[0], waiter))
+            if pooled is None:
+                await waiter
+                continue
+            # Another session is opening the connection, shielded as it waits for it too
+            try:
+                return await asyncio.shield(pooled.opened), True
+            except asyncio.CancelledError:
+                if not pooled.opened.cancelled():
+                    raise
+
+        if pooled is None:
+            connection = await asyncssh.connect(device, port=port, username=username, password=password, **kwargs)
+            connection.pooled = None
+            return connection, False
+
+        try:
+            connection = await asyncssh.connect(device, port=port, username=username, password=password, **kwargs)
+        except BaseException as e:
+            with cls.lock:
+                cls._remove(pooled)
+                cls._wake()
+            if isinstance(e, asyncio.CancelledError):
+                pooled.opened.cancel()
+            else:
+                pooled.opened.set_exception(e)
+                pooled.opened.exception()  # Retrieved, sessions waiting for it raise it too
+            raise
+        connection.pooled = pooled
+        pooled.connection = connection
+        pooled.opened.set_result(connection)
+        return connection, False
+
+    @classmethod
+    def release(cls, connection, reusable=True):
+        """
+        Release the channel of a session on a connection obtained from connect, once the channel
+        is closed. The connection stays open for other sessions when pooled and reusable, and is
+        closed once its last channel is released otherwise
+        """
+        pooled = connection.pooled
+        if pooled is None:
+            connection.close()
+            return
+        with cls.lock:
+            pooled.channels -= 1
+            pooled.released = time.monotonic()
+            pooled.reusable = pooled.reusable and reusable
+            close = pooled.channels <= 0 and not (pooled.reusable and cls._is_pooled(pooled))
+            if close:
+                cls._remove(pooled)
+            cls._evict()
+            cls._wake()
+        if close:
+            pooled.close()
+
+    @classmethod
+    def refuse_channel(cls, connection):
+        """
+        Release the channel a device refused to open on a shared connection, and open no more
+        channels on the connection than it has open
+        """
+        pooled = connection.pooled
+        with cls.lock:
+            pooled.channels -= 1
+            pooled.max_channels = max(pooled.channels, 1)
+            cls._wake()
+
+    @classmethod
+    def discard(cls, connection):
+        """Close a connection that can not be used anymore, along with the channels of other sessions on it"""
+        pooled = connection.pooled
+        if pooled is None:
+            connection.close()
+            return
+        with cls.lock:
+            pooled.reusable = False
+            cls._remove(pooled)
+            cls._wake()
+        pooled.close()
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def scope(cls):
+        """
+        Enable the pool while the block runs if it is disabled, so the sessions of one run share
+        connections, closing the connections pooled once the block exits
+        """
+        with cls.lock:
+            enable = cls.connections is None
+            if enable:
+                cls.connections = {}
+        try:
+            yield
+        finally:
+            if enable:
+                with cls.lock:
+                    pooled = [x for connections in cls.connections.values() for x in connections]
+                    cls.connections = None
+                    cls._wake()
+                for x in pooled:
+                    x.close()
+
+    @classmethod
+    def _is_pooled(cls, pooled):
+        """Return whether a connection is in the pool, called holding lock"""
+        return cls.connections is not None and pooled in cls.connections.get(pooled.pool_key, [])
+
+    @classmethod
+    def _remove(cls, pooled):
+        """Remove a connection from the pool if it is in it, called holding lock"""
+        if not cls._is_pooled(pooled):
+            return
+        connections = cls.connections[pooled.pool_key]
+        connections.remove(pooled)
+        if not connections:
+            del cls.connections[pooled.pool_key]
+
+    @classmethod
+    def _find_channel(cls, pool_key):
+        """Take a channel of a pooled connection for pool_key with one free, called holding lock"""
+        for pooled in cls.connections.get(pool_key, []):
+            if pooled.reusable and pooled.channels < pooled.max_channels:
+                pooled.channels += 1
+                return pooled
+        return None
+
+    @classmethod
+    def _open_count(cls):
+        """Return the number of open connections and connections being opened, called holding lock"""
+        return sum(len(x) for x in cls.connections.values())
+
+    @classmethod
+    def _idle(cls):
+        """Return connections without open channels, least recently used first, called holding lock"""
+        idle = [x for connections in cls.connections.values() for x in connections if x.channels <= 0]
+        return sorted(idle, key=lambda x: x.released)
+
+    @classmethod
+    def _close_idle(cls):
+        """Close the least recently used idle connection, called holding lock. Returns whether one was closed"""
+        idle = cls._idle()
+        if not idle:
+            return False
+        cls._remove(idle[0])
+        idle[0].close()
+        return True
+
+    @classmethod
+    def _evict(cls):
+        """
+        Close connections idle for longer than idle_timeout, called holding lock. Connections of
+        closed event loops are dropped as they can not be used
+        """
+        now = time.monotonic()
+        for pooled in cls._idle():
+            if now - pooled.released > cls.idle_timeout or pooled.loop.is_closed():
+                cls._remove(pooled)
+                pooled.close()
+
+    @classmethod
+    def _wake(cls):
+        """Wake sessions waiting in connect to check the pool again, called holding lock"""
+        for loop, waiter in cls.waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(cls._set_waiter, waiter)
+        cls.waiters = []
+
+    @staticmethod
+    def _set_waiter(waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    @classmethod
+    def idle_count(cls):
+        """Return the number of pooled connections without open channels"""
+        if cls.connections is None:
+            return 0
+        with cls.lock:
+            cls._evict()
+            return len(cls._idle())
+
+    @classmethod
+    def open_count(cls):
+        """Return the number of open pooled connections, in use or idle"""
+        if cls.connections is None:
+            return 0
+        with cls.lock:
+            return sum(len(x) for x in cls.connections.values())
@@ -1,16 +1,15 @@
 import os
 from os.path import expanduser
-from panforge import Report
 from getpass import getpass
 import socket
-from jinja2 import Environment
-import jmespath
-from lxml import etree
 from io import BytesIO
 from pathlib import Path
+from typing import TYPE_CHECKING
 from sli.errors import AppSkilletNotFoundException
-from skilletlib import Skillet
-from skilletlib import SkilletLoader
+
+# skilletlib, panforge, jinja2, jmespath and lxml are imported where used, as this module is loaded on every invocation
+if TYPE_CHECKING:
+    from skilletlib import Skillet
 
 
 def get_var(var, args, context, options={}):
@@ -30,6 +29,8 @@ def get_var(var, args, context, options={}):
 
 def render_template(template_text, context):
     """Render a template loaded from a string with an appropriate environment"""
+    from jinja2 import Environment
+
     env = Environment(extensions=['jinja2_ansible_filters.AnsibleCoreFiltersExtension'])
     return env.from_string(template_text).render(context)
 
@@ -62,6 +63,9 @@ def print_table(objs, defs):
             return " " * max
         return f"  {text + ' ' * (max - len(text))}  "
 
+    if any("." in x for x in defs.values()):
+        import jmespath
+
     # Calculate max width of each column
     cols = {k: {"width": len(k)} for k in defs}
     for o in objs:
@@ -96,6 +100,8 @@ def generate_report(out_file, data, report_dir, header=None):
     Generate a panforge report at 'out_file' from source 'data' using 'report_dir'
     as the root reporting directory for panforge
     """
+    from panforge import Report
+
     if not os.path.exists(report_dir):
         print(f'Could not generate report, source directory {report_dir} not present')
         return
@@ -333,6 +339,15 @@ def expandedHomePath(directory):
     return expanduser("~") + os.path.sep + os.path.sep.join(directory.strip().split('/'))
 
 
+def file_fingerprint(path):
+    """Return a fingerprint of a file used to detect changes, or None if it can not be read"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
 def store_traceback(tb):
     """
     Attempt to store a given traceback (tb) in ~/.sli/traceback.txt
@@ -402,6 +417,7 @@ def merge_into_parent(xpath, config, child_xml):
     at xpath. If xpath does not exist, walk back the path until we
     find a common element, and generate the missing structure
     """
+    from lxml import etree
 
     # Find the first level of matching elements
     print(f"Merging new config node {child_xml.tag} into missing parent")
@@ -466,6 +482,7 @@ def merge_xml_into_config(xpath, config, child_xml):
 
 def format_xml_string(xml, indent=0):
     """Take a string of XML and reformat it for proper spacing at a specified indent level"""
+    from lxml import etree
 
     parser = etree.XMLParser(remove_blank_text=True)
     xml_doc = etree.fromstring(xml, parser)
@@ -527,16 +544,18 @@ def get_input(var_label: str, var_default: str) -> str:
     return val
 
 
-def load_app_skillet(skillet_name) -> Skillet:
+def load_app_skillet(skillet_name) -> "Skillet":
     """
     Returns a SLI specific application skillet found in the app_skillets folder
 
     :param skillet_name: Name of skillet to load
     :return: Skillet loaded from name
     """
+    from skilletlib import SkilletLoader
+
     sli_path = Path(__file__).parent.joinpath("app_skillets").resolve()
     inline_sl = SkilletLoader(sli_path)
-    app_skillet: Skillet = inline_sl.get_skillet_with_name(skillet_name)
+    app_skillet: "Skillet" = inline_sl.get_skillet_with_name(skillet_name)
     if not app_skillet:
         raise AppSkilletNotFoundException("Could not find required resources")
     return app_skillet
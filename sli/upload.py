@@ -0,0 +1,75 @@
+"""
+Streaming file uploads to the XML API. Files are sent as a multipart/form-data body read from
+disk as the request is sent, so configurations of hundreds of MB are never held in memory.
+"""
+
+import os
+import uuid
+
+from lxml import etree
+
+
+def check_well_formed(file_name):
+    """
+    Parse an XML file incrementally, clearing elements once parsed so memory stays flat for
+    large files. Raises etree.XMLSyntaxError if the file is not well formed XML
+    """
+    for _, element in etree.iterparse(file_name, events=("end",), huge_tree=True):
+        element.clear(keep_tail=True)
+
+
+class MultipartFile:
+    """
+    File-like multipart/form-data body of a single file field. Its length is known up front so
+    requests sends it with a Content-Length, and on_progress(sent, total) is called with the
+    bytes read so far as the body is sent
+    """
+
+    def __init__(self, file_name, field="file", on_progress=None):
+        self.file_name = file_name
+        self.on_progress = on_progress
+        self.boundary = uuid.uuid4().hex
+        self.head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{os.path.basename(file_name)}"\r\n'
+            "Content-Type: application/xml\r\n\r\n"
+        ).encode()
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self.size = os.path.getsize(file_name)
+        self.sent = 0
+        self.file = None
+        self.rewind()
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return len(self.head) + self.size + len(self.tail)
+
+    def rewind(self):
+        """Start reading the body from the beginning, allowing the request to be sent again"""
+        self.close()
+        self.file = open(self.file_name, "rb")
+        self.sent = 0
+
+    def read(self, size=-1):
+        """Return up to size bytes of the body, all remaining bytes if size is negative"""
+        size = size if size >= 0 else len(self)
+        data = b""
+        if self.sent < len(self.head):
+            data = self.head[self.sent:self.sent + size]
+        if len(data) < size:
+            data += self.file.read(size - len(data))
+        if len(data) < size and self.sent + len(data) >= len(self.head) + self.size:
+            offset = self.sent + len(data) - len(self.head) - self.size
+            data += self.tail[offset:offset + size - len(data)]
+        self.sent += len(data)
+        if self.on_progress is not None and len(data):
+            self.on_progress(self.sent, len(self))
+        return data
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
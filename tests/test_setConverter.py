@@ -0,0 +1,168 @@
+from types import SimpleNamespace
+
+import pytest
+from lxml import etree
+from pan.xapi import PanXapiError
+
+from sli.commands.loadSet import LoadSet
+from sli.setConverter import SetConverter, merge_element
+
+VSYS = "/config/devices/entry[@name='localhost.localdomain']/vsys/entry[@name='vsys1']"
+
+CONFIG = """
+<config>
+  <devices>
+    <entry name="localhost.localdomain">
+      <network>
+        <profiles>
+          <custom-profile><entry name="cp0"><setting>a</setting></entry></custom-profile>
+        </profiles>
+      </network>
+      <vsys>
+        <entry name="vsys1">
+          <address>
+            <entry name="a0"><ip-netmask>10.0.0.1/32</ip-netmask></entry>
+          </address>
+          <custom-list><values><member>x</member></values></custom-list>
+          <rulebase><security><rules>
+            <entry name="r0"><from><member>trust</member></from></entry>
+          </rules></security></rulebase>
+        </entry>
+      </vsys>
+    </entry>
+  </devices>
+</config>
+"""
+
+
+def test_single_rule_member_is_a_member_list():
+    parsed = SetConverter().parse("set rulebase security rules r1 from any")
+    assert parsed.xpath == f"{VSYS}/rulebase/security/rules/entry[@name='r1']/from"
+    assert parsed.value == ["any"]
+    assert SetConverter.build([parsed], parsed.steps[:-1]) == "<from><member>any</member></from>"
+
+
+def test_single_static_address_group_member_is_a_member_list():
+    parsed = SetConverter().parse("set address-group g1 static a1")
+    assert parsed.xpath == f"{VSYS}/address-group/entry[@name='g1']/static"
+    assert parsed.value == ["a1"]
+
+
+def test_profile_setting_members_take_precedence_over_profile_entries():
+    parsed = SetConverter().parse("set rulebase security rules r1 profile-setting profiles virus default")
+    assert parsed.xpath == f"{VSYS}/rulebase/security/rules/entry[@name='r1']/profile-setting/profiles/virus"
+    assert parsed.value == ["default"]
+
+
+def test_zone_protection_profile_holds_entries():
+    parsed = SetConverter().parse("set network profiles zone-protection-profile zp1 flood tcp-syn enable yes")
+    assert parsed.xpath == (
+        "/config/devices/entry[@name='localhost.localdomain']/network/profiles/"
+        "zone-protection-profile/entry[@name='zp1']/flood/tcp-syn/enable"
+    )
+    assert parsed.value == "yes"
+
+
+def test_entries_and_members_are_learned_from_config():
+    converter = SetConverter(CONFIG)
+    assert converter.parse("set network profiles custom-profile cp1 setting b").steps[-2] == ("custom-profile", "cp1")
+    assert converter.parse("set custom-list values y").value == ["y"]
+
+
+def test_member_delete_is_not_converted():
+    with pytest.raises(ValueError):
+        SetConverter().parse("delete address-group g1 static a1")
+
+
+def test_prepare_anchors_at_existing_path_and_merges_into_entries():
+    converter = SetConverter(CONFIG)
+    parsed = [
+        converter.parse("set address a0 description first"),
+        converter.parse("set address a1 ip-netmask 10.0.0.2/32"),
+    ]
+    xpath, element = converter.prepare(parsed)
+    assert xpath == VSYS
+    assert element == ('<address><entry name="a0"><description>first</description></entry>'
+                       '<entry name="a1"><ip-netmask>10.0.0.2/32</ip-netmask></entry></address>')
+
+    converter.accept()
+    addresses = converter.config.xpath(f"{VSYS}/address/entry")
+    assert [x.get("name") for x in addresses] == ["a0", "a1"]
+    assert addresses[0].findtext("ip-netmask") == "10.0.0.1/32"
+    assert addresses[0].findtext("description") == "first"
+
+
+def test_merge_element_merges_as_config_set():
+    target = etree.fromstring(
+        '<address><entry name="a0"><ip-netmask>10.0.0.1/32</ip-netmask><tag><member>t0</member></tag></entry></address>'
+    )
+    merge_element(target, etree.fromstring(
+        '<root><entry name="a0"><ip-netmask>10.0.0.2/32</ip-netmask><tag><member>t0</member><member>t1</member></tag>'
+        '</entry><entry name="a1"/></root>'
+    ))
+    assert etree.tostring(target).decode() == (
+        '<address><entry name="a0"><ip-netmask>10.0.0.2/32</ip-netmask><tag><member>t0</member><member>t1</member>'
+        '</tag></entry><entry name="a1"/></address>'
+    )
+
+
+def test_prepare_rejects_text_merged_into_member_list():
+    converter = SetConverter(CONFIG)
+    converter.member_paths = set()
+    with pytest.raises(ValueError):
+        converter.prepare([converter.parse("set custom-list values y")])
+
+
+def test_prepare_creates_missing_path():
+    converter = SetConverter(CONFIG)
+    parsed = [converter.parse("set address-group g1 static a0")]
+    xpath, element = converter.prepare(parsed)
+    assert xpath == VSYS
+    assert element == '<address-group><entry name="g1"><static><member>a0</member></static></entry></address-group>'
+
+
+def test_prepare_is_kept_only_once_accepted():
+    converter = SetConverter(CONFIG)
+    converter.prepare([converter.parse("set address a1 ip-netmask 10.0.0.2/32")])
+    assert len(converter.config.xpath(f"{VSYS}/address/entry")) == 1
+    converter.accept()
+    assert len(converter.config.xpath(f"{VSYS}/address/entry")) == 2
+
+
+def test_check_rejects_text_in_member_list_and_mixed_entries():
+    converter = SetConverter()
+    config = etree.fromstring(CONFIG)
+    with pytest.raises(ValueError):
+        converter.check(config, converter.parse("set custom-list values y"))
+
+    rules = config.xpath(f"{VSYS}/rulebase/security/rules")[0]
+    etree.SubElement(rules, "r1")
+    with pytest.raises(ValueError):
+        converter.check(config, converter.parse("set rulebase security rules r0 from [ any ]"))
+
+
+class RejectingXapi:
+    """Rejects config set requests holding the text rejected"""
+
+    def __init__(self):
+        self.elements = []
+
+    def set(self, xpath, element):
+        if "rejected" in element:
+            raise PanXapiError("rejected")
+        self.elements.append(element)
+
+
+def test_set_over_api_stops_at_first_rejected_command():
+    command = LoadSet(SimpleNamespace(args=[], options={}, verbose=True))
+    command.pb = None
+    command.applied = 0
+    command.total = 8
+    command.api_requests = 0
+    converter = SetConverter()
+    pan = SimpleNamespace(xapi=RejectingXapi())
+    parsed = [converter.parse(f"set address a{i} description {'rejected' if i == 5 else 'ok'}") for i in range(8)]
+
+    assert command._set_over_api(pan, converter, parsed) == 5
+    assert command.applied == 5
+    assert "a6" not in "".join(pan.xapi.elements)
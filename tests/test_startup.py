@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+# Modules kept out of startup, imported by the commands and helpers using them
+HEAVY_MODULES = ("lxml", "jinja2", "jmespath")
+
+
+def test_help_does_not_import_heavy_modules(tmp_path):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "sli.cli", "--help"],
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, HOME=str(tmp_path)),
+    )
+    assert result.returncode == 0
+    imported = {x.split("|")[-1].strip() for x in result.stderr.splitlines() if x.startswith("import time:")}
+    assert not imported & set(HEAVY_MODULES)